@@ -9,61 +9,26 @@ const sensorNames = [
 ];
 const nsensors = 7;
 
-// Function to get current year and week number
-function getCurrentYearAndWeek() {
-    const now = new Date();
-    const start = new Date(now.getFullYear(), 0, 0);
-    const diff = (now - start) + ((start.getTimezoneOffset() - now.getTimezoneOffset()) * 60 * 1000);
-    const oneDay = 1000 * 60 * 60 * 24;
-    const dayOfYear = Math.floor(diff / oneDay);
-    return {
-        year: now.getFullYear(),
-        week: Math.ceil(dayOfYear / 7)
-    };
-}
-
-// Function to fetch CSV data for a specific year and week and update chart
-async function fetchDataAndUpdateChart() {
-    const { year, week } = getCurrentYearAndWeek();
-    //console.info('Current year and week:', year, week);
+// Function to fetch a pre-built feed (24h, 7d or 1y, written by export_rs500_feeds.py or the daemon) and update chart
+async function fetchDataAndUpdateChart(range) {
     try {
-        const filePath = `data/${year}/w${week}.csv`;
-        //console.info('Fetching data from:', filePath)
-        const response = await fetch(filePath);
+        const filePath = `data/feeds/${range}.json`;
+        const response = await fetch(filePath, {cache: 'no-cache'});
         if (!response.ok) {
-            throw new Error('CSV file not found or unable to fetch data.');
+            throw new Error('Feed not found or unable to fetch data.');
         }
-        const csvData = await response.text();
-        const rows = csvData.split('\n');
-        //console.info(`Fetched data for year ${year}, week ${week}:`, rows.length, 'rows');
-        //console.info('Sample data:', rows[3]);
+        // Columnar feed: timestamps relative to t0 in seconds, one value array per channel
+        const feed = await response.json();
+        const timestamps = feed.t.map(dt => (feed.t0 + dt) * 1000);
 
-        const timestamps = [];
         const sensorData = {};
-
-        rows.forEach(row => {
-            const columns = row.split(',');
-            if (columns.length == 8) { // Ensure there are just the right number of columns
-                //const timestamp = moment(columns[0], 'YYYY-MM-DD HH:mm:ss'); // Parse timestamp using Moment.js
-                timestamps.push(columns[0]);
-
-                for (let i = 0; i < nsensors; i++) {
-                    const sensorId = `S${i + 1}`;
-                    if (!sensorData[sensorId]) {
-                        sensorData[sensorId] = { temperature: [], humidity: [] };
-                    }
-                    const sValues = columns[i + 1].split('|').map(sensorString => parseFloat(sensorString.trim()));
-                    sensorData[sensorId].temperature.push(sValues[0]);
-                    sensorData[sensorId].humidity.push(sValues[1]);
-                }
-            }
-        });
-        //console.info('Parsed data:', timestamps.length, ' timestamps')
-        //console.info('Sample data:', timestamps[3], sensorData['T1'].temperature[3])
+        for (let i = 0; i < Math.min(nsensors, feed.channels); i++) {
+            sensorData[`S${i + 1}`] = { temperature: feed.temperature[i], humidity: feed.humidity[i] };
+        }
 
         updateChart(timestamps, sensorData);
     } catch (error) {
-        console.error(`Error fetching data for year ${year}, week ${week}:`, error);
+        console.error(`Error fetching feed ${range}:`, error);
     }
 }
 
@@ -74,6 +39,9 @@ function updateChart(timestamps, sensorData) {
     var tracesTemperature = [];
     var tracesHumidity = [];
     sensorNames.forEach((sensorName, index) => {
+        if (!sensorData[`S${index+1}`]) {
+            return;
+        }
         tracesTemperature.push({
             x: timestamps,
             y: sensorData[`S${index+1}`].temperature,
@@ -103,6 +71,10 @@ function updateChart(timestamps, sensorData) {
         height: chartHeight,
         width: chartWidth,
         hovermode:'closest',
+        // Feed timestamps are wall clock times encoded as UTC milliseconds
+        xaxis: {
+            type: 'date'
+        },
         grid: {
             rows: 2,
             columns: 1,
@@ -170,7 +142,11 @@ function updateChart(timestamps, sensorData) {
     };
 };
 
-// Call the fetchDataAndUpdateChart function for a specific year and week when the page is loaded
+// Call the fetchDataAndUpdateChart function for the selected range when the page is loaded or the range changes
 window.onload = function () {
-    fetchDataAndUpdateChart();
+    const rangeSelect = document.getElementById('range');
+    rangeSelect.onchange = function () {
+        fetchDataAndUpdateChart(rangeSelect.value);
+    };
+    fetchDataAndUpdateChart(rangeSelect.value);
 };
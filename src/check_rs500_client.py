@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Thin client for check_rs500_server.py: takes the same arguments as check_rs500.py and prints the same output.
+# Only small standard library modules (and the configuration lookup) are imported to keep the start up time low.
+
+import configparser
+import json
+import os
+import socket
+import sys
+
+from rs500common.configuration import discover_config_file_by_name
+
+DEFAULT_SOCKET = '/tmp/check_rs500.sock'
+EXIT_CODE_UNKNOWN = 3
+
+
+def socket_path() -> str:
+    """
+    RS500_CHECK_SOCKET if set, else the ``[server] socket`` option of the check_rs500.ini the server reads.
+    """
+    path = os.environ.get('RS500_CHECK_SOCKET')
+    if path:
+        return path
+    conf = configparser.ConfigParser()
+    try:
+        conf.read(discover_config_file_by_name('check_rs500.ini', os.path.dirname(__file__)))
+    except FileNotFoundError:
+        return DEFAULT_SOCKET
+    return conf.get('server', 'socket', fallback=DEFAULT_SOCKET)
+
+
+SOCKET_PATH = socket_path()
+
+
+def main(argv) -> int:
+    request = json.dumps(list(argv)) + '\n'
+    data = b''
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(10)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(request.encode('utf-8'))
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+    except OSError as e:
+        print('unknown: check server not reachable at {} ({})'.format(SOCKET_PATH, e))
+        return EXIT_CODE_UNKNOWN
+    try:
+        code, _, output = data.decode('utf-8').partition('\n')
+        exit_code = int(code)
+    except ValueError:
+        # UnicodeDecodeError is a ValueError as well
+        print('unknown: invalid reply from check server at {} ({!r})'.format(SOCKET_PATH, data[:80]))
+        return EXIT_CODE_UNKNOWN
+    print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
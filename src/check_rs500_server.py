@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+import signal
+import threading
+from datetime import datetime
+from os.path import dirname
+
+from rs500check.handler import CheckContext
+from rs500check.server import CheckServer, DEFAULT_SOCKET
+from rs500common.configuration import ConfigProvider, discover_config_file_by_name
+
+
+def main() -> None:
+    conf = ConfigProvider(discover_config_file_by_name('check_rs500.ini', dirname(__file__))).get_config()
+    path = conf.get(section='server', option='socket', fallback=DEFAULT_SOCKET)
+    server = CheckServer(path, CheckContext(conf))
+    # shutdown() blocks until serve_forever() returns, so it must not run in the thread serving
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: threading.Thread(target=server.shutdown).start())
+    print('Listening on {} since {}'.format(path, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
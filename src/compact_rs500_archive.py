@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import os
+import time
+from datetime import datetime, timedelta
+
+from rs500archive.compressed import BLOCK_SIZE, CompressedFile, compressed_path, merge_lines, write_compressed
+from rs500archive.loader import load_csv
+from rs5002csv.sink import archive_path
+
+
+def _timed_load(path: str) -> float:
+    started = time.monotonic()
+    load_csv(path)
+    return time.monotonic() - started
+
+
+GRACE = timedelta(days=1)
+
+
+def compact_all(dbdir: str, keep: bool=False, block_size: int=BLOCK_SIZE, level: int=9,
+                now: datetime=None, grace: timedelta=GRACE) -> None:
+    """
+    Compresses every closed week and removes the CSV unless ``keep`` is set. A week is closed once it ended more than
+    ``grace`` ago and its file was not modified for ``grace``: the CSV sink keeps the file of the previous week open
+    with up to a group of uncommitted lines until the next commit. A CSV next to an existing compressed file of the
+    same name is merged into it: around New Year the sink files the last days of December under the calendar year,
+    i.e. in the ``w01.csv`` of the year whose first week was compacted in January.
+    """
+    if now is None:
+        now = datetime.now()
+    open_weeks = {archive_path(dbdir, now), archive_path(dbdir, now - grace)}
+    settled = time.mktime((now - grace).timetuple())
+    csv_bytes = 0
+    csz_bytes = 0
+    csv_seconds = 0.0
+    csz_seconds = 0.0
+    for csv_path in sorted(glob.glob(os.path.join(dbdir, '*', 'w*.csv'))):
+        if csv_path in open_weeks or os.path.getmtime(csv_path) > settled:
+            continue
+        csz_path = compressed_path(csv_path)
+        if keep and os.path.exists(csz_path) and os.path.getmtime(csz_path) >= os.path.getmtime(csv_path):
+            # Kept from an earlier run and not appended to since
+            continue
+        csv_load = _timed_load(csv_path)
+        with open(csv_path, 'rb') as fp:
+            lines = fp.read().splitlines(True)
+        csv_size = sum(len(line) for line in lines)
+        if os.path.exists(csz_path):
+            lines = merge_lines(CompressedFile(csz_path).read().splitlines(True), lines)
+        # Written next to the existing file and checked before it replaces it and the CSV is removed
+        new_path = csz_path + '.new'
+        write_compressed(lines, new_path, block_size, level)
+        if b''.join(lines) != CompressedFile(new_path).read():
+            os.remove(new_path)
+            raise ValueError('Compressed copy of {} differs from the original'.format(csv_path))
+        os.replace(new_path, csz_path)
+        csz_load = _timed_load(csz_path)
+        csz_size = os.path.getsize(csz_path)
+        csv_bytes += csv_size
+        csz_bytes += csz_size
+        csv_seconds += csv_load
+        csz_seconds += csz_load
+        print('{}: {} -> {} bytes ({:.1f}x), load {:.3f} s -> {:.3f} s'.format(
+            csv_path, csv_size, csz_size, csv_size / max(csz_size, 1), csv_load, csz_load))
+        if not keep:
+            os.remove(csv_path)
+    if csz_bytes > 0:
+        print('Total: {} -> {} bytes ({:.1f}x smaller), load {:.2f} s -> {:.2f} s'.format(
+            csv_bytes, csz_bytes, csv_bytes / csz_bytes, csv_seconds, csz_seconds))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress the closed weekly CSV files into seekable zlib blocks.')
+    parser.add_argument('dbdir', help='database directory containing <year>/wNN.csv')
+    parser.add_argument('--keep', action='store_true', help='keep the CSV files next to the compressed ones')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE,
+                        help='uncompressed bytes per block (default: %(default)s)')
+    parser.add_argument('--level', type=int, default=9, help='zlib compression level (default: %(default)s)')
+    parser.add_argument('--grace-hours', type=float, default=GRACE.total_seconds() / 3600,
+                        help='only compress weeks ended and untouched for this long (default: %(default)s)')
+    args = parser.parse_args()
+    compact_all(args.dbdir, args.keep, args.block_size, args.level, grace=timedelta(hours=args.grace_hours))
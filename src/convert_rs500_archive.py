@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import os
+import time
+
+from rs500archive.binary import binary_path, convert_csv
+
+
+def convert_all(dbdir: str, channels: int=None, force: bool=False) -> None:
+    csv_bytes = 0
+    bin_bytes = 0
+    for csv_path in sorted(glob.glob(os.path.join(dbdir, '*', 'w*.csv'))):
+        bin_path = binary_path(csv_path)
+        if not force and os.path.exists(bin_path) and os.path.getmtime(bin_path) >= os.path.getmtime(csv_path):
+            continue
+        started = time.monotonic()
+        bin_path, readings = convert_csv(csv_path, bin_path, channels)
+        csv_size = os.path.getsize(csv_path)
+        bin_size = os.path.getsize(bin_path)
+        csv_bytes += csv_size
+        bin_bytes += bin_size
+        print('{}: {} rows ({} skipped), {} -> {} bytes in {:.2f} s'.format(
+            csv_path, len(readings), readings.skipped, csv_size, bin_size, time.monotonic() - started))
+    if bin_bytes > 0:
+        print('Total: {} -> {} bytes ({:.1f}x smaller)'.format(csv_bytes, bin_bytes, csv_bytes / bin_bytes))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the weekly CSV files into the binary archive format.')
+    parser.add_argument('dbdir', help='database directory containing <year>/wNN.csv')
+    parser.add_argument('--channels', type=int, help='number of channels per row (default: from the first row)')
+    parser.add_argument('--force', action='store_true', help='convert files even if they are up to date')
+    args = parser.parse_args()
+    convert_all(args.dbdir, args.channels, args.force)
@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+import argparse
+
+from rs500archive.export import FeedExporter
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write the JSON feeds of the dashboard (24h, 7d, 1y).')
+    parser.add_argument('dbdir', help='database directory containing <year>/wNN.csv')
+    parser.add_argument('outdir', help='output directory, served as data/feeds/ next to index.html')
+    parser.add_argument('--channels', type=int, default=7, help='number of channels')
+    args = parser.parse_args()
+    sizes = FeedExporter(args.dbdir, args.outdir, args.channels).export()
+    for name, size in sorted(sizes.items()):
+        print('{}.json: {:.1f} kB'.format(name, size / 1024))
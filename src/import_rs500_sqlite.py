@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import argparse
+import time
+
+from rs500archive.binary import EXTENSION as BINARY_EXTENSION, load_binary
+from rs500archive.loader import iter_chunks
+from rs500archive.query import PartitionIndex
+from rs500archive.sqlstore import BATCH_ROWS, SqliteStore
+
+
+def import_all(dbdir: str, database: str, channels: int=8, batch_rows: int=BATCH_ROWS) -> int:
+    """
+    Copies every week of the archive (CSV, compressed or binary, all files the archive reads for the week) into the
+    SQLite database. Rows already in the database are replaced, so the import can be repeated and rows found in two
+    files of a week are stored once. The width of each file is read from its rows; ``channels`` is the number of
+    channels of the database, files with fewer channels import as missing values in the other columns.
+    """
+    index = PartitionIndex(dbdir)
+    index.refresh()
+    store = SqliteStore(database, channels)
+    total = 0
+    skipped = 0
+    started = time.monotonic()
+    try:
+        for path in index.partitions():
+            file_started = time.monotonic()
+            chunks = [load_binary(path)] if path.endswith(BINARY_EXTENSION) else iter_chunks([path])
+            rows = 0
+            for chunk in chunks:
+                rows += store.insert_readings(chunk, batch_rows)
+                skipped += chunk.skipped
+            total += rows
+            print('{}: {} rows in {:.2f} s'.format(path, rows, time.monotonic() - file_started))
+    finally:
+        store.close()
+    print('Total: {} rows ({} skipped) in {:.1f} s'.format(total, skipped, time.monotonic() - started))
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import the weekly archive files into a SQLite database.')
+    parser.add_argument('dbdir', help='database directory containing <year>/wNN.csv')
+    parser.add_argument('database', help='SQLite database file, created if missing')
+    parser.add_argument('--channels', type=int, default=8,
+                        help='number of channels of the database (default: %(default)s)')
+    parser.add_argument('--batch', type=int, default=BATCH_ROWS,
+                        help='rows per transaction (default: %(default)s)')
+    args = parser.parse_args()
+    import_all(args.dbdir, args.database, args.channels, args.batch)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+import argparse
+import signal
+import threading
+from sys import stderr
+
+from rs500common.scheduler import TickScheduler
+from rs500plots.render import NAMES, PlotStyle
+from rs500plots.service import RenderService
+
+
+def run(args: argparse.Namespace, stop: threading.Event) -> None:
+    style = PlotStyle(names=[n.strip() for n in args.names.split(',') if n.strip()], points=args.points or None,
+                      method=args.method)
+    service = RenderService(args.dbdir, args.figdir, style, sqlite=args.sqlite, grid=args.grid,
+                            processes=not args.inline, timeout=args.timeout)
+
+    def render() -> None:
+        for name, (ok, result, seconds) in sorted(service.tick().items()):
+            if ok:
+                print('Wrote {}: {:.1f} kB in {:.2f} s'.format(name, result / 1024, seconds))
+            else:
+                print('Rendering {} failed: {}'.format(name, result), file=stderr)
+
+    try:
+        TickScheduler(args.interval).run(render, stop)
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Keep the 24 hour and daily average plots up to date.')
+    parser.add_argument('dbdir', help='database directory containing <year>/wNN.csv')
+    parser.add_argument('figdir', help='directory the figures are written to')
+    parser.add_argument('--sqlite', help='query this SQLite database instead of the week files')
+    parser.add_argument('--interval', type=float, default=60.0, help='seconds between renders (default: %(default)s)')
+    parser.add_argument('--names', default=', '.join(NAMES), help='comma separated channel names')
+    parser.add_argument('--points', type=int, default=500, help='point budget per trace (0: all samples)')
+    parser.add_argument('--method', default='lttb', choices=['lttb', 'minmax'], help='downsampling method')
+    parser.add_argument('--grid', default='1min', help='regular grid of the 24 hour plots (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=120.0,
+                        help='seconds before a render worker is considered hung and restarted (default: %(default)s)')
+    parser.add_argument('--inline', action='store_true', help='render in this process instead of worker processes')
+    args = parser.parse_args()
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    run(args, stop)
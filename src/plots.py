@@ -2,18 +2,19 @@
 
 import os, argparse
 from datetime import datetime, timedelta
-import glob
-import csv
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from plotly.subplots import make_subplots
-import plotly.graph_objects as go
+
+from rs500archive.loader import load
+from rs500archive.query import read_range
+from rs500archive.resample import regrid, resampled_readings
+from rs500archive.rollup import DAY, RollupStore
+from rs500archive.sqlstore import SqliteStore
+from rs500plots.render import MatplotlibRenderer, PlotlyRenderer, PlotStyle
 
 #===============================================================================
 # Data
 #
 dbdir  = '/var/services/homes/jacopo/repos/raumklima/database'
+sqlite = None     # SQLite database written by the daemon's sqlite sink, None to read the week files
 figdir = '/var/services/web/web_images/'
 nsensors = 7
 snames = [
@@ -27,7 +28,9 @@ snames = [
         ]
 limsT  = [18, 27]
 limsRH = [40, 70]
-colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+npoints  = 500    # point budget per trace, None to plot every sample
+dsMethod = 'lttb' # 'lttb' or 'minmax'
+grid     = '1min' # regular grid of the 24 h plots; bins without samples are drawn as breaks
 
 #===============================================================================
 # Classes
@@ -58,158 +61,91 @@ def Data():
 def readDB(fpath):
 
     # read database
-    ifile = open(fpath, 'r')
-    csvreader = csv.reader(ifile)
-    rows = []
-    for row in csvreader:
-        rows.append(row)
-    ifile.close()
-
-    # convert data
-    Tnsensors = len(rows[0])-1
-    if Tnsensors != nsensors:
-        raise ValueError('Number of sensors in table ({}) != from module nsensors ({}).'.format(Tnsensors, nsensors))
-    #
-    table = np.zeros(2*nsensors+1)
-    for row in rows:
-        tstamp = datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S')
-        sensors = np.zeros(2*nsensors)
-        for s in range(nsensors):
-            T  = float(row[1+s][0:6])
-            RH = float(row[1+s][7:])
-            sensors[2*s:2*s+2] = [T, RH]
-        table = np.vstack( (table,  np.append(np.array([tstamp]), sensors)) )
-
-    table = np.delete(table, (0), axis=0)
+    table = load(fpath, channels=nsensors)
+    if table.skipped > 0:
+        print('Skipped {} malformed rows in {}'.format(table.skipped, fpath))
 
     return table
 
 #-------------------------------------------------------------------------------
-def doPlotly(table, nback=0, figName='fig.html'):
+def readRange(start, end=None, store=None):
+
+    # read all week files overlapping [start, end), or query the SQLite database
+    if store is not None:
+        table = store.read_range(start, end, channels=range(1, nsensors+1))
+    else:
+        table = read_range(dbdir, start, end, channels=range(1, nsensors+1))
+    if table.skipped > 0:
+        print('Skipped {} malformed rows'.format(table.skipped))
+
+    return table
+
+#-------------------------------------------------------------------------------
+def plotStyle():
 
+    # names, colors, point budget per trace (the gaps are kept) and y limits
+    return PlotStyle(names=snames[:nsensors], points=npoints, method=dsMethod)
 
-    nback = -min(table.shape[0], -nback)
+#-------------------------------------------------------------------------------
+def reportFigure(figName, table, nback):
 
-    fig = make_subplots(
-            rows=2, cols=1,
-            subplot_titles=("Temperature", "Relative Humidity"),
-            shared_xaxes=True,
-            vertical_spacing=0.04,
-            )
+    fsize = os.path.getsize(os.path.join(figdir, figName))
+    print('Wrote {}: {} samples per trace, budget {} points ({}), {:.1f} kB'.format(
+        figName, len(table.timestamps[nback:]), npoints, dsMethod, fsize/1024))
 
-    for s in range(nsensors):
-        label = snames[s]
-        fig.add_trace(go.Scatter(x=table[nback:, 0], y=table[nback:, 1+2*s  ], name=label,         mode='lines', line=dict(color=colors[s], width=2)), row=1, col=1)
-        fig.add_trace(go.Scatter(x=table[nback:, 0], y=table[nback:, 1+2*s+1], name=label.lower(), mode='lines', line=dict(color=colors[s], width=2)), row=2, col=1)
+#-------------------------------------------------------------------------------
+def doPlotly(table, nback=0, figName='fig.html'):
 
-    for trace in fig['data']: 
-        if(trace['name'].islower()): trace['showlegend'] = False
-    fig.update_layout(
-            height=800, width=700,
-            title_text="",
-            hovermode = 'x unified'
-            )
-    fig.write_html(os.path.join(figdir, figName))
+    nback = -min(len(table), -nback)
+    PlotlyRenderer(plotStyle(), os.path.join(figdir, figName)).render(table[nback:])
+    reportFigure(figName, table, nback)
 
 #-------------------------------------------------------------------------------
 def doMatplotlib(table, nback=0, figName='fig.png'):
 
-    nback = -min(table.shape[0], -nback)
-
-    fig = plt.figure(1); fig.clear()
-    fig, ax = plt.subplots(nrows=2, ncols=1, sharex=True, num=fig.number)
-    limsT  = [1e6, -1e6]
-    limsRH = [1e6, -1e6]
-    for s in range(nsensors):
-        if figName[0:3] != 'avg':
-            label = '{0:.1f} '.format(table[-1,1+2*s]) + snames[s]
-        else:
-            label = snames[s]
-        ax[0].plot(table[nback:, 0], table[nback:, 1+2*s])
-        ax[1].plot(table[nback:, 0], table[nback:, 1+2*s+1], label=label)
-        #
-        if s <= 4:
-            limsT [0] = min(limsT [0], np.min(table[nback:, 1+2*s]))
-            limsT [1] = max(limsT [1], np.max(table[nback:, 1+2*s]))
-            limsRH[0] = min(limsRH[0], np.min(table[nback:, 1+2*s+1]))
-            limsRH[1] = max(limsRH[1], np.max(table[nback:, 1+2*s+1]))
-    limsT  = [limsT [0]-0.5, limsT [1]+0.5]
-    limsRH = [limsRH[0]-2.0, limsRH[1]+2.0]
-
-    ax[1].xaxis.set_major_formatter(
-                mdates.ConciseDateFormatter(ax[1].xaxis.get_major_locator()))
-    # Shrink current axis's height by 10% on the bottom
-    box = ax[1].get_position()
-    ax[1].set_position([box.x0, box.y0 + box.height * 0.1,
-                         box.width, box.height * 0.9])
-    # Put a legend below current axis
-    ax[1].legend(loc='upper center', bbox_to_anchor=(0.40, -0.10),
-                      fancybox=True, shadow=False, ncol=4, fontsize='small')
-    ax[0].set_ylim(limsT)
-    ax[1].set_ylim(limsRH)
-    #ax[1].set_xlim([table[max(nback, -table.shape[0]),0], table[-1,0]])
-    ax[1].set_xlim([(table[-1,0]-timedelta(days=1)), table[-1,0]])
-    ax[0].set_ylabel('Temp')
-    ax[1].set_ylabel('RH')
-    #ax[1].set_xlabel('Time')
-    ax[0].grid(visible=True, which='major', axis='y', alpha=0.3)
-    ax[1].grid(visible=True, which='major', axis='y', alpha=0.3)
-    plt.draw()
-    plt.savefig(os.path.join(figdir, figName), dpi=300, bbox_inches='tight')
-    #pickle.dump(fig, open(figdir + '24hrs.fig.pickle', 'wb'))
-    #print('saved 24hrs')
-
-#plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%m/%d/%Y'))
-#plt.gca().xaxis.set_major_locator(mdates.DayLocator())
-#plt.plot(x,y)
-#plt.gcf().autofmt_xdate()
+    nback = -min(len(table), -nback)
+    if figName[0:3] != 'avg':
+        # last day, legend with the latest temperatures
+        renderer = MatplotlibRenderer(plotStyle(), os.path.join(figdir, figName))
+    else:
+        renderer = MatplotlibRenderer(plotStyle(), os.path.join(figdir, figName), span=None, label_last=False)
+    renderer.render(table[nback:])
+    reportFigure(figName, table, nback)
 
 #-------------------------------------------------------------------------------
-def doAvgMatplotlib(fpath, ndays=1):
-
-    # get files
-    dbFiles = glob.glob(fpath+'*.csv')
-    dbFiles.sort()
-
-    # process averages
-    avgTable   = np.zeros(2*nsensors+1)
-    runningAvg = np.zeros(2*nsensors)
-    day = None
-    ntsteps = 0
-    for week in dbFiles:
-        table = readDB(week)
-        for i in range(table.shape[0]):
-            if (day == None) or ((table[i,0].date() - day).days >= ndays):
-                # initialise / reset start day
-                day = table[i,0].date()
-                if ntsteps > 0:
-                    # save running average
-                    avgTable = np.vstack( (avgTable,  np.append(np.array([day]), runningAvg/ntsteps)) )
-                    runningAvg = np.zeros(2*nsensors)
-                    ntsteps = 0
-            else:
-                # add current time stamp to average
-                runningAvg += table[i, 1:].astype(float)
-                ntsteps += 1
-    avgTable = np.delete(avgTable, (0), axis=0)
-    doMatplotlib(avgTable, nback=0, figName='avg_{0:02d}days.png'.format(ndays))
+def doAvgMatplotlib(year, ndays=1, store=None):
+
+    # daily aggregates, computed by SQLite or updated incrementally from the week files
+    if store is not None:
+        avg = store.aggregate(
+                ndays*DAY, datetime(year, 1, 1), datetime(year+1, 1, 1), channels=range(1, nsensors+1))
+    else:
+        store = RollupStore(dbdir, channels=nsensors)
+        store.update()
+        avg = store.daily(datetime(year, 1, 1), datetime(year+1, 1, 1))
+    # one row per period, empty ones are gaps in the plot
+    avg = regrid(avg, ndays*DAY)
+
+    doMatplotlib(avg.to_readings('mean'), nback=0, figName='avg_{0:02d}days.png'.format(ndays))
 
 #-------------------------------------------------------------------------------
 def read_and_plot(plotKind='avg'):
 
     now  = datetime.now()
     year = now.year
-    wnum = now.isocalendar()[1]
-
-    yearPath = os.path.join(dbdir, '{:4d}'.format(year))
 
-    if plotKind == '24hrs':
-        fname = 'w{:02d}.csv'.format(wnum)
-        table = readDB(os.path.join(yearPath,fname))
-        doMatplotlib(table, nback=-24*60, figName='24hrs.png')
-        doPlotly    (table, nback=-24*60, figName='24hrs.html')
-    elif plotKind == 'avg':
-        doAvgMatplotlib(yearPath, ndays=1)
+    # one connection per run, opened read only: the daemon's sink owns the schema
+    store = SqliteStore(sqlite, channels=nsensors, read_only=True) if sqlite else None
+    try:
+        if plotKind == '24hrs':
+            table = resampled_readings(readRange(now - timedelta(days=1), store=store), grid)
+            doMatplotlib(table, nback=-24*60, figName='24hrs.png')
+            doPlotly    (table, nback=-24*60, figName='24hrs.html')
+        elif plotKind == 'avg':
+            doAvgMatplotlib(year, ndays=1, store=store)
+    finally:
+        if store is not None:
+            store.close()
 
 
 #===============================================================================
@@ -217,6 +153,12 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description = "Make plots.")
     parser.add_argument('-k', '--kind', type=str, default='24hrs', help="what plots")
+    parser.add_argument('-p', '--points', type=int, default=npoints, help="point budget per trace (0: all samples)")
+    parser.add_argument('-s', '--sqlite', type=str, default=sqlite, help="query this SQLite database instead of the week files")
+    parser.add_argument('-m', '--method', type=str, default=dsMethod, choices=['lttb', 'minmax'], help="downsampling method")
     args = parser.parse_args()
+    npoints  = args.points or None
+    dsMethod = args.method
+    sqlite   = args.sqlite
 
     read_and_plot(plotKind=args.kind)
@@ -1,91 +1,60 @@
 #!/usr/bin/env python3
 
+from rs5002csv.sink import Calibration, SnapshotCsvSink, WeeklyCsvSink
+from rs500common.scheduler import TickScheduler
+from rs500reader.acquisition import acquire
 from rs500reader.reader import Rs500Reader
 from datetime import datetime
-import time, os
+import threading, os
 
 nsensors = 7
-maxTries = 50
+deadline = 30.0 # seconds
 #             1     2      3      4      5      6      7
 offsetsT  = [ 0.0,  0.37, -0.12,  0.02,  0.25,  0.05,  0.08]
 offsetsRH = [ 0,    0,     0,     0,     0,     0,     0   ]
 
-class Dummy:
-    def __init__(self, T, H):
-        self.temperature=T
-        self.humidity=H
+def get_and_save(reader=None):
 
-def get_and_save():
-
-    reader = Rs500Reader()
+    if reader is None:
+        reader = Rs500Reader()
     dbdir  = '/volume1/homes/jacopo/repos/raumklima/database'
+    #snapshot = os.path.join(dbdir, 'last_reading.csv')
+    snapshot = '/volume1/docker/homeassistant/config/sensors/raumklima.csv'
 
     now  = datetime.now()
-    tstamp = now.strftime('%Y-%m-%d %H:%M:%S')
-
-    year = now.year
-    wnum = now.isocalendar()[1]
-
-    fpath = os.path.join(dbdir, '{:4d}'.format(year))
-    fname = 'w{:02d}.csv'.format(wnum)
 
-    if not os.path.isdir(fpath):
-        os.makedirs(fpath)
+    acq = acquire(reader, range(1, nsensors+1), deadline=deadline)
+    if not acq.received_at:
+        # no frame at all: a line without values would only be skipped by the readers
+        print('No data after {0:d} tries ({1:.1f} s), nothing written'.format(acq.attempts, acq.duration))
+        return
 
-    cd = []
-    tryNr = 0
-    while (len(cd) != nsensors) and (tryNr < maxTries):
-        data = reader.get_data()
-        cd = []
-        tryNr += 1
-        for i in range(1, nsensors+1, 1):
-            chan_data = data.get_channel_data(i)
-            if chan_data is not None:
-                cd.append( chan_data )
-        #time.sleep(1)
-
-    print('Received data from {0:d}/{1:d} sensors in {2:d} tries'.format(len(cd), nsensors, tryNr))
-    if tryNr == maxTries:
-        cd = []
-        cds = "["
-        for i in range(1, nsensors+1, 1):
-            chan_data = data.get_channel_data(i)
-            if chan_data is not None:
-                cd.append( chan_data )
-                cds += '{0:d}: Y, '.format(i)
-            else:
-                cd.append( Dummy(T=float("NaN"), H=float("NaN")) )
-                cds += '{0:d}: N, '.format(i)
-        cds += "]"
+    print('Received data from {0:d}/{1:d} sensors in {2:d} tries ({3:.1f} s)'.format(
+        nsensors - len(acq.missing), nsensors, acq.attempts, acq.duration))
+    if not acq.complete:
+        cds = "[" + ''.join('{0:d}: {1}, '.format(i, 'N' if i in acq.missing else 'Y') for i in range(1, nsensors+1, 1)) + "]"
         print('\tCould not get all sensors: ' + cds)
-        print('\t[' + ', '.join(['{0:.1f}'.format(cd[i].temperature) for i in range(nsensors)]) + ']')
-
+        print('\t[' + ', '.join(['{0:.1f}'.format(t) for t, h in Calibration([0.0]*nsensors).apply(acq.response)]) + ']')
 
-    if len(cd) == nsensors:
-        ofile = open(os.path.join(fpath, fname), 'a')
-        ofile.write(tstamp)
-        for i in range(len(cd)):
-            ofile.write(', {:4.1f} | {:2.1f}'.format(cd[i].temperature + offsetsT[i], float(cd[i].humidity + offsetsRH[i])))
-        ofile.write('\n')
-        ofile.close()
-
-        #ofile = open(os.path.join(dbdir, 'last_reading.csv'), 'w')
-        ofile = open("/volume1/docker/homeassistant/config/sensors/raumklima.csv", "w")
-        ofile.write(tstamp)
-        for i in range(len(cd)):
-            ofile.write(', {:4.1f}, {:2.1f}'.format(cd[i].temperature + offsetsT[i], float(cd[i].humidity + offsetsRH[i])))
-        ofile.write('\n')
-        ofile.close()
+    calibration = Calibration(offsetsT, offsetsRH)
+    csv = WeeklyCsvSink(dbdir, calibration)
+    try:
+        csv.write(now, acq.response)
+    finally:
+        csv.close()
+    SnapshotCsvSink(snapshot, calibration).write(now, acq.response)
 
 def get_and_save_repeat():
 
-    reader = Rs500Reader()
+    reader = Rs500Reader(persistent=True)
     dbdir  = '/home/pi/repos/raumklima/database/'
     interval = 60 # seconds
 
-    while True:
+    def tick():
 
         data = reader.get_data()
+        if data is None:
+            return
         now  = datetime.now()
         tstamp = now.strftime('%Y-%m-%d %H:%M:%S')
 
@@ -109,7 +78,7 @@ def get_and_save_repeat():
         ofile.write('\n')
         ofile.close()
 
-        time.sleep(interval)
+    TickScheduler(interval).run(tick, threading.Event())
 
 
 if __name__ == '__main__':
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 
+import argparse
+
 from rs500reader.reader import Rs500Reader
+from rs500reader.stations import discover_stations
+from rs500reader.transport import HidTransport
+
+
+def list_stations():
+    for station in discover_stations():
+        print('path = {}, serial = {}'.format(station.path.decode(errors='replace'), station.serial or '-'))
 
 
-def get_and_print():
-    reader = Rs500Reader()
+def get_and_print(serial: str=None):
+    reader = Rs500Reader(transport=HidTransport(serial=serial))
     data = reader.get_data()
     print('--------------------------------')
     print('Channel | Temperature | Humidity')
@@ -14,7 +23,15 @@ def get_and_print():
         if chan_data is not None:
             print('{:7d} | {:8.1f} °C | {:6d} %'.format(i, chan_data.temperature, chan_data.humidity))
     print('================================')
+    print('Query took {:.0f} ms'.format(reader.last_latency * 1000))
 
 
 if __name__ == '__main__':
-    get_and_print()
+    parser = argparse.ArgumentParser(description='Read the current values of a RS 500 station')
+    parser.add_argument('-l', '--list', action='store_true', help='list the attached stations')
+    parser.add_argument('-s', '--serial', help='serial number of the station to read (default: the first one)')
+    args = parser.parse_args()
+    if args.list:
+        list_stations()
+    else:
+        get_and_print(args.serial)
@@ -0,0 +1,132 @@
+import os
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from rs500common.files import atomic_write
+from rs500common.pipeline import Sink
+from rs500reader.do import Response
+
+
+class Calibration(object):
+    """
+    Per channel offsets added to the raw values of channels ``1..len(temperature)``.
+    """
+
+    def __init__(self, temperature: Sequence[float], humidity: Sequence[float]=None):
+        self.temperature = list(temperature)
+        self.humidity = list(humidity) if humidity is not None else [0] * len(self.temperature)
+        if len(self.humidity) != len(self.temperature):
+            raise ValueError('Got {} temperature but {} humidity offsets'.format(
+                len(self.temperature), len(self.humidity)))
+
+    @property
+    def channels(self) -> int:
+        return len(self.temperature)
+
+    def apply(self, response: Response) -> List[Tuple[float, float]]:
+        """
+        Returns ``(temperature, humidity)`` for every calibrated channel, NaN for channels missing in the response.
+        """
+        values = []
+        for i in range(self.channels):
+            chan_data = response.get_channel_data(i + 1)
+            if chan_data is None:
+                values.append((float('NaN'), float('NaN')))
+            else:
+                values.append((chan_data.temperature + self.temperature[i],
+                               float(chan_data.humidity + self.humidity[i])))
+        return values
+
+
+def archive_path(dbdir: str, timestamp: datetime) -> str:
+    return os.path.join(dbdir, '{:4d}'.format(timestamp.year), 'w{:02d}.csv'.format(timestamp.isocalendar()[1]))
+
+
+def format_archive_line(timestamp: datetime, values: Sequence[Tuple[float, float]]) -> str:
+    return timestamp.strftime('%Y-%m-%d %H:%M:%S') + ''.join(
+        ', {:4.1f} | {:2.1f}'.format(t, h) for t, h in values) + '\n'
+
+
+def format_snapshot_line(timestamp: datetime, values: Sequence[Tuple[float, float]]) -> str:
+    return timestamp.strftime('%Y-%m-%d %H:%M:%S') + ''.join(
+        ', {:4.1f}, {:2.1f}'.format(t, h) for t, h in values) + '\n'
+
+
+class WeeklyCsvSink(Sink):
+    """
+    Appends one line per sample to ``<dbdir>/<year>/wNN.csv``. The file of the current week stays open and is
+    switched when a sample belongs to another week. Lines are collected and written together once ``commit_every``
+    lines are pending or ``commit_interval`` seconds passed since the last commit, whichever comes first; with
+    ``fsync`` every commit is also forced to disk. The defaults write every line right away, as readers of the
+    archive (rollups, feeds) expect; larger groups let a spinning disk sleep between commits.
+    """
+
+    name = 'csv'
+
+    def __init__(self, dbdir: str, calibration: Calibration, commit_every: int=1, commit_interval: float=None,
+                 fsync: bool=False, clock: Callable[[], float]=time.monotonic):
+        self.dbdir = dbdir
+        self.calibration = calibration
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self.clock = clock
+        self.__path = None  # type: Optional[str]
+        self.__fp = None
+        self.__pending = []  # type: List[str]
+        self.__committed_at = clock()
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        path = archive_path(self.dbdir, timestamp)
+        if path != self.__path:
+            self.close()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.__fp = open(path, 'a')
+            self.__path = path
+        self.__pending.append(format_archive_line(timestamp, self.calibration.apply(response)))
+        if len(self.__pending) >= self.commit_every or self.__commit_due():
+            self.flush()
+
+    def __commit_due(self) -> bool:
+        return self.commit_interval is not None and self.clock() - self.__committed_at >= self.commit_interval
+
+    def tick(self) -> None:
+        # Without new samples the pending lines would wait for the next write
+        if self.__commit_due():
+            self.flush()
+
+    def flush(self) -> None:
+        if self.__fp is None:
+            return
+        if self.__pending:
+            self.__fp.write(''.join(self.__pending))
+            self.__pending = []
+            self.__fp.flush()
+            if self.fsync:
+                os.fsync(self.__fp.fileno())
+        self.__committed_at = self.clock()
+
+    def close(self) -> None:
+        if self.__fp is not None:
+            self.flush()
+            self.__fp.close()
+            self.__fp = None
+            self.__path = None
+
+
+class SnapshotCsvSink(Sink):
+    """
+    Keeps the latest sample in a single line file, e.g. for the Home Assistant file sensor. The file is replaced by
+    a rename, so it never appears empty or half written.
+    """
+
+    name = 'snapshot'
+
+    def __init__(self, path: str, calibration: Calibration, fsync: bool=False):
+        self.path = path
+        self.calibration = calibration
+        self.fsync = fsync
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        atomic_write(self.path, format_snapshot_line(timestamp, self.calibration.apply(response)), self.fsync)
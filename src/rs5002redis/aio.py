@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Tuple
+
+from .saver import RedisSaver
+
+
+class AsyncRedisSaver(object):
+    """
+    Awaitable wrapper around ``RedisSaver``. The pinned redis client has no asyncio support, so the round trip runs
+    in a thread of its own; queueing, reconnecting and the history mode are those of the wrapped saver.
+    """
+
+    def __init__(self, saver: RedisSaver):
+        self.saver = saver
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    @staticmethod
+    def from_config(config_file: str, prefix: str=None) -> 'AsyncRedisSaver':
+        return AsyncRedisSaver(RedisSaver.from_config(config_file, prefix))
+
+    async def save(self, data: dict, timestamp: datetime=None, samples: Dict[int, Tuple[float, int]]=None) -> None:
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.saver.save, data, timestamp, samples)
+
+    async def close(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.saver.close)
+        self.executor.shutdown(wait=False)
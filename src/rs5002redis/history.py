@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis import StrictRedis
+
+from rs500common.configuration import ConfigProvider
+from rs500reader.do import Response
+
+Sample = Tuple[datetime, float, int]
+
+
+def history_key(prefix: str, channel: int) -> str:
+    return '{0}c{1}_history'.format(prefix, channel)
+
+
+def response_to_samples(response: Response) -> Dict[int, Tuple[float, int]]:
+    return {channel: (values.temperature, values.humidity)
+            for channel, values in response.all.items() if values is not None}
+
+
+def encode_member(timestamp: float, temperature: float, humidity: int) -> str:
+    # The timestamp is part of the member so equal readings at different times are distinct set members
+    return '{:.0f}|{}|{}'.format(timestamp, temperature, humidity)
+
+
+def decode_member(member: bytes) -> Sample:
+    ts, temp, humi = member.decode('ascii').split('|')
+    return datetime.fromtimestamp(int(ts)), float(temp), int(humi)
+
+
+class RedisHistoryReader(object):
+    """
+    Reads the per channel sorted sets written by ``RedisSaver`` in history mode; the score is the sample time in
+    seconds since the epoch.
+    """
+
+    def __init__(self, redis: StrictRedis, prefix: str=''):
+        self.redis = redis
+        self.prefix = prefix
+
+    @staticmethod
+    def from_config(config_file: str) -> 'RedisHistoryReader':
+        conf = ConfigProvider(config_file).get_config()
+        redis = StrictRedis(host=conf.get(section='redis', option='host', fallback='localhost'),
+                            port=conf.getint(section='redis', option='port', fallback=6379),
+                            db=conf.getint(section='redis', option='db', fallback=0),
+                            password=conf.get(section='redis', option='password', fallback=None))
+        return RedisHistoryReader(redis, conf.get(section='redis', option='prefix', fallback=''))
+
+    def read_range(self, channels: Iterable[int], start: Optional[datetime]=None,
+                   end: Optional[datetime]=None) -> Dict[int, List[Sample]]:
+        """
+        Returns the samples with ``start <= ts <= end`` of every channel, oldest first, in one round trip.
+        """
+        channels = list(channels)
+        low = '-inf' if start is None else start.timestamp()
+        high = '+inf' if end is None else end.timestamp()
+        with self.redis.pipeline(transaction=False) as pipe:
+            for channel in channels:
+                pipe.zrangebyscore(history_key(self.prefix, channel), low, high)
+            results = pipe.execute()
+        return {channel: [decode_member(m) for m in members] for channel, members in zip(channels, results)}
@@ -1,25 +1,132 @@
+import time
+from collections import deque
 from sys import stderr
+from datetime import datetime
+from typing import Callable, Dict, Tuple
 
-from redis import StrictRedis, RedisError
+from redis import ConnectionPool, StrictRedis, RedisError
 
 from rs500common.configuration import ConfigProvider
+from rs500common.metrics import Metrics, get_metrics
+from rs500reader.do import Response
 
+from .history import encode_member, history_key
 
-def save_data_to_redis(data: dict, config_file: str) -> None:
-    conf = ConfigProvider(config_file).get_config()
-    host = conf.get(section='redis', option='host', fallback='localhost')
-    port = conf.getint(section='redis', option='port', fallback=6379)
-    db = conf.getint(section='redis', option='db', fallback=0)
-    password = conf.get(section='redis', option='password', fallback=None)
-    ttl = conf.getint(section='redis', option='result_lifetime_seconds', fallback=30)
-    prefix = conf.get(section='redis', option='prefix', fallback='')
+
+def response_to_dict(response: Response) -> dict:
+    to_save = {}
+    for channel, values in response.all.items():
+        if values is not None:
+            to_save['c{}_temp'.format(channel)] = values.temperature
+            to_save['c{}_humi'.format(channel)] = values.humidity
+    return to_save
+
+
+class RedisSaver(object):
+    """
+    Long-lived writer for the current readings. Keeps one connection pool for the life of the process (a broken
+    connection is replaced on the next write) and writes all keys of a sample with ``SET ... EX`` in a single round
+    trip. While Redis is unreachable up to ``max_queued`` samples are kept and written, oldest first, once it is back;
+    a queued sample is written with the remainder of its lifetime, or not at all once that is over.
+
+    With ``history_retention`` (seconds) set, every sample is also added to a sorted set per channel, scored by its
+    time, and entries older than the retention are trimmed in the same round trip. Queued samples always make it
+    into the history.
+    """
+
+    def __init__(self, host: str='localhost', port: int=6379, db: int=0, password: str=None, prefix: str='',
+                 ttl: int=30, max_queued: int=100, socket_timeout: float=5.0, history_retention: int=0,
+                 redis: StrictRedis=None, clock: Callable[[], float]=time.monotonic, metrics: Metrics=None):
+        if redis is None:
+            pool = ConnectionPool(host=host, port=port, db=db, password=password, socket_timeout=socket_timeout,
+                                  socket_connect_timeout=socket_timeout)
+            redis = StrictRedis(connection_pool=pool)
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.history_retention = history_retention
+        self.clock = clock
+        self.metrics = metrics
+        self.__queue = deque(maxlen=max_queued)
+        self.dropped = 0
+
+    @staticmethod
+    def from_config(config_file: str, prefix: str=None) -> 'RedisSaver':
+        conf = ConfigProvider(config_file).get_config()
+        return RedisSaver(host=conf.get(section='redis', option='host', fallback='localhost'),
+                          port=conf.getint(section='redis', option='port', fallback=6379),
+                          db=conf.getint(section='redis', option='db', fallback=0),
+                          password=conf.get(section='redis', option='password', fallback=None),
+                          prefix=conf.get(section='redis', option='prefix', fallback='') if prefix is None else prefix,
+                          ttl=conf.getint(section='redis', option='result_lifetime_seconds', fallback=30),
+                          max_queued=conf.getint(section='redis', option='max_queued', fallback=100),
+                          socket_timeout=conf.getfloat(section='redis', option='socket_timeout_seconds',
+                                                       fallback=5.0),
+                          history_retention=int(3600 * conf.getfloat(section='redis', option='history_retention_hours',
+                                                                     fallback=0)))
+
+    @property
+    def queued(self) -> int:
+        return len(self.__queue)
+
+    def save(self, data: dict, timestamp: datetime=None, samples: Dict[int, Tuple[float, int]]=None) -> None:
+        """
+        Writes ``data`` and everything still queued; raises ``RedisError`` if Redis is unreachable, in which case
+        the data stays queued. ``samples`` (see ``response_to_samples``) go to the history, if enabled.
+        """
+        metrics = self.metrics if self.metrics is not None else get_metrics()
+        if len(self.__queue) == self.__queue.maxlen:
+            self.dropped += 1
+            metrics.inc('redis.dropped')
+        if timestamp is None:
+            timestamp = datetime.now()
+        self.__queue.append((self.clock(), timestamp.timestamp(), data, samples))
+        now = self.clock()
+        metrics.gauge('redis.queued', len(self.__queue))
+        started = time.monotonic()
+        with self.redis.pipeline(transaction=False) as pipe:
+            channels = set()
+            for queued_at, ts, values, history in self.__queue:
+                ttl = self.ttl - int(now - queued_at)
+                if ttl > 0:
+                    for k, v in values.items():
+                        pipe.set('{0}{1}'.format(self.prefix, k), v, ex=ttl)
+                if self.history_retention > 0 and history:
+                    for channel, (temp, humi) in history.items():
+                        pipe.zadd(history_key(self.prefix, channel), {encode_member(ts, temp, humi): ts})
+                        channels.add(channel)
+            if channels:
+                oldest = timestamp.timestamp() - self.history_retention
+                for channel in sorted(channels):
+                    pipe.zremrangebyscore(history_key(self.prefix, channel), '-inf', '({}'.format(oldest))
+            try:
+                pipe.execute()
+            except RedisError:
+                metrics.inc('redis.errors')
+                raise
+        metrics.observe('redis.round_trip', time.monotonic() - started)
+        metrics.gauge('redis.queued', 0)
+        self.__queue.clear()
+
+    def close(self) -> None:
+        self.redis.connection_pool.disconnect()
+
+
+_savers = {}  # type: Dict[str, RedisSaver]
+
+
+def get_saver(config_file: str) -> RedisSaver:
+    saver = _savers.get(config_file)
+    if saver is None:
+        saver = _savers[config_file] = RedisSaver.from_config(config_file)
+    return saver
+
+
+def save_data_to_redis(data: dict, config_file: str, timestamp: datetime=None,
+                       samples: Dict[int, Tuple[float, int]]=None) -> None:
+    saver = get_saver(config_file)
     try:
-        redis = StrictRedis(host=host, port=port, db=db, password=password)
-        with redis.pipeline() as pipe:
-            for k, v in data.items():
-                key = '{0}{1}'.format(prefix, k)
-                pipe.set(key, v).expire(key, ttl)
-            pipe.execute()
+        saver.save(data, timestamp, samples)
     except RedisError as e:
-        print('Redis error:', file=stderr)
+        print('Redis error ({} samples queued):'.format(saver.queued), file=stderr)
         print(e, file=stderr)
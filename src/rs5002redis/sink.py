@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Iterable
+
+from rs500common.pipeline import Sink
+from rs500common.rolling import DEFAULT_WINDOWS, RollingStats
+from rs500reader.do import Response
+
+from .history import response_to_samples
+from .saver import RedisSaver, response_to_dict
+
+
+class RedisSink(Sink):
+    """
+    Writes the current readings to Redis over one pooled connection. Write errors are raised so they are counted
+    as failures; the saver keeps the sample queued and writes it with the next one.
+    """
+
+    name = 'redis'
+
+    def __init__(self, config_file: str, prefix: str=None):
+        self.config_file = config_file
+        self.saver = RedisSaver.from_config(config_file, prefix)
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.saver.save(response_to_dict(response), timestamp, response_to_samples(response))
+
+    def close(self) -> None:
+        self.saver.close()
+
+
+class StatsSink(Sink):
+    """
+    Keeps rolling statistics over the acquired samples and writes them to Redis as ``c<n>_<quantity>_<window>_<stat>``
+    (e.g. ``rs500_c1_temp_1h_max``), next to the current readings.
+    """
+
+    name = 'stats'
+
+    def __init__(self, config_file: str, windows: Iterable[str]=DEFAULT_WINDOWS, prefix: str=None):
+        self.stats = RollingStats(windows)
+        self.saver = RedisSaver.from_config(config_file, prefix)
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.stats.update(timestamp, response)
+        self.saver.save(self.stats.to_dict(), timestamp)
+
+    def close(self) -> None:
+        self.saver.close()
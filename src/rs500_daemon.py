@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+
+import configparser
+import os
+import signal
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from os.path import dirname
+from sys import stderr
+from typing import Dict, List, Optional, Tuple
+
+from rs500archive.sink import BinaryArchiveSink, FeedSink, SqliteSink
+from rs5002csv.sink import Calibration, SnapshotCsvSink, WeeklyCsvSink
+from rs5002redis.sink import RedisSink, StatsSink
+from rs500common.configuration import ConfigProvider, discover_config_file_by_name
+from rs500common.metrics import get_metrics
+from rs500common.pipeline import Sink, SinkPipeline
+from rs500common.rolling import DEFAULT_WINDOWS
+from rs500common.scheduler import TickScheduler
+from rs500reader.acquisition import acquire
+from rs500reader.reader import Rs500Reader
+from rs500reader.stations import StationPool
+from rs500reader.transport import HidTransport, RecordingTransport, SimulatedTransport, Transport, \
+    read_capture
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(v) for v in value.split(',') if v.strip()]
+
+
+STATION_PREFIX = 'station:'
+
+
+def _option(conf: configparser.ConfigParser, station: Optional[configparser.SectionProxy], section: str,
+            option: str, fallback=None) -> Optional[str]:
+    # Options of a [station:<name>] section override those of the shared sections
+    if station is not None and option in station:
+        return station[option]
+    return conf.get(section=section, option=option, fallback=fallback)
+
+
+def _flag(conf: configparser.ConfigParser, station: Optional[configparser.SectionProxy], section: str,
+          option: str) -> bool:
+    return configparser.ConfigParser.BOOLEAN_STATES.get(_option(conf, station, section, option, 'no').lower(), False)
+
+
+def stations_from_config(conf: configparser.ConfigParser) -> List[Tuple[str, Optional[configparser.SectionProxy]]]:
+    """
+    One entry per ``[station:<name>]`` section; without any, a single unnamed station using the first device found.
+    """
+    stations = [(s[len(STATION_PREFIX):], conf[s]) for s in conf.sections() if s.startswith(STATION_PREFIX)]
+    return stations or [('', None)]
+
+
+def _sink_names(conf: configparser.ConfigParser) -> List[str]:
+    return [n.strip() for n in conf.get(section='daemon', option='sinks', fallback='redis').split(',') if n.strip()]
+
+
+def _redis_config(names: List[str]) -> Optional[str]:
+    return discover_config_file_by_name('rs5002redis.ini', dirname(__file__)) \
+        if 'redis' in names or 'stats' in names else None
+
+
+def _station_name(station: Optional[configparser.SectionProxy]) -> str:
+    return station.name[len(STATION_PREFIX):] if station is not None else ''
+
+
+def _with_suffix(path: str, name: str) -> str:
+    root, ext = os.path.splitext(path)
+    return '{}_{}{}'.format(root, name, ext)
+
+
+def _redis_prefix(redis_config: Optional[str]) -> str:
+    if not redis_config:
+        return ''
+    return ConfigProvider(redis_config).get_config().get(section='redis', option='prefix', fallback='')
+
+
+def station_targets(conf: configparser.ConfigParser, station: Optional[configparser.SectionProxy]=None,
+                    redis_config: str=None) -> Dict[str, Optional[str]]:
+    """
+    Where the sinks and the frame recorder of a station write to. A named station without its own ``dbdir``,
+    snapshot ``path``, feeds ``outdir``, sqlite ``database``, daemon ``record`` or ``redis_prefix`` gets one derived
+    from the shared value (``<dbdir>/<name>``, ``raumklima_<name>.csv``, ``<prefix><name>_``, ...), so two stations
+    never write into the same files or keys.
+    """
+    name = _station_name(station)
+    options = {
+        # target: (section, option, derive from the shared value)
+        'dbdir': ('csv', 'dbdir', lambda v: os.path.join(v, name)),
+        'snapshot': ('snapshot', 'path', lambda v: _with_suffix(v, name)),
+        'feeds': ('feeds', 'outdir', lambda v: os.path.join(v, name)),
+        'sqlite': ('sqlite', 'database', lambda v: _with_suffix(v, name)),
+        'record': ('daemon', 'record', lambda v: _with_suffix(v, name)),
+    }
+    targets = {}
+    for target, (section, option, derive) in options.items():
+        if station is not None and option in station:
+            targets[target] = station[option]
+        else:
+            shared = conf.get(section=section, option=option, fallback=None)
+            targets[target] = derive(shared) if shared and name else shared
+    if station is not None and 'redis_prefix' in station:
+        targets['redis_prefix'] = station['redis_prefix']
+    else:
+        targets['redis_prefix'] = '{}{}_'.format(_redis_prefix(redis_config), name) if name else None
+    return targets
+
+
+def check_station_targets(conf: configparser.ConfigParser,
+                          stations: List[Tuple[str, Optional[configparser.SectionProxy]]]) -> None:
+    """
+    Refuses a configuration in which two stations would write to the same file, directory or Redis keys.
+    """
+    names = _sink_names(conf)
+    used = {
+        'dbdir': {'csv', 'binary', 'feeds'} & set(names),
+        'snapshot': 'snapshot' in names,
+        'feeds': 'feeds' in names,
+        'sqlite': 'sqlite' in names,
+        'redis_prefix': {'redis', 'stats'} & set(names),
+        'record': True,
+    }
+    redis_config = _redis_config(names)
+    seen = {}
+    for name, station in stations:
+        for target, value in station_targets(conf, station, redis_config).items():
+            if not used[target] or not value:
+                continue
+            other = seen.setdefault((target, value), name)
+            if other != name:
+                raise ValueError('Stations "{}" and "{}" both write to {} {}'.format(other, name, target, value))
+
+
+def calibration_from_config(conf: configparser.ConfigParser,
+                            station: Optional[configparser.SectionProxy]=None) -> Calibration:
+    channels = int(_option(conf, station, 'csv', 'channels', fallback='8'))
+    temperature = _float_list(_option(conf, station, 'csv', 'temperature_offsets', fallback='')) or [0.0] * channels
+    humidity = _float_list(_option(conf, station, 'csv', 'humidity_offsets', fallback='')) or [0.0] * channels
+    return Calibration(temperature, humidity)
+
+
+def build_sinks(conf: configparser.ConfigParser, station: Optional[configparser.SectionProxy]=None) -> List[Sink]:
+    names = _sink_names(conf)
+    redis_config = _redis_config(names)
+    targets = station_targets(conf, station, redis_config)
+    redis_prefix = targets['redis_prefix']
+    sinks = []
+    for name in names:
+        if name == 'csv':
+            interval = _option(conf, station, 'csv', 'commit_interval_seconds', fallback='')
+            sinks.append(WeeklyCsvSink(targets['dbdir'], calibration_from_config(conf, station),
+                                       int(_option(conf, station, 'csv', 'commit_every', fallback='1')),
+                                       float(interval) if interval else None,
+                                       _flag(conf, station, 'csv', 'fsync')))
+        elif name == 'binary':
+            sinks.append(BinaryArchiveSink(targets['dbdir'], calibration_from_config(conf, station)))
+        elif name == 'feeds':
+            sinks.append(FeedSink(targets['dbdir'], targets['feeds'], calibration_from_config(conf, station)))
+        elif name == 'sqlite':
+            sinks.append(SqliteSink(targets['sqlite'], calibration_from_config(conf, station)))
+        elif name == 'snapshot':
+            sinks.append(SnapshotCsvSink(targets['snapshot'], calibration_from_config(conf, station),
+                                         _flag(conf, station, 'snapshot', 'fsync')))
+        elif name == 'redis':
+            sinks.append(RedisSink(redis_config, redis_prefix))
+        elif name == 'stats':
+            windows = conf.get(section='stats', option='windows', fallback=', '.join(DEFAULT_WINDOWS))
+            sinks.append(StatsSink(redis_config, [w.strip() for w in windows.split(',') if w.strip()], redis_prefix))
+        else:
+            raise ValueError('Unknown sink "{}"'.format(name))
+    return sinks
+
+
+def build_transport(conf: configparser.ConfigParser, station: Optional[configparser.SectionProxy]=None) -> Transport:
+    kind = _option(conf, station, 'daemon', 'transport', fallback='hid').strip()
+    if kind == 'hid':
+        path = _option(conf, station, 'daemon', 'device_path')
+        transport = HidTransport(serial=_option(conf, station, 'daemon', 'serial'),
+                                 path=path.encode() if path else None)
+    elif kind == 'simulated':
+        capture = _option(conf, station, 'simulator', 'replay', fallback='').strip()
+        transport = SimulatedTransport(
+            frames=read_capture(capture) if capture else None,
+            latency=float(_option(conf, station, 'simulator', 'latency_seconds', fallback='0.05')),
+            dropped_channels=[int(c) for c in _float_list(_option(conf, station, 'simulator', 'dropped_channels',
+                                                                  fallback=''))],
+            drop_rate=float(_option(conf, station, 'simulator', 'drop_rate', fallback='0')),
+            error_rate=float(_option(conf, station, 'simulator', 'error_rate', fallback='0')),
+            channels=int(_option(conf, station, 'simulator', 'channels', fallback='7')))
+    else:
+        raise ValueError('Unknown transport "{}"'.format(kind))
+    record = station_targets(conf, station)['record']
+    if record:
+        transport = RecordingTransport(transport, record)
+    return transport
+
+
+def run(config_file: str, stop: threading.Event) -> None:
+    conf = ConfigProvider(config_file).get_config()
+    interval = conf.getfloat(section='daemon', option='interval_seconds', fallback=60.0)
+    timeout = conf.getfloat(section='daemon', option='read_timeout_seconds', fallback=2.0)
+    deadline = conf.getfloat(section='daemon', option='acquisition_deadline_seconds', fallback=interval / 2)
+    stations = stations_from_config(conf)
+    check_station_targets(conf, stations)
+    expected = {name: [int(c) for c in _float_list(_option(conf, station, 'daemon', 'expected_channels',
+                                                           fallback=''))]
+                for name, station in stations}
+    queries = dict.fromkeys(expected, 0)
+    metrics_path = conf.get(section='daemon', option='metrics_path', fallback='').strip()
+
+    with ExitStack() as stack:
+        readers = {name: stack.enter_context(Rs500Reader(persistent=True, timeout=timeout,
+                                                         transport=build_transport(conf, station)))
+                   for name, station in stations}
+        pipelines = {name: stack.enter_context(SinkPipeline(build_sinks(conf, station)))
+                     for name, station in stations}
+        pool = stack.enter_context(StationPool(readers))
+
+        def tick():
+            now = datetime.now()
+            # All stations are queried at the same time, each one is published as soon as its answer is merged
+            results = pool.as_completed(lambda name, reader: acquire(reader, expected[name], deadline=deadline))
+            for name, acq in results:
+                label = 'station "{}"'.format(name) if name else 'station'
+                if acq is None or not acq.received_at:
+                    print('No data from {} at {}'.format(label, now.strftime('%Y-%m-%d %H:%M:%S')), file=stderr)
+                    # Lets the sinks commit what they buffered once the commit interval has passed
+                    pipelines[name].tick()
+                    continue
+                queries[name] += acq.attempts
+                if not acq.complete:
+                    print('Channel(s) {} of {} missing after {} tries ({:.1f} s)'.format(
+                        ', '.join(str(c) for c in acq.missing), label, acq.attempts, acq.duration), file=stderr)
+                pipelines[name].publish(acq.response, now)
+            if metrics_path:
+                get_metrics().write(metrics_path)
+
+        scheduler = TickScheduler(interval)
+        scheduler.run(tick, stop)
+    print('Stopped after {} tick(s), {} missed, {} station queries'.format(
+        scheduler.ticks, scheduler.missed, sum(queries.values())))
+    for station, pipeline in sorted(pipelines.items()):
+        for name, stats in sorted(pipeline.stats.items()):
+            print('Sink {}{}: {}'.format('{}/'.format(station) if station else '', name, stats))
+    print(get_metrics().dump(), end='')
+
+
+def main() -> None:
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    print('Starting at: ' + datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    run(discover_config_file_by_name('rs500_daemon.ini', dirname(__file__)), stop)
+
+
+if __name__ == '__main__':
+    main()
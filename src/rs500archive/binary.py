@@ -0,0 +1,150 @@
+import os
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from .loader import Readings, TIMESTAMP_DTYPE, VALUE_DTYPE, load_csv
+
+MAGIC = b'RS5B'
+VERSION = 1
+HEADER_SIZE = 16
+EXTENSION = '.rsb'
+
+# Same sentinel as on the wire: 0x7f 0xff 0xff marks a channel without data
+MISSING_TEMPERATURE = 0x7fff
+MISSING_HUMIDITY = 0xff
+
+
+def record_dtype(channels: int) -> np.dtype:
+    """
+    One record per sample: seconds since the epoch (unsigned 32 bit, good until 2106), temperature in tenths of a
+    degree and humidity in percent.
+    """
+    return np.dtype([('ts', '<u4'), ('temp', '<i2', (channels,)), ('humi', 'u1', (channels,))])
+
+
+def _header(channels: int) -> bytes:
+    return MAGIC + bytes([VERSION, channels]) + bytes(HEADER_SIZE - len(MAGIC) - 2)
+
+
+def read_header(path: str) -> int:
+    """
+    Returns the number of channels of the archive at ``path``.
+    """
+    with open(path, 'rb') as fp:
+        header = fp.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a binary RS 500 archive: {}'.format(path))
+    if header[len(MAGIC)] != VERSION:
+        raise ValueError('Unsupported archive version {} in {}'.format(header[len(MAGIC)], path))
+    return header[len(MAGIC) + 1]
+
+
+def binary_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + EXTENSION
+
+
+def encode(readings: Readings) -> np.ndarray:
+    records = np.empty(len(readings), dtype=record_dtype(readings.channels))
+    records['ts'] = readings.timestamps.astype(TIMESTAMP_DTYPE).astype(np.int64)
+    temperature = np.round(readings.temperature * 10)
+    humidity = np.round(readings.humidity)
+    records['temp'] = np.where(np.isnan(temperature), MISSING_TEMPERATURE, temperature)
+    records['humi'] = np.where(np.isnan(humidity), MISSING_HUMIDITY, humidity)
+    return records
+
+
+def decode(records: np.ndarray) -> Readings:
+    temperature = records['temp'].astype(VALUE_DTYPE) / 10
+    humidity = records['humi'].astype(VALUE_DTYPE)
+    temperature[records['temp'] == MISSING_TEMPERATURE] = np.nan
+    humidity[records['humi'] == MISSING_HUMIDITY] = np.nan
+    return Readings(records['ts'].astype(TIMESTAMP_DTYPE), temperature, humidity)
+
+
+def open_records(path: str) -> np.ndarray:
+    """
+    Memory maps the records of an archive read-only; slicing the result does not copy.
+    """
+    channels = read_header(path)
+    dtype = record_dtype(channels)
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def select(records: np.ndarray, start: Optional[datetime]=None, end: Optional[datetime]=None) -> np.ndarray:
+    """
+    Returns the records with ``start <= ts < end`` as a view; records are appended in time order.
+    """
+    lo = 0 if start is None else np.searchsorted(records['ts'], np.datetime64(start, 's').astype(np.int64), 'left')
+    hi = len(records) if end is None else np.searchsorted(records['ts'], np.datetime64(end, 's').astype(np.int64),
+                                                          'left')
+    return records[lo:hi]
+
+
+def load_binary(path: str, start: Optional[datetime]=None, end: Optional[datetime]=None) -> Readings:
+    return decode(select(open_records(path), start, end))
+
+
+class BinaryArchiveWriter(object):
+    """
+    Appends records to an archive file, writing the header if the file is new.
+    """
+
+    def __init__(self, path: str, channels: int):
+        self.path = path
+        self.channels = channels
+        self.dtype = record_dtype(channels)
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists and read_header(path) != channels:
+            raise ValueError('{} has {} channels, expected {}'.format(path, read_header(path), channels))
+        self.__fp = open(path, 'ab')
+        if not exists:
+            self.__fp.write(_header(channels))
+        else:
+            # Drop a partially written record, e.g. after a crash, so the file stays a whole number of records
+            size = os.path.getsize(path)
+            tail = (size - HEADER_SIZE) % self.dtype.itemsize
+            if tail:
+                self.__fp.truncate(size - tail)
+
+    def append(self, readings: Readings) -> None:
+        if readings.channels != self.channels:
+            raise ValueError('Got {} channels, expected {}'.format(readings.channels, self.channels))
+        self.__fp.write(encode(readings).tobytes())
+
+    def append_row(self, timestamp: datetime, values: Sequence[Tuple[float, float]]) -> None:
+        temperature = np.array([[t for t, h in values]], dtype=VALUE_DTYPE)
+        humidity = np.array([[h for t, h in values]], dtype=VALUE_DTYPE)
+        self.append(Readings(np.array([np.datetime64(timestamp, 's')]), temperature, humidity))
+
+    def flush(self) -> None:
+        self.__fp.flush()
+
+    def close(self) -> None:
+        self.__fp.close()
+
+    def __enter__(self) -> 'BinaryArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def convert_csv(csv_path: str, bin_path: str=None, channels: int=None) -> Tuple[str, Readings]:
+    """
+    Writes the rows of a weekly CSV into a new binary archive next to it (``wNN.rsb``).
+    """
+    if bin_path is None:
+        bin_path = binary_path(csv_path)
+    readings = load_csv(csv_path, channels)
+    tmp_path = bin_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with BinaryArchiveWriter(tmp_path, readings.channels) as writer:
+        writer.append(readings)
+    os.replace(tmp_path, bin_path)
+    return bin_path, readings
@@ -0,0 +1,167 @@
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'RS5Z'
+VERSION = 1
+HEADER_SIZE = 16
+EXTENSION = '.csz'
+BLOCK_SIZE = 64 * 1024
+
+# Index offset, number of blocks, magic; the index follows the last block
+TRAILER = struct.Struct('<QI4s')
+INDEX_DTYPE = np.dtype([('first', '<i8'), ('last', '<i8'), ('offset', '<u8'), ('length', '<u4'), ('raw', '<u4')])
+TIMESTAMP_LENGTH = len('YYYY-MM-DD HH:MM:SS')
+
+
+def compressed_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + EXTENSION
+
+
+def _seconds(line: bytes) -> Optional[int]:
+    stamp = line[:TIMESTAMP_LENGTH]
+    if len(stamp) != TIMESTAMP_LENGTH or stamp[4:5] != b'-' or stamp[13:14] != b':':
+        return None
+    try:
+        return int(np.datetime64(stamp.decode('ascii').replace(' ', 'T'), 's').astype(np.int64))
+    except ValueError:
+        return None
+
+
+def _bounds(lines: List[bytes], previous: int) -> Tuple[int, int]:
+    first = next((s for s in map(_seconds, lines) if s is not None), None)
+    if first is None:
+        # Only malformed lines: keep the block where it is in time order
+        return previous, previous
+    last = next(s for s in map(_seconds, reversed(lines)) if s is not None)
+    return first, last
+
+
+def merge_lines(*parts: Iterable[bytes]) -> List[bytes]:
+    """
+    The CSV lines of all parts in time order. A line of a later part that an earlier part already holds is dropped,
+    so merging a file that was compressed before is harmless; a line without a timestamp stays behind the line
+    before it.
+    """
+    seen = set()
+    keyed = []
+    for part in parts:
+        added = []
+        key = 0
+        for line in part:
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            if line in seen:
+                continue
+            seconds = _seconds(line)
+            key = seconds if seconds is not None else key
+            keyed.append((key, len(keyed), line))
+            added.append(line)
+        seen.update(added)
+    keyed.sort()
+    return [line for _, _, line in keyed]
+
+
+def write_compressed(lines: Iterable[bytes], path: str, block_size: int=BLOCK_SIZE, level: int=9) -> int:
+    """
+    Writes the time ordered CSV ``lines`` as independently zlib compressed blocks of about ``block_size`` bytes, each
+    indexed by its first and last timestamp. Returns the number of blocks.
+    """
+    index = []
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as fp:
+        fp.write(MAGIC + bytes([VERSION]) + bytes(HEADER_SIZE - len(MAGIC) - 1))
+
+        def flush(block: List[bytes]) -> None:
+            raw = b''.join(block)
+            data = zlib.compress(raw, level)
+            first, last = _bounds(block, index[-1][1] if index else 0)
+            index.append((first, last, fp.tell(), len(data), len(raw)))
+            fp.write(data)
+
+        block = []
+        size = 0
+        for line in lines:
+            block.append(line)
+            size += len(line)
+            if size >= block_size:
+                flush(block)
+                block = []
+                size = 0
+        if block:
+            flush(block)
+        offset = fp.tell()
+        fp.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+        fp.write(TRAILER.pack(offset, len(index), MAGIC))
+    os.replace(tmp, path)
+    return len(index)
+
+
+def compress_csv(csv_path: str, out_path: str=None, block_size: int=BLOCK_SIZE, level: int=9) -> str:
+    """
+    Compresses a weekly CSV into ``wNN.csz`` next to it.
+    """
+    if out_path is None:
+        out_path = compressed_path(csv_path)
+    with open(csv_path, 'rb') as fp:
+        write_compressed(fp, out_path, block_size, level)
+    return out_path
+
+
+class CompressedFile(object):
+    """
+    Read access to a block compressed CSV: only the blocks overlapping a requested time range are decompressed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fp:
+            header = fp.read(HEADER_SIZE)
+            if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+                raise ValueError('Not a compressed RS 500 archive: {}'.format(path))
+            if header[len(MAGIC)] != VERSION:
+                raise ValueError('Unsupported archive version {} in {}'.format(header[len(MAGIC)], path))
+            fp.seek(-TRAILER.size, os.SEEK_END)
+            offset, count, magic = TRAILER.unpack(fp.read(TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError('Truncated compressed archive: {}'.format(path))
+            fp.seek(offset)
+            self.index = np.frombuffer(fp.read(count * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def first_last(self) -> Tuple[Optional[str], Optional[str]]:
+        if len(self.index) == 0:
+            return None, None
+        stamps = np.array([self.index['first'][0], self.index['last'][-1]]).astype('datetime64[s]')
+        return str(stamps[0]), str(stamps[1])
+
+    def blocks(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> np.ndarray:
+        """
+        Returns the numbers of the blocks that may hold rows with ``start <= ts < end``.
+        """
+        lo = 0 if start is None else np.searchsorted(self.index['last'], np.datetime64(start, 's').astype(np.int64),
+                                                     'left')
+        hi = len(self.index) if end is None else np.searchsorted(
+            self.index['first'], np.datetime64(end, 's').astype(np.int64), 'left')
+        return np.arange(lo, max(lo, hi))
+
+    def iter_blocks(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> Iterator[bytes]:
+        with open(self.path, 'rb') as fp:
+            for i in self.blocks(start, end):
+                entry = self.index[i]
+                fp.seek(int(entry['offset']))
+                yield zlib.decompress(fp.read(int(entry['length'])))
+
+    def read(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> bytes:
+        return b''.join(self.iter_blocks(start, end))
+
+    def iter_lines(self) -> Iterator[str]:
+        for block in self.iter_blocks():
+            for line in block.decode('utf-8', 'replace').splitlines(True):
+                yield line
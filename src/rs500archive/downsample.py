@@ -0,0 +1,83 @@
+from typing import Tuple
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[s]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks ``points`` indices that keep the visual shape of the line ``(x, y)``.
+    ``x`` must be sorted and ``y`` free of NaN.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    xf = _as_float(x)
+    yf = y.astype(np.float64)
+    every = (n - 2) / (points - 2)
+    bounds = np.floor(np.arange(points - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    # Average of every bucket (the last "bucket" is the last point), needed as the third triangle corner
+    starts = np.append(bounds[:-1], n - 1)
+    sizes = np.diff(np.append(starts, n))
+    avg_x = np.add.reduceat(xf, starts) / sizes
+    avg_y = np.add.reduceat(yf, starts) / sizes
+    result = np.empty(points, dtype=np.int64)
+    result[0] = 0
+    result[-1] = n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        area = np.abs((xf[a] - avg_x[i + 1]) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (avg_y[i + 1] - yf[a]))
+        a = lo + int(np.argmax(area))
+        result[i + 1] = a
+    return result
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Splits the line into ``points / 2`` buckets and keeps the minimum and maximum of each, in time order.
+    ``y`` must be free of NaN.
+    """
+    n = len(x)
+    buckets = points // 2
+    if points >= n or buckets < 1:
+        return np.arange(n)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))
+    first = np.flatnonzero(np.diff(np.append(-1, bucket[order])))
+    last = np.append(first[1:] - 1, n - 1)
+    return np.unique(np.concatenate([order[first], order[last]]))
+
+
+def downsample(x: np.ndarray, y: np.ndarray, points: int, method: str='lttb',
+               breaks: bool=False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces the trace ``(x, y)`` to at most ``points`` points. NaN values are dropped before selecting points; with
+    ``breaks`` a single NaN point is put back wherever a gap was, so the line is still interrupted there.
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown downsampling method "{}", use one of {}'.format(method, ', '.join(METHODS)))
+    valid = ~np.isnan(y)
+    segment = None
+    if not valid.all():
+        if breaks:
+            # Points of the same segment are separated by no NaN
+            segment = np.cumsum(~valid)[valid]
+        x, y = x[valid], y[valid]
+    if points is not None and len(x) > points:
+        indices = lttb_indices(x, y, points) if method == 'lttb' else minmax_indices(x, y, points)
+        x, y = x[indices], y[indices]
+        if segment is not None:
+            segment = segment[indices]
+    if segment is None or len(x) < 2:
+        return x, y
+    gaps = np.flatnonzero(np.diff(segment)) + 1
+    return np.insert(x, gaps, x[gaps]), np.insert(y, gaps, np.nan)
@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from rs500common.files import atomic_write
+
+from .loader import Readings, TIMESTAMP_DTYPE, VALUE_DTYPE
+from .query import Archive
+from .resample import regrid, resampled_readings
+from .rollup import RollupStore
+
+FEEDS = {
+    # name: (length of the range, resolution in seconds)
+    '24h': (timedelta(hours=24), 60),
+    '7d': (timedelta(days=7), 3600),
+    '1y': (timedelta(days=365), 24 * 3600),
+}
+
+
+def _column(values: np.ndarray) -> list:
+    rounded = np.round(values.astype(np.float64), 1)
+    return [None if v != v else v for v in rounded.tolist()]
+
+
+def feed_document(name: str, readings: Readings, resolution: Optional[int]) -> dict:
+    """
+    Columnar feed: timestamps as seconds relative to ``t0`` (wall clock time encoded as if it were UTC), one value
+    array per channel, ``null`` for missing values.
+    """
+    stamps = readings.timestamps.astype(TIMESTAMP_DTYPE).astype(np.int64)
+    t0 = int(stamps[0]) if len(stamps) else 0
+    return {
+        'range': name,
+        'resolution': resolution,
+        'channels': readings.channels,
+        't0': t0,
+        't': (stamps - t0).tolist(),
+        'temperature': [_column(readings.temperature[:, c]) for c in range(readings.channels)],
+        'humidity': [_column(readings.humidity[:, c]) for c in range(readings.channels)],
+    }
+
+
+def write_feed(path: str, document: dict) -> int:
+    atomic_write(path, json.dumps(document, separators=(',', ':')))
+    return os.path.getsize(path)
+
+
+class FeedExporter(object):
+    """
+    Writes the dashboard feeds ``24h.json`` (minute means), ``7d.json`` (hourly means) and ``1y.json`` (daily means)
+    to ``outdir``. The 24 hour window is kept in memory and extended with ``append``; the hourly and daily feeds are
+    rewritten from the rollup store only when a new hour or day begins. Minutes, hours and days without samples are
+    ``null``, so charts draw a gap instead of a line across it.
+    """
+
+    def __init__(self, dbdir: str, outdir: str, channels: int):
+        self.outdir = outdir
+        self.channels = channels
+        self.archive = Archive(dbdir)
+        self.rollups = RollupStore(dbdir, channels=channels)
+        self.__window = None  # type: Optional[Readings]
+        self.__last_hour = None
+        self.__last_day = None
+
+    def __path(self, name: str) -> str:
+        return os.path.join(self.outdir, name + '.json')
+
+    def __load_window(self, now: datetime) -> None:
+        self.__window = self.archive.read_range(now - FEEDS['24h'][0], None).resize(self.channels)
+
+    def append(self, timestamp: datetime, values: Sequence[Tuple[float, float]]) -> None:
+        if self.__window is None:
+            self.__load_window(timestamp)
+        row = Readings(np.array([np.datetime64(timestamp, 's')]),
+                       np.array([[t for t, h in values]], dtype=VALUE_DTYPE),
+                       np.array([[h for t, h in values]], dtype=VALUE_DTYPE)).resize(self.channels)
+        # The window may have been loaded from a file that already contains this sample
+        older = self.__window[self.__window.timestamps < row.timestamps[0]]
+        window = Readings.concatenate([older, row])
+        self.__window = window[window.timestamps >= np.datetime64(timestamp - FEEDS['24h'][0], 's')]
+
+    def export(self, now: datetime=None) -> dict:
+        """
+        Rewrites the feeds that changed since the last call; returns the sizes of the written files by feed name.
+        """
+        if now is None:
+            now = datetime.now()
+        os.makedirs(self.outdir, exist_ok=True)
+        if self.__window is None:
+            self.__load_window(now)
+        length, resolution = FEEDS['24h']
+        # The grid ends with the current minute, like the 24hrs plots
+        end = now.replace(second=0, microsecond=0) + timedelta(seconds=resolution)
+        recent = resampled_readings(self.__window, resolution, 'mean', end - length, end)
+        sizes = {'24h': write_feed(self.__path('24h'), feed_document('24h', recent, resolution))}
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        day = hour.replace(hour=0)
+        hourly_due = hour != self.__last_hour or not os.path.exists(self.__path('7d'))
+        daily_due = day != self.__last_day or not os.path.exists(self.__path('1y'))
+        if hourly_due or daily_due:
+            self.rollups.update()
+        if hourly_due:
+            length, resolution = FEEDS['7d']
+            hourly = regrid(self.rollups.hourly(hour - length, hour), resolution).to_readings('mean')
+            sizes['7d'] = write_feed(self.__path('7d'), feed_document('7d', hourly, resolution))
+            self.__last_hour = hour
+        if daily_due:
+            length, resolution = FEEDS['1y']
+            daily = regrid(self.rollups.daily(day - length, day), resolution).to_readings('mean')
+            sizes['1y'] = write_feed(self.__path('1y'), feed_document('1y', daily, resolution))
+            self.__last_day = day
+        return sizes
@@ -0,0 +1,169 @@
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .compressed import EXTENSION as COMPRESSED_EXTENSION, CompressedFile
+
+TIMESTAMP_DTYPE = 'datetime64[s]'
+VALUE_DTYPE = np.float32
+
+
+class Readings(object):
+    """
+    Typed columns of an archive: ``timestamps`` (N,) as datetime64[s], ``temperature`` and ``humidity`` (N, channels)
+    as float32 with NaN for missing values. ``skipped`` counts the malformed rows dropped while loading.
+    """
+
+    def __init__(self, timestamps: np.ndarray, temperature: np.ndarray, humidity: np.ndarray, skipped: int=0):
+        self.timestamps = timestamps
+        self.temperature = temperature
+        self.humidity = humidity
+        self.skipped = skipped
+
+    @staticmethod
+    def empty(channels: int) -> 'Readings':
+        return Readings(np.empty(0, dtype=TIMESTAMP_DTYPE), np.empty((0, channels), dtype=VALUE_DTYPE),
+                        np.empty((0, channels), dtype=VALUE_DTYPE))
+
+    @staticmethod
+    def concatenate(parts: Sequence['Readings'], channels: int=None) -> 'Readings':
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return Readings.empty(channels or 0)
+        if len(parts) == 1:
+            return parts[0]
+        return Readings(np.concatenate([p.timestamps for p in parts]),
+                        np.concatenate([p.temperature for p in parts]),
+                        np.concatenate([p.humidity for p in parts]),
+                        sum(p.skipped for p in parts))
+
+    @property
+    def channels(self) -> int:
+        return self.temperature.shape[1]
+
+    def __len__(self) -> int:
+        return self.timestamps.shape[0]
+
+    def __getitem__(self, item) -> 'Readings':
+        return Readings(self.timestamps[item], self.temperature[item], self.humidity[item])
+
+    def resize(self, channels: int) -> 'Readings':
+        """
+        Returns the readings with exactly ``channels`` channels, dropping extra ones or adding NaN channels.
+        """
+        if self.channels == channels:
+            return self
+        if self.channels > channels:
+            return Readings(self.timestamps, self.temperature[:, :channels], self.humidity[:, :channels], self.skipped)
+        pad = np.full((len(self), channels - self.channels), np.nan, dtype=self.temperature.dtype)
+        return Readings(self.timestamps, np.hstack([self.temperature, pad]), np.hstack([self.humidity, pad]),
+                        self.skipped)
+
+
+def _fields_per_row(channels: int) -> int:
+    return 1 + 2 * channels
+
+
+def _convert(stamps: List[str], values: List[str], channels: int) -> Readings:
+    timestamps = np.array(stamps, dtype=TIMESTAMP_DTYPE)
+    table = np.array(values, dtype=VALUE_DTYPE).reshape(-1, 2 * channels)
+    return Readings(timestamps, table[:, 0::2], table[:, 1::2])
+
+
+def _most_common_channels(rows: List[List[str]]) -> Optional[int]:
+    # Number of channels of the most frequent row width; ties go to the width seen first
+    counts = {}  # type: Dict[int, int]
+    for fields in rows:
+        if len(fields) % 2 == 1:
+            counts[len(fields)] = counts.get(len(fields), 0) + 1
+    if not counts:
+        return None
+    widths = list(counts)
+    return (max(widths, key=lambda w: (counts[w], -widths.index(w))) - 1) // 2
+
+
+def parse_lines(lines: Iterable[str], channels: int=None) -> Readings:
+    """
+    Parses lines of the ``ts, T | RH, T | RH, ...`` format. Without ``channels`` the number of channels is that of
+    most rows. Rows with a different number of channels or values that are not numbers are skipped and counted.
+    """
+    rows = []
+    skipped = 0
+    for line in lines:
+        fields = line.replace('|', ',').split(',')
+        if len(fields) < 3:
+            if line.strip():
+                skipped += 1
+            continue
+        rows.append(fields)
+    if channels is None:
+        channels = _most_common_channels(rows)
+    if channels is None:
+        return Readings.empty(0)
+    stamps = []
+    values = []
+    for fields in rows:
+        if len(fields) != _fields_per_row(channels):
+            skipped += 1
+            continue
+        stamps.append(fields[0])
+        values.extend(fields[1:])
+    try:
+        result = _convert(stamps, values, channels)
+    except ValueError:
+        # At least one bad value: fall back to converting row by row to find and drop the bad ones
+        width = 2 * channels
+        good = []
+        for i in range(len(stamps)):
+            try:
+                good.append(_convert(stamps[i:i + 1], values[i * width:(i + 1) * width], channels))
+            except ValueError:
+                skipped += 1
+        result = Readings.concatenate(good, channels)
+    result.skipped = skipped
+    return result
+
+
+def _lines(path: str) -> Iterator[str]:
+    # Plain and block compressed week files read the same
+    if path.endswith(COMPRESSED_EXTENSION):
+        for line in CompressedFile(path).iter_lines():
+            yield line
+        return
+    with open(path, 'r') as fp:
+        for line in fp:
+            yield line
+
+
+def load_csv(path: str, channels: int=None) -> Readings:
+    return parse_lines(_lines(path), channels)
+
+
+def load(paths: Union[str, Sequence[str]], channels: int=None) -> Readings:
+    if isinstance(paths, str):
+        paths = [paths]
+    parts = []
+    for path in paths:
+        part = load_csv(path, channels)
+        if channels is None and len(part) > 0:
+            channels = part.channels
+        parts.append(part)
+    return Readings.concatenate(parts, channels)
+
+
+def iter_chunks(paths: Sequence[str], channels: int=None, chunk_rows: int=65536) -> Iterator[Readings]:
+    """
+    Yields the rows of all ``paths`` in order as ``Readings`` of at most ``chunk_rows`` rows, so memory stays bounded
+    independent of the number of files.
+    """
+    for path in paths:
+        lines = _lines(path)
+        while True:
+            chunk_lines = list(islice(lines, chunk_rows))
+            if not chunk_lines:
+                break
+            chunk = parse_lines(chunk_lines, channels)
+            if channels is None and len(chunk) > 0:
+                channels = chunk.channels
+            yield chunk
@@ -0,0 +1,268 @@
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rs500common.files import atomic_write
+
+from .binary import EXTENSION as BINARY_EXTENSION, load_binary, open_records
+from .compressed import EXTENSION as COMPRESSED_EXTENSION, CompressedFile
+from .loader import Readings, TIMESTAMP_DTYPE, parse_lines
+
+INDEX_FILE = '.partitions.json'
+TIMESTAMP_LENGTH = len('YYYY-MM-DD HH:MM:SS')
+CSV_EXTENSION = '.csv'
+# When several files of a week cover the same time span, the later one in this list is used
+PREFERENCE = (CSV_EXTENSION, COMPRESSED_EXTENSION, BINARY_EXTENSION)
+
+
+def _csv_timestamp(line: bytes) -> Optional[str]:
+    stamp = line[:TIMESTAMP_LENGTH].decode('ascii', 'replace')
+    if len(stamp) != TIMESTAMP_LENGTH or stamp[4] != '-' or stamp[13] != ':':
+        return None
+    return stamp.replace(' ', 'T')
+
+
+def _csv_first_last(path: str, size: int) -> Tuple[Optional[str], Optional[str]]:
+    first = None
+    last = None
+    with open(path, 'rb') as fp:
+        for line in fp:
+            first = _csv_timestamp(line)
+            if first is not None:
+                break
+        # The last line is in the tail; 4 KiB hold dozens of lines
+        fp.seek(max(0, size - 4096))
+        for line in fp.read().splitlines():
+            stamp = _csv_timestamp(line)
+            if stamp is not None:
+                last = stamp
+    return first, last
+
+
+def _binary_first_last(path: str) -> Tuple[Optional[str], Optional[str]]:
+    records = open_records(path)
+    if len(records) == 0:
+        return None, None
+    stamps = records['ts'][[0, -1]].astype(TIMESTAMP_DTYPE)
+    return str(stamps[0]), str(stamps[1])
+
+
+def _csv_offset(fp, size: int, target: bytes) -> Tuple[int, int]:
+    """
+    Bisects the line sorted file ``fp`` by timestamp. Returns ``(lo, hi)``: all lines starting before ``lo`` are older
+    than ``target``, all lines starting after ``hi`` are not.
+    """
+    lo, hi = 0, size
+    while hi - lo > 4096:
+        mid = (lo + hi) // 2
+        fp.seek(mid)
+        fp.readline()
+        pos = fp.tell()
+        line = fp.readline()
+        if not line or line[:TIMESTAMP_LENGTH] >= target:
+            hi = mid
+        else:
+            lo = pos
+    return lo, hi
+
+
+def _read_csv_range(path: str, start: Optional[datetime], end: Optional[datetime]) -> Readings:
+    size = os.path.getsize(path)
+    with open(path, 'rb') as fp:
+        begin = 0
+        if start is not None:
+            begin, _ = _csv_offset(fp, size, start.strftime('%Y-%m-%d %H:%M:%S').encode())
+        stop = size
+        if end is not None:
+            _, stop = _csv_offset(fp, size, end.strftime('%Y-%m-%d %H:%M:%S').encode())
+        fp.seek(begin)
+        data = fp.read(max(0, stop - begin))
+        if stop < size:
+            data += fp.readline()
+    return parse_lines(data.decode('utf-8', 'replace').splitlines())
+
+
+def _read_compressed_range(path: str, start: Optional[datetime], end: Optional[datetime]) -> Readings:
+    return parse_lines(CompressedFile(path).read(start, end).decode('utf-8', 'replace').splitlines())
+
+
+def read_partition(path: str, start: Optional[datetime]=None, end: Optional[datetime]=None) -> Readings:
+    """
+    The rows of one week file (CSV, compressed or binary) that may lie in ``[start, end)``; a few rows beyond the
+    range can be included.
+    """
+    if path.endswith(BINARY_EXTENSION):
+        return load_binary(path, start, end)
+    if path.endswith(COMPRESSED_EXTENSION):
+        return _read_compressed_range(path, start, end)
+    return _read_csv_range(path, start, end)
+
+
+def merge_copies(parts: Sequence[Readings]) -> Readings:
+    """
+    Combines the files of one week, e.g. a binary file started mid-week next to the CSV: rows whose timestamp is in
+    an earlier part are dropped, the result is in time order.
+    """
+    parts = [p for p in parts if len(p) > 0]
+    if len(parts) <= 1:
+        return Readings.concatenate(parts, 0)
+    width = max(p.channels for p in parts)
+    kept = []
+    seen = np.empty(0, dtype=TIMESTAMP_DTYPE)
+    for part in parts:
+        part = part.resize(width)
+        new = part[~np.isin(part.timestamps, seen)]
+        new.skipped = part.skipped
+        kept.append(new)
+        seen = np.concatenate([seen, new.timestamps])
+    result = Readings.concatenate(kept, width)
+    order = np.argsort(result.timestamps, kind='stable')
+    return Readings(result.timestamps[order], result.temperature[order], result.humidity[order], result.skipped)
+
+
+class PartitionIndex(object):
+    """
+    Time span of every week file under ``dbdir``, persisted in ``<dbdir>/.partitions.json``. ``refresh()`` only looks
+    at files whose size or modification time changed; for appended files only the new tail is read.
+    """
+
+    def __init__(self, dbdir: str):
+        self.dbdir = dbdir
+        self.path = os.path.join(dbdir, INDEX_FILE)
+        self.entries = {}  # type: Dict[str, dict]
+        try:
+            with open(self.path, 'r') as fp:
+                self.entries = json.load(fp)
+        except (IOError, ValueError):
+            self.entries = {}
+
+    def refresh(self) -> bool:
+        changed = False
+        seen = set()
+        for pattern in ('w*' + ext for ext in PREFERENCE):
+            for path in glob.glob(os.path.join(self.dbdir, '*', pattern)):
+                name = os.path.relpath(path, self.dbdir)
+                seen.add(name)
+                stat = os.stat(path)
+                entry = self.entries.get(name)
+                if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                    continue
+                if name.endswith(CSV_EXTENSION):
+                    if entry is not None and entry['first'] is not None and stat.st_size > entry['size']:
+                        # Appended: the first timestamp is unchanged, only the tail needs to be looked at
+                        first, last = entry['first'], _csv_first_last(path, stat.st_size)[1]
+                    else:
+                        first, last = _csv_first_last(path, stat.st_size)
+                elif name.endswith(COMPRESSED_EXTENSION):
+                    first, last = CompressedFile(path).first_last()
+                else:
+                    first, last = _binary_first_last(path)
+                self.entries[name] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'first': first, 'last': last}
+                changed = True
+        for name in set(self.entries) - seen:
+            del self.entries[name]
+            changed = True
+        if changed:
+            self.save()
+        return changed
+
+    def save(self) -> None:
+        try:
+            atomic_write(self.path, json.dumps(self.entries, sort_keys=True))
+        except IOError:
+            pass  # read only archive: the index is rebuilt in memory next time
+
+    def weeks(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> List[List[str]]:
+        """
+        Returns the files overlapping ``[start, end)`` grouped by week, in time order. A file is left out if another
+        file of the same week covers its whole time span (on equal spans the binary file is used before the compressed
+        one before the CSV); the files left in a group are read together with ``merge_copies``, the preferred first.
+        """
+        lo = None if start is None else np.datetime64(start, 's')
+        hi = None if end is None else np.datetime64(end, 's')
+        stems = {}  # type: Dict[str, List[str]]
+        for name, entry in self.entries.items():
+            if entry['first'] is None:
+                continue
+            if hi is not None and np.datetime64(entry['first']) >= hi:
+                continue
+            if lo is not None and np.datetime64(entry['last']) < lo:
+                continue
+            stems.setdefault(os.path.splitext(name)[0], []).append(name)
+        groups = []
+        for names in stems.values():
+            kept = [n for n in names if not any(self.__shadows(o, n) for o in names if o != n)]
+            groups.append(sorted(kept, key=self.__preference, reverse=True))
+        groups.sort(key=lambda g: (min(self.entries[n]['first'] for n in g), g[0]))
+        return [[os.path.join(self.dbdir, n) for n in g] for g in groups]
+
+    def partitions(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> List[str]:
+        """
+        The files of ``weeks``, one after the other.
+        """
+        return [path for group in self.weeks(start, end) for path in group]
+
+    def __preference(self, name: str) -> int:
+        return PREFERENCE.index(os.path.splitext(name)[1])
+
+    def __shadows(self, name: str, other: str) -> bool:
+        a, b = self.entries[name], self.entries[other]
+        if a['first'] > b['first'] or a['last'] < b['last']:
+            return False
+        equal = a['first'] == b['first'] and a['last'] == b['last']
+        return not equal or self.__preference(name) > self.__preference(other)
+
+
+class Archive(object):
+
+    def __init__(self, dbdir: str):
+        self.dbdir = dbdir
+        self.index = PartitionIndex(dbdir)
+
+    def read_range(self, start: Optional[datetime]=None, end: Optional[datetime]=None,
+                   channels: Sequence[int]=None) -> Readings:
+        """
+        Returns all readings with ``start <= ts < end`` across the week and year partitions. ``channels`` selects
+        channels by number (starting with 1).
+        """
+        self.index.refresh()
+        parts = []
+        for group in self.index.weeks(start, end):
+            part = merge_copies([read_partition(path, start, end) for path in group])
+            if len(part) > 0:
+                parts.append(part)
+        if parts:
+            width = max(p.channels for p in parts)
+            parts = [p.resize(width) for p in parts]
+        result = Readings.concatenate(parts, 0)
+        if len(parts) > 1 and np.any(np.diff(result.timestamps.astype(np.int64)) < 0):
+            result = result[np.argsort(result.timestamps, kind='stable')]
+        mask = np.ones(len(result), dtype=bool)
+        if start is not None:
+            mask &= result.timestamps >= np.datetime64(start, 's')
+        if end is not None:
+            mask &= result.timestamps < np.datetime64(end, 's')
+        if not mask.all():
+            result = result[mask]
+        if channels is not None:
+            columns = [c - 1 for c in channels]
+            if columns and max(columns) >= result.channels:
+                result = result.resize(max(columns) + 1)
+            result = Readings(result.timestamps, result.temperature[:, columns], result.humidity[:, columns])
+        return Readings(np.ascontiguousarray(result.timestamps), np.ascontiguousarray(result.temperature),
+                        np.ascontiguousarray(result.humidity), sum(p.skipped for p in parts))
+
+
+_archives = {}  # type: Dict[str, Archive]
+
+
+def read_range(dbdir: str, start: Optional[datetime]=None, end: Optional[datetime]=None,
+               channels: Sequence[int]=None) -> Readings:
+    archive = _archives.get(dbdir)
+    if archive is None:
+        archive = _archives[dbdir] = Archive(dbdir)
+    return archive.read_range(start, end, channels)
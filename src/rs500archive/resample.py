@@ -0,0 +1,85 @@
+from datetime import datetime
+from typing import Optional, Union
+
+import numpy as np
+
+from .loader import Readings, TIMESTAMP_DTYPE
+from .rollup import DAY, HOUR, Aggregates
+
+GRIDS = {
+    '1min': 60,
+    '15min': 15 * 60,
+    '1h': HOUR,
+    '1d': DAY,
+}
+
+
+def grid_seconds(grid: Union[str, int]) -> int:
+    if isinstance(grid, str):
+        if grid not in GRIDS:
+            raise ValueError('Unknown grid "{}", use one of {}'.format(grid, ', '.join(GRIDS)))
+        return GRIDS[grid]
+    return int(grid)
+
+
+def _bounds(starts: np.ndarray, seconds: int, start: Optional[datetime], end: Optional[datetime]):
+    lo = int(starts[0]) if start is None else int(np.datetime64(start, 's').astype(np.int64)) // seconds * seconds
+    if end is None:
+        hi = int(starts[-1]) + seconds
+    else:
+        hi = -(-int(np.datetime64(end, 's').astype(np.int64)) // seconds) * seconds
+    return lo, max(lo, hi)
+
+
+def regrid(aggregates: Aggregates, grid: Union[str, int], start: Optional[datetime]=None,
+           end: Optional[datetime]=None) -> Aggregates:
+    """
+    Puts ``aggregates`` onto the regular grid of ``grid`` seconds covering ``[start, end)`` (by default the span of
+    the data), one row per bin. Bins without samples are kept: their count is 0, mean, minimum and maximum are NaN,
+    so plots draw a break instead of a line across the gap.
+    """
+    seconds = grid_seconds(grid)
+    channels = aggregates.channels
+    if len(aggregates) == 0 and (start is None or end is None):
+        return Aggregates.empty(channels)
+    coarse = aggregates.coarsen(seconds)
+    stamps = coarse.start.astype(TIMESTAMP_DTYPE).astype(np.int64)
+    lo, hi = _bounds(stamps, seconds, start, end)
+    bins = np.arange(lo, hi, seconds, dtype=np.int64)
+    inside = (stamps >= lo) & (stamps < hi)
+    rows = np.searchsorted(bins, stamps[inside])
+    shape = (len(bins), 2 * channels)
+    count = np.zeros(shape, dtype=np.int32)
+    total = np.zeros(shape, dtype=np.float64)
+    minimum = np.full(shape, np.nan, dtype=np.float32)
+    maximum = np.full(shape, np.nan, dtype=np.float32)
+    count[rows] = coarse.count[inside]
+    total[rows] = coarse.total[inside]
+    minimum[rows] = coarse.minimum[inside]
+    maximum[rows] = coarse.maximum[inside]
+    return Aggregates(bins.astype(TIMESTAMP_DTYPE), count, total, minimum, maximum)
+
+
+def resample(readings: Readings, grid: Union[str, int], start: Optional[datetime]=None,
+             end: Optional[datetime]=None) -> Aggregates:
+    """
+    Bins irregular ``readings`` onto a regular grid (``'1min'``, ``'15min'``, ``'1h'``, ``'1d'`` or seconds): count,
+    sum, mean, minimum and maximum per bin and column, NaN and ``covered`` False where there is no sample.
+    """
+    seconds = grid_seconds(grid)
+    if start is not None or end is not None:
+        mask = np.ones(len(readings), dtype=bool)
+        if start is not None:
+            mask &= readings.timestamps >= np.datetime64(start, 's')
+        if end is not None:
+            mask &= readings.timestamps < np.datetime64(end, 's')
+        readings = readings[mask]
+    return regrid(Aggregates.from_readings(readings, seconds), seconds, start, end)
+
+
+def resampled_readings(readings: Readings, grid: Union[str, int], statistic: str='mean',
+                       start: Optional[datetime]=None, end: Optional[datetime]=None) -> Readings:
+    """
+    Shortcut for plots: the ``statistic`` of every bin as ``Readings``, NaN in the gaps.
+    """
+    return resample(readings, grid, start, end).to_readings(statistic)
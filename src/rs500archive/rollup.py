@@ -0,0 +1,300 @@
+import fcntl
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from rs500common.files import atomic_write, replace_file
+
+from .binary import EXTENSION as BINARY_EXTENSION, HEADER_SIZE, decode, open_records
+from .compressed import EXTENSION as COMPRESSED_EXTENSION, CompressedFile
+from .loader import Readings, TIMESTAMP_DTYPE, parse_lines
+from .query import PartitionIndex, merge_copies, read_partition
+
+HOUR = 3600
+DAY = 24 * HOUR
+ROLLUP_DIR = '.rollups'
+STATE_FILE = 'state.json'
+LOCK_FILE = 'lock'
+DAILY_FILE = 'daily.npz'
+
+
+class Aggregates(object):
+    """
+    Count, sum, minimum and maximum per time bucket (rows) and column. Columns are the temperatures of all channels
+    followed by the humidities of all channels. ``start`` holds the bucket start as datetime64[s].
+    """
+
+    def __init__(self, start: np.ndarray, count: np.ndarray, total: np.ndarray, minimum: np.ndarray,
+                 maximum: np.ndarray):
+        self.start = start
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @staticmethod
+    def empty(channels: int) -> 'Aggregates':
+        shape = (0, 2 * channels)
+        return Aggregates(np.empty(0, dtype=TIMESTAMP_DTYPE), np.empty(shape, dtype=np.int32),
+                          np.empty(shape, dtype=np.float64), np.empty(shape, dtype=np.float32),
+                          np.empty(shape, dtype=np.float32))
+
+    @staticmethod
+    def from_readings(readings: Readings, seconds: int) -> 'Aggregates':
+        values = np.hstack([readings.temperature, readings.humidity])
+        keys = readings.timestamps.astype(TIMESTAMP_DTYPE).astype(np.int64) // seconds * seconds
+        valid = ~np.isnan(values)
+        return _group(keys, valid.astype(np.int32), np.where(valid, values, 0).astype(np.float64), values, values)
+
+    @staticmethod
+    def concatenate(parts: List['Aggregates'], channels: int=0) -> 'Aggregates':
+        """
+        Combines aggregates of possibly overlapping buckets.
+        """
+        parts = [p for p in parts if len(p) > 0]
+        if not parts:
+            return Aggregates.empty(channels)
+        return _group(np.concatenate([p.start.astype(np.int64) for p in parts]),
+                      np.concatenate([p.count for p in parts]), np.concatenate([p.total for p in parts]),
+                      np.concatenate([p.minimum for p in parts]), np.concatenate([p.maximum for p in parts]))
+
+    def coarsen(self, seconds: int) -> 'Aggregates':
+        return _group(self.start.astype(np.int64) // seconds * seconds, self.count, self.total, self.minimum,
+                      self.maximum)
+
+    @property
+    def channels(self) -> int:
+        return self.count.shape[1] // 2
+
+    @property
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.total / self.count).astype(np.float32)
+
+    @property
+    def covered(self) -> np.ndarray:
+        """
+        True where a bucket holds at least one value of the column.
+        """
+        return self.count > 0
+
+    def __len__(self) -> int:
+        return self.start.shape[0]
+
+    def __getitem__(self, item) -> 'Aggregates':
+        return Aggregates(self.start[item], self.count[item], self.total[item], self.minimum[item], self.maximum[item])
+
+    def select(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> 'Aggregates':
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.start >= np.datetime64(start, 's')
+        if end is not None:
+            mask &= self.start < np.datetime64(end, 's')
+        return self[mask]
+
+    def to_readings(self, statistic: str='mean') -> Readings:
+        values = {'mean': self.mean, 'min': self.minimum, 'max': self.maximum}[statistic]
+        return Readings(self.start, values[:, :self.channels], values[:, self.channels:])
+
+    @staticmethod
+    def stack(parts: List['Aggregates'], channels: int=0) -> 'Aggregates':
+        """
+        The rows of all parts, in order; unlike ``concatenate`` buckets are not merged.
+        """
+        if not parts:
+            return Aggregates.empty(channels)
+        return Aggregates(np.concatenate([p.start for p in parts]), np.concatenate([p.count for p in parts]),
+                          np.concatenate([p.total for p in parts]), np.concatenate([p.minimum for p in parts]),
+                          np.concatenate([p.maximum for p in parts]))
+
+    def save(self, path: str, **extra: np.ndarray) -> None:
+        """
+        Writes the aggregates and the ``extra`` arrays, e.g. a label per row, to one ``.npz`` file.
+        """
+        replace_file(path, lambda tmp: np.savez(tmp, start=self.start.astype(np.int64), count=self.count,
+                                                total=self.total, minimum=self.minimum, maximum=self.maximum, **extra))
+
+    @staticmethod
+    def load(path: str) -> 'Aggregates':
+        with np.load(path) as data:
+            return Aggregates(data['start'].astype(TIMESTAMP_DTYPE), data['count'], data['total'], data['minimum'],
+                              data['maximum'])
+
+
+def _group(keys: np.ndarray, count: np.ndarray, total: np.ndarray, minimum: np.ndarray,
+           maximum: np.ndarray) -> Aggregates:
+    if keys.shape[0] == 0:
+        return Aggregates.empty(count.shape[1] // 2)
+    if np.any(np.diff(keys) < 0):
+        order = np.argsort(keys, kind='stable')
+        keys, count, total, minimum, maximum = keys[order], count[order], total[order], minimum[order], maximum[order]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    return Aggregates(keys[starts].astype(TIMESTAMP_DTYPE),
+                      np.add.reduceat(count, starts, axis=0).astype(np.int32),
+                      np.add.reduceat(total, starts, axis=0),
+                      np.fmin.reduceat(minimum, starts, axis=0).astype(np.float32),
+                      np.fmax.reduceat(maximum, starts, axis=0).astype(np.float32))
+
+
+def _read_csv_from(path: str, offset: int) -> Tuple[Readings, int]:
+    with open(path, 'rb') as fp:
+        fp.seek(offset)
+        data = fp.read()
+    # Only complete lines; a line being written right now is picked up next time
+    complete = data.rfind(b'\n') + 1
+    return parse_lines(data[:complete].decode('utf-8', 'replace').splitlines()), offset + complete
+
+
+def _read_binary_from(path: str, offset: int) -> Tuple[Readings, int]:
+    records = open_records(path)
+    first = max(0, offset - HEADER_SIZE) // records.dtype.itemsize
+    return decode(records[first:]), HEADER_SIZE + len(records) * records.dtype.itemsize
+
+
+def _read_compressed_from(path: str, offset: int) -> Tuple[Readings, int]:
+    # Compressed weeks are closed: they are never appended to, only replaced
+    return parse_lines(CompressedFile(path).read().decode('utf-8', 'replace').splitlines()), os.path.getsize(path)
+
+
+class RollupStore(object):
+    """
+    Hourly aggregates per week file and daily aggregates over the whole archive, kept in ``<dbdir>/.rollups``.
+    ``update()`` only processes rows appended since the last run; a file that was rewritten, truncated or replaced
+    (e.g. a CSV by its binary conversion) is aggregated again from the start. The daily file keeps the days of each
+    week file apart, so only the weeks that changed are coarsened again. Stores sharing a directory (e.g. the
+    daemon's and a plot job's) take turns: ``update()`` holds a lock on the directory and starts from the state
+    the last update left there.
+    """
+
+    def __init__(self, dbdir: str, channels: int=8, store_dir: str=None):
+        self.dbdir = dbdir
+        self.channels = channels
+        self.store_dir = store_dir or os.path.join(dbdir, ROLLUP_DIR)
+        self.index = PartitionIndex(dbdir)
+        self.state_path = os.path.join(self.store_dir, STATE_FILE)
+        self.state = self.__load_state()
+
+    def __load_state(self) -> Dict[str, dict]:
+        try:
+            with open(self.state_path, 'r') as fp:
+                state = json.load(fp)  # type: Dict[str, dict]
+        except (IOError, ValueError):
+            return {}
+        if any(s.get('channels') != self.channels for s in state.values()):
+            return {}
+        return state
+
+    def __hourly_path(self, stem: str) -> str:
+        return os.path.join(self.store_dir, stem.replace(os.sep, '_') + '.hourly.npz')
+
+    def update(self) -> bool:
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(os.path.join(self.store_dir, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another store on this directory may have updated it since this one last looked
+                self.state = self.__load_state()
+                return self.__update()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __update(self) -> bool:
+        self.index.refresh()
+        changed = set()
+        current = {}  # type: Dict[str, List[str]]
+        for group in self.index.weeks():
+            names = [os.path.relpath(path, self.dbdir) for path in group]
+            current[os.path.splitext(names[0])[0]] = names
+        for stem in set(self.state) - set(current):
+            del self.state[stem]
+            if os.path.exists(self.__hourly_path(stem)):
+                os.remove(self.__hourly_path(stem))
+            changed.add(stem)
+        for stem, names in sorted(current.items()):
+            if len(names) == 1:
+                updated = self.__update_partition(stem, names[0])
+            else:
+                updated = self.__update_copies(stem, names)
+            if updated:
+                changed.add(stem)
+        if changed or not os.path.exists(os.path.join(self.store_dir, DAILY_FILE)):
+            self.__update_daily(changed)
+            atomic_write(self.state_path, json.dumps(self.state, sort_keys=True))
+        return bool(changed)
+
+    def __update_partition(self, stem: str, name: str) -> bool:
+        path = os.path.join(self.dbdir, name)
+        stat = os.stat(path)
+        state = self.state.get(stem)
+        hourly_path = self.__hourly_path(stem)
+        if state is not None and state['source'] == name and state['size'] == stat.st_size \
+                and state['mtime'] == stat.st_mtime:
+            return False
+        appended = state is not None and state['source'] == name and stat.st_size > state['size'] \
+            and os.path.exists(hourly_path) and not name.endswith(COMPRESSED_EXTENSION)
+        offset = state['offset'] if appended else 0
+        if name.endswith(BINARY_EXTENSION):
+            readings, offset = _read_binary_from(path, offset)
+        elif name.endswith(COMPRESSED_EXTENSION):
+            readings, offset = _read_compressed_from(path, offset)
+        else:
+            readings, offset = _read_csv_from(path, offset)
+        fresh = Aggregates.from_readings(readings.resize(self.channels), HOUR)
+        if appended:
+            fresh = Aggregates.concatenate([Aggregates.load(hourly_path), fresh])
+        fresh.save(hourly_path)
+        self.state[stem] = {'source': name, 'size': stat.st_size, 'mtime': stat.st_mtime, 'offset': offset,
+                            'channels': self.channels}
+        return True
+
+    def __update_copies(self, stem: str, names: List[str]) -> bool:
+        # Several overlapping files of one week: aggregated again from all of them whenever one changes, without
+        # counting the rows they share twice
+        files = []
+        for name in names:
+            stat = os.stat(os.path.join(self.dbdir, name))
+            files.append([name, stat.st_size, stat.st_mtime])
+        state = self.state.get(stem)
+        if state is not None and state.get('files') == files:
+            return False
+        readings = merge_copies([read_partition(os.path.join(self.dbdir, name)) for name in names])
+        Aggregates.from_readings(readings.resize(self.channels), HOUR).save(self.__hourly_path(stem))
+        self.state[stem] = {'source': names, 'files': files, 'channels': self.channels}
+        return True
+
+    def __update_daily(self, changed: Set[str]) -> None:
+        # One row per day and week file, labelled with the week's stem: the days of a changed week are replaced by
+        # coarsening its hourly aggregates again (at most 24 * 7 rows), the other weeks are not loaded
+        path = os.path.join(self.store_dir, DAILY_FILE)
+        try:
+            daily = Aggregates.load(path)
+            with np.load(path) as data:
+                weeks = data['week']
+        except (IOError, KeyError, ValueError):
+            daily, weeks = None, None
+        if daily is None or daily.channels != self.channels:
+            # Missing, written before the days were kept per week or for other channels
+            daily, weeks, changed = Aggregates.empty(self.channels), np.empty(0, dtype=str), set(self.state)
+        keep = np.isin(weeks, sorted(set(self.state) - changed))
+        parts, labels = [daily[keep]], [weeks[keep]]
+        for stem in sorted(changed & set(self.state)):
+            part = Aggregates.load(self.__hourly_path(stem)).coarsen(DAY)
+            parts.append(part)
+            labels.append(np.full(len(part), stem))
+        Aggregates.stack(parts, self.channels).save(path, week=np.concatenate(labels))
+
+    def hourly(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> Aggregates:
+        parts = []
+        for group in self.index.weeks(start, end):
+            stem = os.path.splitext(os.path.relpath(group[0], self.dbdir))[0]
+            if stem in self.state:
+                parts.append(Aggregates.load(self.__hourly_path(stem)))
+        return Aggregates.concatenate(parts, self.channels).select(start, end)
+
+    def daily(self, start: Optional[datetime]=None, end: Optional[datetime]=None) -> Aggregates:
+        # Days found in more than one week file are merged
+        daily = Aggregates.load(os.path.join(self.store_dir, DAILY_FILE))
+        return Aggregates.concatenate([daily], self.channels).select(start, end)
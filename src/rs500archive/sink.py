@@ -0,0 +1,72 @@
+import os
+from datetime import datetime
+
+from rs5002csv.sink import Calibration, archive_path
+from rs500common.pipeline import Sink
+from rs500reader.do import Response
+
+from .binary import BinaryArchiveWriter, binary_path
+from .export import FeedExporter
+from .sqlstore import SqliteStore
+
+
+class BinaryArchiveSink(Sink):
+    """
+    Appends one record per sample to ``<dbdir>/<year>/wNN.rsb``, next to the weekly CSV. The file of the current
+    week is kept open.
+    """
+
+    name = 'binary'
+
+    def __init__(self, dbdir: str, calibration: Calibration):
+        self.dbdir = dbdir
+        self.calibration = calibration
+        self.__writer = None
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        path = binary_path(archive_path(self.dbdir, timestamp))
+        if self.__writer is None or self.__writer.path != path:
+            self.close()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.__writer = BinaryArchiveWriter(path, self.calibration.channels)
+        self.__writer.append_row(timestamp, self.calibration.apply(response))
+        self.__writer.flush()
+
+    def close(self) -> None:
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+
+class FeedSink(Sink):
+    """
+    Keeps the JSON feeds of the dashboard up to date with every sample.
+    """
+
+    name = 'feeds'
+
+    def __init__(self, dbdir: str, outdir: str, calibration: Calibration):
+        self.calibration = calibration
+        self.exporter = FeedExporter(dbdir, outdir, calibration.channels)
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.exporter.append(timestamp, self.calibration.apply(response))
+        self.exporter.export(timestamp)
+
+
+class SqliteSink(Sink):
+    """
+    Inserts one row per sample into the SQLite database at ``path``, committed right away (WAL mode).
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str, calibration: Calibration):
+        self.calibration = calibration
+        self.store = SqliteStore(path, calibration.channels)
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.store.insert(timestamp, self.calibration.apply(response))
+
+    def close(self) -> None:
+        self.store.close()
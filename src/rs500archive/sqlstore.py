@@ -0,0 +1,145 @@
+import sqlite3
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from .loader import Readings, TIMESTAMP_DTYPE, VALUE_DTYPE
+from .rollup import Aggregates
+
+TABLE = 'readings'
+BATCH_ROWS = 10000
+
+
+def _seconds(timestamp: datetime) -> int:
+    # Wall clock time encoded as if it were UTC, as in the binary archive
+    return int(np.datetime64(timestamp, 's').astype(np.int64))
+
+
+def _value(v: float) -> Optional[float]:
+    return None if v != v else float(v)
+
+
+class SqliteStore(object):
+    """
+    Readings in a SQLite database: one row per sample in the table ``readings``, keyed by the timestamp (seconds,
+    the rowid, so range queries use the primary key) with the columns ``t1, h1, t2, h2, ...``; NULL marks a missing
+    value. The database runs in WAL mode, so plots can query it while the daemon appends. With ``read_only`` an
+    existing database is opened for queries only, without touching its settings or schema; channels without a column
+    read as missing.
+    """
+
+    def __init__(self, path: str, channels: int=8, read_only: bool=False):
+        self.path = path
+        if read_only:
+            # Inserts fail with "attempt to write a readonly database"
+            self.connection = sqlite3.connect('file:{}?mode=ro'.format(quote(path)), uri=True,
+                                              check_same_thread=False)
+            existing = {row[1] for row in self.connection.execute('PRAGMA table_info({})'.format(TABLE))}
+            self.channels = sum(1 for name in existing if name.startswith('t') and name != 'ts')
+        else:
+            # The sink writes from its worker thread but is closed from the main thread
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS {} (ts INTEGER PRIMARY KEY)'.format(TABLE))
+            existing = {row[1] for row in self.connection.execute('PRAGMA table_info({})'.format(TABLE))}
+            with self.connection:
+                for c in range(1, channels + 1):
+                    for column in ('t{}'.format(c), 'h{}'.format(c)):
+                        if column not in existing:
+                            self.connection.execute('ALTER TABLE {} ADD COLUMN {} REAL'.format(TABLE, column))
+            self.channels = max(channels, sum(1 for name in existing if name.startswith('t') and name != 'ts'))
+        columns = ['ts'] + ['{}{}'.format(q, c) for c in range(1, self.channels + 1) for q in 'th']
+        self.__existing = set(columns)
+        self.__insert = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+            TABLE, ', '.join(columns), ', '.join('?' * len(columns)))
+
+    def __row(self, ts: int, values: Sequence[Tuple[float, float]]) -> list:
+        row = [ts]
+        for t, h in values[:self.channels]:
+            row.append(_value(t))
+            row.append(_value(h))
+        return row + [None] * (1 + 2 * self.channels - len(row))
+
+    def insert(self, timestamp: datetime, values: Sequence[Tuple[float, float]]) -> None:
+        with self.connection:
+            self.connection.execute(self.__insert, self.__row(_seconds(timestamp), values))
+
+    def insert_readings(self, readings: Readings, batch_rows: int=BATCH_ROWS) -> int:
+        """
+        Bulk insert: one ``executemany`` and one transaction per ``batch_rows`` rows. Returns the number of rows.
+        """
+        readings = readings.resize(self.channels)
+        stamps = readings.timestamps.astype(TIMESTAMP_DTYPE).astype(np.int64).tolist()
+        values = np.empty((len(readings), 2 * self.channels), dtype=np.float64)
+        values[:, 0::2] = readings.temperature
+        values[:, 1::2] = readings.humidity
+        rows = [[ts] + [_value(v) for v in row] for ts, row in zip(stamps, values.tolist())]
+        for lo in range(0, len(rows), batch_rows):
+            with self.connection:
+                self.connection.executemany(self.__insert, rows[lo:lo + batch_rows])
+        return len(rows)
+
+    def __where(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[str, list]:
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(_seconds(start))
+        if end is not None:
+            clauses.append('ts < ?')
+            params.append(_seconds(end))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def __channels(self, channels: Optional[Sequence[int]]) -> List[int]:
+        return list(channels) if channels is not None else list(range(1, self.channels + 1))
+
+    def __columns(self, channels: List[int]) -> List[str]:
+        # Temperatures of all channels, then humidities
+        columns = ['t{}'.format(c) for c in channels] + ['h{}'.format(c) for c in channels]
+        return [c if c in self.__existing else 'NULL' for c in columns]
+
+    def read_range(self, start: Optional[datetime]=None, end: Optional[datetime]=None,
+                   channels: Sequence[int]=None) -> Readings:
+        """
+        Same as ``Archive.read_range``: readings with ``start <= ts < end``, ``channels`` numbered from 1.
+        """
+        channels = self.__channels(channels)
+        where, params = self.__where(start, end)
+        columns = self.__columns(channels)
+        rows = self.connection.execute('SELECT ts, {} FROM {}{} ORDER BY ts'.format(
+            ', '.join(columns), TABLE, where), params).fetchall()
+        if not rows:
+            return Readings.empty(len(channels))
+        table = np.array(rows, dtype=np.float64)
+        return Readings(table[:, 0].astype(np.int64).astype(TIMESTAMP_DTYPE),
+                        np.ascontiguousarray(table[:, 1:1 + len(channels)], dtype=VALUE_DTYPE),
+                        np.ascontiguousarray(table[:, 1 + len(channels):], dtype=VALUE_DTYPE))
+
+    def aggregate(self, seconds: int, start: Optional[datetime]=None, end: Optional[datetime]=None,
+                  channels: Sequence[int]=None) -> Aggregates:
+        """
+        Count, sum, minimum and maximum per bucket of ``seconds``, computed by SQLite; the result has the same layout
+        as the rollups (temperatures of all selected channels, then humidities).
+        """
+        channels = self.__channels(channels)
+        where, params = self.__where(start, end)
+        columns = self.__columns(channels)
+        stats = [template.format(c) for template in ('COUNT({})', 'TOTAL({})', 'MIN({})', 'MAX({})')
+                 for c in columns]
+        query = 'SELECT ts / ? * ? AS bucket, {} FROM {}{} GROUP BY bucket ORDER BY bucket'.format(
+            ', '.join(stats), TABLE, where)
+        rows = self.connection.execute(query, [seconds, seconds] + params).fetchall()
+        if not rows:
+            return Aggregates.empty(len(channels))
+        table = np.array(rows, dtype=np.float64)
+        n = len(columns)
+        return Aggregates(table[:, 0].astype(np.int64).astype(TIMESTAMP_DTYPE),
+                          table[:, 1:1 + n].astype(np.int32), table[:, 1 + n:1 + 2 * n],
+                          table[:, 1 + 2 * n:1 + 3 * n].astype(np.float32),
+                          table[:, 1 + 3 * n:].astype(np.float32))
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,111 @@
+import argparse
+import configparser
+from typing import List, Tuple
+
+from redis import ConnectionPool, StrictRedis, RedisError
+
+from .rules import EXIT_CODE_CRIT, EXIT_CODE_UNKNOWN, EXIT_WORD_CRIT, EXIT_WORD_UNKNOWN, EXIT_WORDS, Rule, \
+    check_all, evaluate, fetch_values, rule_from_args, rules_from_config
+
+
+class ArgumentError(Exception):
+    pass
+
+
+class _Parser(argparse.ArgumentParser):
+
+    def __init__(self, *args, raise_errors: bool=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.raise_errors = raise_errors
+
+    def error(self, message: str):
+        if self.raise_errors:
+            raise ArgumentError('{}: {}'.format(self.prog, message))
+        super().error(message)
+
+
+def build_parser(raise_errors: bool=False) -> argparse.ArgumentParser:
+    """
+    Command line of ``check_rs500``. With ``raise_errors`` invalid arguments raise ``ArgumentError`` instead of
+    exiting, as needed by the check server.
+    """
+    parser = _Parser(prog='check_rs500', description='Hole RS500 Messwerte', epilog='Nutzbar als Icinga-Plugin',
+                     raise_errors=raise_errors)
+    channel_group = parser.add_mutually_exclusive_group(required=True)
+    channel_group.add_argument('-c', '--channel', type=int, help='Kanal-Nummer')
+    channel_group.add_argument('-b', '--batch', type=int, nargs='*', metavar='CHANNEL',
+                               help='Mehrere Kanäle in einem Aufruf prüfen (ohne Angabe: alle [channel<N>]-Abschnitte '
+                                    'aus check_rs500.ini); Grenzwerte aus der Konfiguration haben Vorrang vor den '
+                                    'Optionen')
+    parser.add_argument('--min-temp', type=float, help='Mindesttemperatur (numerische Werte) - Unterschreitung ist Critical')
+    parser.add_argument('--max-temp', type=float, help='Maximalmaximaltemperatur (numerische Werte) - Überschreitung ist Critical')
+    parser.add_argument('--min-warn-temp', type=float, help='Mindesttemperatur Warnung (numerische Werte) - Unterschreitung ist Warnung')
+    parser.add_argument('--max-warn-temp', type=float, help='Maximaltemperatur Warnung (numerische Werte) - Überschreitung ist Warnung')
+    parser.add_argument('--min-hum', type=int, help='Mindestluftfeuchte (numerische Werte) - Unterschreitung ist Critical')
+    parser.add_argument('--max-hum', type=int, help='Maximalluftfeuchte (numerische Werte) - Überschreitung ist Critical')
+    parser.add_argument('--min-warn-hum', type=int, help='Mindestluftfeuchte Warnung (numerische Werte) - Unterschreitung ist Warnung')
+    parser.add_argument('--max-warn-hum', type=int, help='Maximalluftfeuchte Warnung (numerische Werte) - Überschreitung ist Warnung')
+    return parser
+
+
+class CheckContext(object):
+    """
+    Everything a check needs from ``check_rs500.ini``: the Redis client, the key prefix and the batch rules.
+    """
+
+    def __init__(self, conf: configparser.ConfigParser, redis: StrictRedis=None):
+        if redis is None:
+            pool = ConnectionPool(host=conf.get(section='redis', option='host', fallback='localhost'),
+                                  port=conf.getint(section='redis', option='port', fallback=6379),
+                                  db=conf.getint(section='redis', option='db', fallback=0),
+                                  password=conf.get(section='redis', option='password', fallback=None),
+                                  socket_timeout=conf.getfloat(section='redis', option='socket_timeout_seconds',
+                                                               fallback=5.0))
+            redis = StrictRedis(connection_pool=pool)
+        self.redis = redis
+        self.prefix = conf.get(section='redis', option='prefix', fallback='')
+        self.rules = rules_from_config(conf)
+
+
+def single_check(args: argparse.Namespace, context: CheckContext) -> Tuple[int, str]:
+    temp, humi = fetch_values(context.redis, context.prefix, [args.channel])[args.channel] or (None, None)
+    if temp is None:
+        return EXIT_CODE_CRIT, '{}: Unknown Channel [{}]'.format(EXIT_WORD_CRIT, args.channel)
+    rule = rule_from_args(args, args.channel)
+    if rule.checks_temperature() and temp == 'unknown':
+        return EXIT_CODE_CRIT, '{}: Should check temperature, but temperature is unknown; channel = {} -> ' \
+                               'temp = {}, humi = {}'.format(EXIT_WORD_CRIT, args.channel, temp, humi)
+    if rule.checks_humidity() and humi == 'unknown':
+        return EXIT_CODE_CRIT, '{}: Should check humidity, but humidity is unknown; channel = {} -> ' \
+                               'temp = {}, humi = {}'.format(EXIT_WORD_CRIT, args.channel, temp, humi)
+    exit_code, reason = evaluate(rule, temp, humi)
+    return exit_code, '{}: {}; channel = {} -> temp = {}, humi = {}'.format(EXIT_WORDS[exit_code], reason,
+                                                                           args.channel, temp, humi)
+
+
+def batch_rules(args: argparse.Namespace, context: CheckContext) -> List[Rule]:
+    # Limits given on the command line apply to every channel that does not set them in its [channel<N>] section
+    defaults = rule_from_args(args, 0)
+    channels = args.batch or sorted(context.rules)
+    return [context.rules[c].with_defaults(defaults) if c in context.rules else rule_from_args(args, c)
+            for c in channels]
+
+
+def batch_check(args: argparse.Namespace, context: CheckContext) -> Tuple[int, str]:
+    rules = batch_rules(args, context)
+    if not rules:
+        return EXIT_CODE_UNKNOWN, '{}: No channels given and no [channel<N>] sections configured'.format(
+            EXIT_WORD_UNKNOWN)
+    return check_all(rules, fetch_values(context.redis, context.prefix, [r.channel for r in rules]))
+
+
+def handle(args: argparse.Namespace, context: CheckContext) -> Tuple[int, str]:
+    """
+    Runs the check described by the parsed arguments; returns the exit code and the plugin output.
+    """
+    try:
+        if args.batch is not None:
+            return batch_check(args, context)
+        return single_check(args, context)
+    except RedisError:
+        return EXIT_CODE_UNKNOWN, '{}: Redis error'.format(EXIT_WORD_UNKNOWN)
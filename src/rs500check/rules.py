@@ -0,0 +1,176 @@
+import configparser
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from redis import StrictRedis
+
+EXIT_CODE_OK = 0
+EXIT_CODE_WARN = 1
+EXIT_CODE_CRIT = 2
+EXIT_CODE_UNKNOWN = 3
+
+EXIT_WORD_OK = 'ok'
+EXIT_WORD_WARN = 'warn'
+EXIT_WORD_CRIT = 'CRITICAL'
+EXIT_WORD_UNKNOWN = 'unknown'
+
+EXIT_WORDS = {EXIT_CODE_OK: EXIT_WORD_OK, EXIT_CODE_WARN: EXIT_WORD_WARN, EXIT_CODE_CRIT: EXIT_WORD_CRIT,
+              EXIT_CODE_UNKNOWN: EXIT_WORD_UNKNOWN}
+
+TEMPERATURE_LIMITS = ('min_temp', 'max_temp', 'min_warn_temp', 'max_warn_temp')
+HUMIDITY_LIMITS = ('min_hum', 'max_hum', 'min_warn_hum', 'max_warn_hum')
+SECTION_PATTERN = re.compile(r'^channel\s*(\d+)$')
+
+Value = Union[float, int, str]
+
+
+class Rule(object):
+    """
+    Thresholds of one channel, named like the command line options of ``check_rs500``; ``None`` means unchecked.
+    """
+
+    def __init__(self, channel: int, **limits):
+        self.channel = channel
+        for name in TEMPERATURE_LIMITS + HUMIDITY_LIMITS:
+            setattr(self, name, limits.pop(name, None))
+        if limits:
+            raise ValueError('Unknown limits for channel {}: {}'.format(channel, ', '.join(sorted(limits))))
+
+    def checks_temperature(self) -> bool:
+        return any(getattr(self, name) is not None for name in TEMPERATURE_LIMITS)
+
+    def checks_humidity(self) -> bool:
+        return any(getattr(self, name) is not None for name in HUMIDITY_LIMITS)
+
+    def with_defaults(self, defaults: 'Rule') -> 'Rule':
+        limits = {}
+        for name in TEMPERATURE_LIMITS + HUMIDITY_LIMITS:
+            value = getattr(self, name)
+            limits[name] = getattr(defaults, name) if value is None else value
+        return Rule(self.channel, **limits)
+
+
+def rule_from_args(args, channel: int) -> Rule:
+    return Rule(channel, **{name: getattr(args, name, None) for name in TEMPERATURE_LIMITS + HUMIDITY_LIMITS})
+
+
+def rules_from_config(conf: configparser.ConfigParser) -> Dict[int, Rule]:
+    """
+    Reads one rule per ``[channel<N>]`` section, e.g. ``[channel1]`` with ``max_temp = 30``.
+    """
+    rules = {}
+    for section in conf.sections():
+        match = SECTION_PATTERN.match(section)
+        if match is None:
+            continue
+        channel = int(match.group(1))
+        limits = {}
+        for name in TEMPERATURE_LIMITS:
+            limits[name] = conf.getfloat(section=section, option=name, fallback=None)
+        for name in HUMIDITY_LIMITS:
+            limits[name] = conf.getint(section=section, option=name, fallback=None)
+        rules[channel] = Rule(channel, **limits)
+    return rules
+
+
+def fetch_values(redis: StrictRedis, prefix: str, channels: Iterable[int]) -> Dict[int, Tuple[Value, Value]]:
+    """
+    Fetches temperature and humidity of all ``channels`` with a single ``MGET``. Missing values are ``'unknown'``;
+    a channel without any value maps to ``None``.
+    """
+    channels = list(channels)
+    keys = []
+    for channel in channels:
+        keys.append('{0}c{1}_temp'.format(prefix, channel))
+        keys.append('{0}c{1}_humi'.format(prefix, channel))
+    raw = redis.mget(keys) if keys else []
+    values = {}
+    for i, channel in enumerate(channels):
+        raw_temp, raw_humi = raw[2 * i], raw[2 * i + 1]
+        if raw_temp is None and raw_humi is None:
+            values[channel] = None
+            continue
+        values[channel] = ('unknown' if raw_temp is None else float(bytes(raw_temp).decode()),
+                           'unknown' if raw_humi is None else int(bytes(raw_humi).decode()))
+    return values
+
+
+def min_max_check(value, min_val, max_val) -> bool:
+    if min_val is not None:
+        if value < min_val:
+            return False
+    if max_val is not None:
+        if value > max_val:
+            return False
+    return True
+
+
+def evaluate(rule, temp: Value, humi: Value) -> Tuple[int, str]:
+    """
+    Checks one channel; returns the exit code and the reason. ``rule`` may be a ``Rule`` or the parsed arguments
+    of a single channel check.
+    """
+    if temp != 'unknown':
+        if not min_max_check(temp, rule.min_temp, rule.max_temp):
+            return EXIT_CODE_CRIT, 'Temperature in critical range'
+        if not min_max_check(temp, rule.min_warn_temp, rule.max_warn_temp):
+            return EXIT_CODE_WARN, 'Temperature in warning range'
+    if humi != 'unknown':
+        if not min_max_check(humi, rule.min_hum, rule.max_hum):
+            return EXIT_CODE_CRIT, 'Humidity in critical range'
+        if not min_max_check(humi, rule.min_warn_hum, rule.max_warn_hum):
+            return EXIT_CODE_WARN, 'Humidity in warning range'
+    return EXIT_CODE_OK, 'everything fine'
+
+
+def _range(low, high) -> str:
+    if low is None and high is None:
+        return ''
+    return '{}:{}'.format('~' if low is None else low, '' if high is None else high)
+
+
+def perfdata(rule: Rule, temp: Value, humi: Value) -> List[str]:
+    """
+    Performance data in the plugin format ``'label'=value;warn;crit``.
+    """
+    result = []
+    if temp != 'unknown':
+        result.append("'c{}_temp'={};{};{}".format(rule.channel, temp, _range(rule.min_warn_temp, rule.max_warn_temp),
+                                                   _range(rule.min_temp, rule.max_temp)))
+    if humi != 'unknown':
+        result.append("'c{}_humi'={}%;{};{};0;100".format(rule.channel, humi,
+                                                          _range(rule.min_warn_hum, rule.max_warn_hum),
+                                                          _range(rule.min_hum, rule.max_hum)))
+    return result
+
+
+def check_all(rules: Iterable[Rule], values: Dict[int, Optional[Tuple[Value, Value]]]) -> Tuple[int, str]:
+    """
+    Evaluates every rule against the fetched values in one pass. Returns the worst exit code and the plugin output:
+    a summary line with the problems, followed by the performance data of all channels.
+    """
+    worst = EXIT_CODE_OK
+    problems = []
+    performance = []
+    rules = sorted(rules, key=lambda r: r.channel)
+    for rule in rules:
+        value = values.get(rule.channel)
+        if value is None:
+            code, reason = EXIT_CODE_CRIT, 'Unknown Channel'
+        else:
+            temp, humi = value
+            if rule.checks_temperature() and temp == 'unknown':
+                code, reason = EXIT_CODE_CRIT, 'Should check temperature, but temperature is unknown'
+            elif rule.checks_humidity() and humi == 'unknown':
+                code, reason = EXIT_CODE_CRIT, 'Should check humidity, but humidity is unknown'
+            else:
+                code, reason = evaluate(rule, temp, humi)
+            performance.extend(perfdata(rule, temp, humi))
+        if code != EXIT_CODE_OK:
+            problems.append('channel {}: {}'.format(rule.channel, reason))
+        worst = max(worst, code)
+    if problems:
+        summary = '{}: {}'.format(EXIT_WORDS[worst], ', '.join(problems))
+    else:
+        summary = '{}: {} channels fine'.format(EXIT_WORDS[worst], len(rules))
+    return worst, '{} | {}'.format(summary, ' '.join(performance))
@@ -0,0 +1,54 @@
+import json
+import os
+import socketserver
+
+from .handler import ArgumentError, CheckContext, build_parser, handle
+from .rules import EXIT_CODE_UNKNOWN, EXIT_WORD_UNKNOWN
+
+DEFAULT_SOCKET = '/tmp/check_rs500.sock'
+
+
+def encode_reply(exit_code: int, output: str) -> bytes:
+    return '{}\n{}'.format(exit_code, output).encode('utf-8')
+
+
+class _CheckHandler(socketserver.StreamRequestHandler):
+    """
+    One request per connection: the arguments of ``check_rs500`` as a JSON list on one line. The reply is the
+    exit code on the first line followed by the plugin output.
+    """
+
+    def handle(self):
+        try:
+            argv = json.loads(self.rfile.readline().decode('utf-8'))
+            exit_code, output = handle(self.server.parser.parse_args(argv), self.server.context)
+        except (ArgumentError, ValueError, TypeError) as e:
+            exit_code, output = EXIT_CODE_UNKNOWN, '{}: {}'.format(EXIT_WORD_UNKNOWN, e)
+        except SystemExit:
+            # --help
+            exit_code, output = EXIT_CODE_UNKNOWN, build_parser().format_help()
+        except Exception as e:
+            # Anything else would close the connection without a reply
+            exit_code, output = EXIT_CODE_UNKNOWN, '{}: {}: {}'.format(EXIT_WORD_UNKNOWN, type(e).__name__, e)
+        self.wfile.write(encode_reply(exit_code, output))
+
+
+class CheckServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Answers check requests over a Unix socket with the configuration parsed and the Redis connection pool opened
+    once, so a check costs a socket round trip plus one ``MGET``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, context: CheckContext):
+        self.context = context
+        self.parser = build_parser(raise_errors=True)
+        if os.path.exists(path):
+            os.remove(path)  # left over from a previous run
+        super().__init__(path, _CheckHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
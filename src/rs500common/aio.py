@@ -0,0 +1,49 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict
+
+from rs500reader.do import Response
+
+from .pipeline import Sink, SinkPipeline
+
+
+class AsyncSink(object):
+    """
+    Awaitable wrapper around a blocking ``Sink`` (CSV files, Redis, ...). Writes run in a thread of their own, one
+    after the other in the order they were started.
+    """
+
+    def __init__(self, sink: Sink):
+        self.sink = sink
+        self.name = sink.name
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def write(self, timestamp: datetime, response: Response) -> None:
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.sink.write, timestamp, response)
+
+    async def close(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.sink.close)
+        self.executor.shutdown(wait=False)
+
+
+class AsyncSinkPipeline(object):
+    """
+    Awaitable front end of a ``SinkPipeline``: ``publish`` hands the response to all sinks and returns once every
+    write has finished, without blocking the event loop. Sink statistics and back pressure are those of the pipeline.
+    """
+
+    def __init__(self, pipeline: SinkPipeline):
+        self.pipeline = pipeline
+
+    async def publish(self, response: Response, timestamp: datetime=None) -> Dict[str, bool]:
+        """
+        Returns per sink whether the write succeeded; sinks whose write was dropped are left out.
+        """
+        futures = self.pipeline.publish(response, timestamp)
+        names = sorted(futures)
+        results = await asyncio.gather(*[asyncio.wrap_future(futures[n]) for n in names])
+        return dict(zip(names, results))
+
+    async def close(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(None, self.pipeline.close)
@@ -0,0 +1,28 @@
+import os
+from typing import Callable
+
+
+def replace_file(path: str, write: Callable[[str], None]) -> None:
+    """
+    Replaces ``path`` with the file ``write`` creates at the temporary path it is given, so readers (web servers,
+    Home Assistant, other processes) see either the old or the new content, never a partial file. The temporary
+    file is hidden next to ``path`` and keeps its extension, for writers that pick the format from it.
+    """
+    root, ext = os.path.splitext(os.path.basename(path))
+    tmp = os.path.join(os.path.dirname(path) or '.', '.{}.tmp{}'.format(root, ext))
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def atomic_write(path: str, text: str, fsync: bool=False) -> None:
+    """
+    Replaces ``path`` with ``text``; with ``fsync`` the new content is on disk before it replaces the old one.
+    """
+    def write(tmp: str) -> None:
+        with open(tmp, 'w') as fp:
+            fp.write(text)
+            if fsync:
+                fp.flush()
+                os.fsync(fp.fileno())
+
+    replace_file(path, write)
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from .files import atomic_write
+
+
+class Metrics(object):
+    """
+    Interface the reader, the acquisition and the sinks report to. This base class discards everything; subclass it
+    to forward the numbers elsewhere, e.g. to a monitoring system. ``dump`` and ``write`` render what ``snapshot``
+    returns, nothing unless a subclass keeps values.
+    """
+
+    def inc(self, name: str, amount: int=1) -> None:
+        pass
+
+    def observe(self, name: str, seconds: float) -> None:
+        pass
+
+    def gauge(self, name: str, value: float) -> None:
+        pass
+
+    @contextmanager
+    def timer(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, float]:
+        return OrderedDict()
+
+    def dump(self) -> str:
+        return ''.join('{} {}\n'.format(name, value) for name, value in self.snapshot().items())
+
+    def write(self, path: str) -> None:
+        atomic_write(path, self.dump())
+
+
+class TimerStats(object):
+
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None  # type: Optional[float]
+        self.maximum = None  # type: Optional[float]
+        self.last = None  # type: Optional[float]
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class MetricsRegistry(Metrics):
+    """
+    Keeps counters, gauges and timers in process; ``dump()`` renders them as text, one ``name value`` per line.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}  # type: Dict[str, int]
+        self.gauges = {}  # type: Dict[str, float]
+        self.timers = {}  # type: Dict[str, TimerStats]
+
+    def inc(self, name: str, amount: int=1) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                stats = self.timers[name] = TimerStats()
+            stats.add(seconds)
+
+    def gauge(self, name: str, value: float) -> None:
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        All values by name; a timer ``t`` contributes ``t.count``, ``t.mean_ms``, ``t.min_ms``, ``t.max_ms`` and
+        ``t.last_ms``.
+        """
+        result = OrderedDict()
+        with self.lock:
+            for name in sorted(self.counters):
+                result[name] = self.counters[name]
+            for name in sorted(self.gauges):
+                result[name] = self.gauges[name]
+            for name in sorted(self.timers):
+                stats = self.timers[name]
+                result[name + '.count'] = stats.count
+                for suffix, value in (('mean', stats.mean), ('min', stats.minimum), ('max', stats.maximum),
+                                      ('last', stats.last)):
+                    result['{}.{}_ms'.format(name, suffix)] = round(value * 1000, 3)
+        return result
+
+
+_default = MetricsRegistry()  # type: Metrics
+
+
+def get_metrics() -> Metrics:
+    return _default
+
+
+def set_metrics(metrics: Metrics) -> None:
+    """
+    Replaces the registry used by components that were not given one explicitly.
+    """
+    global _default
+    _default = metrics
@@ -0,0 +1,172 @@
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from sys import stderr
+from typing import Dict, Iterable, Optional
+
+from rs500reader.do import Response
+
+from .metrics import Metrics, get_metrics
+
+
+class Sink(ABC):
+    """
+    Destination for one acquired ``Response`` per tick. Subclasses implement ``write``; ``tick`` is called on ticks
+    without a response, e.g. to commit buffered data on time.
+    """
+
+    name = 'sink'
+
+    @abstractmethod
+    def write(self, timestamp: datetime, response: Response) -> None:
+        pass
+
+    def tick(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class SinkStats(object):
+
+    def __init__(self):
+        self.writes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.last_latency = None  # type: Optional[float]
+        self.total_latency = 0.0
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        if self.writes == 0:
+            return None
+        return self.total_latency / self.writes
+
+    def __str__(self) -> str:
+        return 'writes = {}, failures = {}, dropped = {}, last = {}, mean = {}'.format(
+            self.writes, self.failures, self.dropped,
+            _format_ms(self.last_latency), _format_ms(self.mean_latency))
+
+
+def _format_ms(seconds: Optional[float]) -> str:
+    return '-' if seconds is None else '{:.1f} ms'.format(seconds * 1000)
+
+
+class _Worker(object):
+
+    def __init__(self, sink: Sink, max_pending: int, metrics: Optional[Metrics]):
+        self.sink = sink
+        self.metrics = metrics
+        self.stats = SinkStats()
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+        # One thread per sink keeps the writes of a sink in order while a slow sink cannot hold back the others
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, timestamp: datetime, response: Response) -> Optional[Future]:
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.stats.dropped += 1
+                self.__metrics.inc('sink.{}.dropped'.format(self.sink.name))
+                return None
+            self.pending += 1
+        return self.executor.submit(self.__write, timestamp, response)
+
+    def tick(self) -> Future:
+        return self.executor.submit(self.__tick)
+
+    @property
+    def __metrics(self) -> Metrics:
+        return self.metrics if self.metrics is not None else get_metrics()
+
+    def __tick(self) -> None:
+        try:
+            self.sink.tick()
+        except Exception:
+            print('Sink "{}" failed:'.format(self.sink.name), file=stderr)
+            traceback.print_exc(file=stderr)
+            self.__metrics.inc('sink.{}.failures'.format(self.sink.name))
+
+    def __write(self, timestamp: datetime, response: Response) -> bool:
+        started = time.monotonic()
+        try:
+            self.sink.write(timestamp, response)
+            ok = True
+        except Exception:
+            print('Sink "{}" failed:'.format(self.sink.name), file=stderr)
+            traceback.print_exc(file=stderr)
+            ok = False
+        latency = time.monotonic() - started
+        if ok:
+            self.__metrics.observe('sink.{}.write'.format(self.sink.name), latency)
+        else:
+            self.__metrics.inc('sink.{}.failures'.format(self.sink.name))
+        with self.lock:
+            self.pending -= 1
+            if ok:
+                self.stats.writes += 1
+                self.stats.last_latency = latency
+                self.stats.total_latency += latency
+            else:
+                self.stats.failures += 1
+        return ok
+
+
+class SinkPipeline(object):
+    """
+    Fans one ``Response`` per tick out to all registered sinks. Every sink is written from its own thread; at most
+    ``max_pending`` writes are queued per sink, further writes to a stuck sink are dropped and counted.
+    Write times, failures and drops are also reported to ``metrics`` as ``sink.<name>.write`` etc.
+    """
+
+    def __init__(self, sinks: Iterable[Sink]=(), max_pending: int=10, metrics: Metrics=None):
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self.__workers = []
+        for sink in sinks:
+            self.register(sink)
+
+    def register(self, sink: Sink) -> None:
+        if sink.name in self.stats:
+            raise ValueError('Sink "{}" is already registered'.format(sink.name))
+        self.__workers.append(_Worker(sink, self.max_pending, self.metrics))
+
+    @property
+    def sinks(self) -> list:
+        return [w.sink for w in self.__workers]
+
+    @property
+    def stats(self) -> Dict[str, SinkStats]:
+        return {w.sink.name: w.stats for w in self.__workers}
+
+    def publish(self, response: Response, timestamp: datetime=None) -> Dict[str, Future]:
+        if timestamp is None:
+            timestamp = datetime.now()
+        futures = {}
+        for worker in self.__workers:
+            future = worker.submit(timestamp, response)
+            if future is not None:
+                futures[worker.sink.name] = future
+        return futures
+
+    def tick(self) -> Dict[str, Future]:
+        """
+        Calls ``tick`` of every sink in its thread, after the writes already queued.
+        """
+        return {worker.sink.name: worker.tick() for worker in self.__workers}
+
+    def close(self) -> None:
+        for worker in self.__workers:
+            worker.executor.shutdown(wait=True)
+            worker.sink.close()
+
+    def __enter__(self) -> 'SinkPipeline':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
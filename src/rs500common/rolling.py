@@ -0,0 +1,152 @@
+import math
+import re
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from rs500reader.do import Response
+
+DEFAULT_WINDOWS = ('5m', '1h', '24h')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+DURATION_PATTERN = re.compile(r'^(\d+)([smhd])$')
+
+
+def parse_window(name: str) -> int:
+    """
+    Returns the length in seconds of a window given like ``5m``, ``1h`` or ``24h``.
+    """
+    match = DURATION_PATTERN.match(name.strip())
+    if match is None:
+        raise ValueError('Invalid window "{}", use e.g. 300s, 5m, 1h or 1d'.format(name))
+    return int(match.group(1)) * UNITS[match.group(2)]
+
+
+class RollingWindow(object):
+    """
+    Minimum, maximum, mean, standard deviation and rate of change of the samples of the last ``seconds``, in O(1)
+    amortized per sample: minimum and maximum come from monotonic deques, mean and deviation from running sums.
+    Values are kept as integer multiples of ``1 / scale`` (tenths of a degree, whole percent) so the running sums
+    stay exact however long the window runs.
+    """
+
+    def __init__(self, seconds: float, scale: int=10):
+        self.seconds = seconds
+        self.scale = scale
+        self.__samples = deque()  # (time, value)
+        self.__min = deque()  # increasing values
+        self.__max = deque()  # decreasing values
+        self.__sum = 0
+        self.__sum_sq = 0
+
+    def add(self, time: float, value: float) -> None:
+        scaled = int(round(value * self.scale))
+        self.__samples.append((time, scaled))
+        self.__sum += scaled
+        self.__sum_sq += scaled * scaled
+        while self.__min and self.__min[-1][1] >= scaled:
+            self.__min.pop()
+        self.__min.append((time, scaled))
+        while self.__max and self.__max[-1][1] <= scaled:
+            self.__max.pop()
+        self.__max.append((time, scaled))
+        self.expire(time)
+
+    def expire(self, now: float) -> None:
+        oldest = now - self.seconds
+        while self.__samples and self.__samples[0][0] <= oldest:
+            _, scaled = self.__samples.popleft()
+            self.__sum -= scaled
+            self.__sum_sq -= scaled * scaled
+        while self.__min and self.__min[0][0] <= oldest:
+            self.__min.popleft()
+        while self.__max and self.__max[0][0] <= oldest:
+            self.__max.popleft()
+
+    @property
+    def count(self) -> int:
+        return len(self.__samples)
+
+    @property
+    def minimum(self) -> Optional[float]:
+        return self.__min[0][1] / self.scale if self.__min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        return self.__max[0][1] / self.scale if self.__max else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.__sum / self.count / self.scale if self.count else None
+
+    @property
+    def stddev(self) -> Optional[float]:
+        n = self.count
+        if n == 0:
+            return None
+        # n * sum(x^2) - sum(x)^2 is exact in integers, so it never turns negative
+        return math.sqrt(n * self.__sum_sq - self.__sum * self.__sum) / n / self.scale
+
+    @property
+    def rate(self) -> Optional[float]:
+        """
+        Change per hour between the oldest and the newest sample of the window.
+        """
+        if self.count < 2:
+            return None
+        (t0, v0), (t1, v1) = self.__samples[0], self.__samples[-1]
+        if t1 <= t0:
+            return None
+        return (v1 - v0) / self.scale / (t1 - t0) * 3600
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return OrderedDict([('min', self.minimum), ('max', self.maximum), ('mean', self.mean),
+                            ('stddev', self.stddev), ('rate', self.rate), ('count', self.count)])
+
+
+class RollingStats(object):
+    """
+    One ``RollingWindow`` per channel, quantity (``temp``, ``humi``) and window, fed with every acquired response.
+    """
+
+    def __init__(self, windows: Iterable[str]=DEFAULT_WINDOWS):
+        self.windows = OrderedDict((name, parse_window(name)) for name in windows)
+        self.__channels = {}  # type: Dict[Tuple[int, str], Dict[str, RollingWindow]]
+
+    def __windows(self, channel: int, quantity: str) -> Dict[str, RollingWindow]:
+        key = (channel, quantity)
+        windows = self.__channels.get(key)
+        if windows is None:
+            scale = 10 if quantity == 'temp' else 1
+            windows = self.__channels[key] = OrderedDict(
+                (name, RollingWindow(seconds, scale)) for name, seconds in self.windows.items())
+        return windows
+
+    def update(self, timestamp: datetime, response: Response) -> None:
+        now = timestamp.timestamp()
+        for channel, values in response.all.items():
+            if values is None:
+                continue
+            for quantity, value in (('temp', values.temperature), ('humi', values.humidity)):
+                for window in self.__windows(channel, quantity).values():
+                    window.add(now, value)
+        # Channels that stopped reporting must not keep stale values
+        for windows in self.__channels.values():
+            for window in windows.values():
+                window.expire(now)
+
+    def window(self, channel: int, quantity: str, name: str) -> RollingWindow:
+        return self.__windows(channel, quantity)[name]
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Flat ``c<n>_<quantity>_<window>_<statistic>`` keys, e.g. ``c1_temp_1h_max``, leaving out empty values.
+        """
+        result = OrderedDict()
+        for (channel, quantity), windows in sorted(self.__channels.items()):
+            for name, window in windows.items():
+                for statistic, value in window.summary().items():
+                    if value is not None and window.count > 0:
+                        if isinstance(value, float):
+                            value = round(value, 3)
+                        result['c{}_{}_{}_{}'.format(channel, quantity, name, statistic)] = value
+        return result
@@ -0,0 +1,41 @@
+import threading
+import time
+from sys import stderr
+from typing import Callable
+
+
+class TickScheduler(object):
+    """
+    Runs a task on a fixed grid of ticks. Deadlines are derived from the start time, not from the end of the previous
+    run, so the schedule does not drift. Ticks missed because a run took too long are skipped and logged.
+    """
+
+    def __init__(self, interval: float, align: bool=True, clock: Callable[[], float]=time.monotonic):
+        if interval <= 0:
+            raise ValueError('Interval must be positive, got {}'.format(interval))
+        self.interval = interval
+        self.align = align
+        self.clock = clock
+        self.ticks = 0
+        self.missed = 0
+
+    def first_delay(self) -> float:
+        if not self.align:
+            return 0.0
+        # Put the ticks on wall clock multiples of the interval, e.g. :00 and :30 for 30 seconds
+        return (self.interval - time.time() % self.interval) % self.interval
+
+    def run(self, task: Callable[[], None], stop: threading.Event) -> None:
+        next_tick = self.clock() + self.first_delay()
+        while not stop.is_set():
+            now = self.clock()
+            if now < next_tick:
+                stop.wait(next_tick - now)
+                continue
+            missed = int((now - next_tick) // self.interval)
+            if missed > 0:
+                self.missed += missed
+                print('Missed {} tick(s) of {} s, skipping them'.format(missed, self.interval), file=stderr)
+            next_tick += (missed + 1) * self.interval
+            self.ticks += 1
+            task()
@@ -0,0 +1,141 @@
+import os
+from typing import List, Optional, Sequence
+
+import matplotlib.dates as mdates
+import numpy as np
+import plotly.graph_objects as go
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from plotly.subplots import make_subplots
+
+from rs500archive.downsample import downsample
+from rs500archive.loader import Readings
+from rs500common.files import replace_file
+
+NAMES = ('Kitchen', 'Livingrm', 'Studio', 'Bedrm', 'Bathrm', 'East', 'West')
+COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22',
+          '#17becf')
+DAY = np.timedelta64(1, 'D')
+
+
+class PlotStyle(object):
+    """
+    What all figures share: channel names, colors, the point budget per trace and which channels set the y limits.
+    """
+
+    def __init__(self, names: Sequence[str]=NAMES, points: Optional[int]=500, method: str='lttb',
+                 limit_channels: int=5, dpi: int=300):
+        self.names = list(names)
+        self.points = points
+        self.method = method
+        self.limit_channels = limit_channels
+        self.dpi = dpi
+
+    @property
+    def channels(self) -> int:
+        return len(self.names)
+
+    def color(self, channel: int) -> str:
+        return COLORS[channel % len(COLORS)]
+
+    def trace(self, x: np.ndarray, y: np.ndarray):
+        return downsample(x, y, self.points, self.method, breaks=True)
+
+
+def _limits(values: np.ndarray, margin: float) -> Optional[List[float]]:
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return None
+    return [float(finite.min()) - margin, float(finite.max()) + margin]
+
+
+def _replace(path: str, write) -> int:
+    # Web servers may read the file at any time
+    replace_file(path, write)
+    return os.path.getsize(path)
+
+
+class MatplotlibRenderer(object):
+    """
+    Temperature over humidity as PNG (Agg). The figure, axes, lines and legend are created once; ``render`` only
+    replaces the line data, the axis limits and the legend labels.
+    """
+
+    def __init__(self, style: PlotStyle, path: str, span: Optional[np.timedelta64]=DAY, label_last: bool=True):
+        self.style = style
+        self.path = path
+        self.span = span
+        self.label_last = label_last
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.subplots(nrows=2, ncols=1, sharex=True)
+        self.temperature = []
+        self.humidity = []
+        for s, name in enumerate(style.names):
+            self.temperature.append(self.axes[0].plot([], [], color=style.color(s))[0])
+            self.humidity.append(self.axes[1].plot([], [], color=style.color(s), label=name)[0])
+        self.axes[1].xaxis_date()
+        locator = mdates.AutoDateLocator()
+        self.axes[1].xaxis.set_major_locator(locator)
+        self.axes[1].xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        # Shrink the lower axis by 10 % and put the legend below it
+        box = self.axes[1].get_position()
+        self.axes[1].set_position([box.x0, box.y0 + box.height * 0.1, box.width, box.height * 0.9])
+        self.legend = self.axes[1].legend(loc='upper center', bbox_to_anchor=(0.40, -0.10), fancybox=True,
+                                          shadow=False, ncol=4, fontsize='small')
+        self.axes[0].set_ylabel('Temp')
+        self.axes[1].set_ylabel('RH')
+        for ax in self.axes:
+            ax.grid(visible=True, which='major', axis='y', alpha=0.3)
+
+    def render(self, table: Readings) -> int:
+        x = table.timestamps
+        for s in range(self.style.channels):
+            xt, yt = self.style.trace(x, table.temperature[:, s])
+            xh, yh = self.style.trace(x, table.humidity[:, s])
+            self.temperature[s].set_data(mdates.date2num(xt), yt)
+            self.humidity[s].set_data(mdates.date2num(xh), yh)
+            label = self.style.names[s]
+            if self.label_last and len(table) > 0:
+                label = '{0:.1f} '.format(table.temperature[-1, s]) + label
+            self.legend.get_texts()[s].set_text(label)
+        limited = slice(0, self.style.limit_channels)
+        for ax, values, margin in ((self.axes[0], table.temperature, 0.5), (self.axes[1], table.humidity, 2.0)):
+            limits = _limits(values[:, limited], margin)
+            if limits is not None:
+                ax.set_ylim(limits)
+        if len(table) > 0:
+            last = table.timestamps[-1]
+            first = last - self.span if self.span is not None else table.timestamps[0]
+            if first == last:
+                first = last - np.timedelta64(1, 'h')
+            self.axes[1].set_xlim(mdates.date2num(np.array([first, last])))
+        return _replace(self.path, lambda tmp: self.figure.savefig(tmp, dpi=self.style.dpi, bbox_inches='tight'))
+
+
+class PlotlyRenderer(object):
+    """
+    The interactive HTML version of the 24 hour plot; the subplot layout and the traces are built once.
+    """
+
+    def __init__(self, style: PlotStyle, path: str):
+        self.style = style
+        self.path = path
+        self.figure = make_subplots(rows=2, cols=1, subplot_titles=('Temperature', 'Relative Humidity'),
+                                    shared_xaxes=True, vertical_spacing=0.04)
+        for s, name in enumerate(style.names):
+            line = dict(color=style.color(s), width=2)
+            self.figure.add_trace(go.Scatter(x=[], y=[], name=name, mode='lines', line=line), row=1, col=1)
+            self.figure.add_trace(go.Scatter(x=[], y=[], name=name.lower(), mode='lines', line=line,
+                                             showlegend=False), row=2, col=1)
+        self.figure.update_layout(height=800, width=700, title_text='', hovermode='x unified')
+
+    def render(self, table: Readings) -> int:
+        x = table.timestamps
+        with self.figure.batch_update():
+            for s in range(self.style.channels):
+                xt, yt = self.style.trace(x, table.temperature[:, s])
+                xh, yh = self.style.trace(x, table.humidity[:, s])
+                self.figure.data[2 * s].update(x=xt, y=yt)
+                self.figure.data[2 * s + 1].update(x=xh, y=yh)
+        return _replace(self.path, lambda tmp: self.figure.write_html(tmp, include_plotlyjs='cdn'))
@@ -0,0 +1,232 @@
+import multiprocessing
+import os
+import time
+import traceback
+from datetime import datetime, timedelta
+from sys import stderr
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from rs500archive.loader import Readings
+from rs500archive.query import Archive
+from rs500archive.resample import regrid, resampled_readings
+from rs500archive.rollup import DAY, RollupStore
+from rs500archive.sqlstore import SqliteStore
+from rs500common.metrics import Metrics, get_metrics
+
+from .render import MatplotlibRenderer, PlotStyle, PlotlyRenderer
+
+
+def _serve(connection, factory, args: tuple) -> None:
+    # Worker process: the renderer, i.e. its figure, lives as long as the process
+    renderer = factory(*args)
+    while True:
+        table = connection.recv()
+        if table is None:
+            break
+        started = time.monotonic()
+        try:
+            size = renderer.render(table)
+        except Exception as e:
+            connection.send((False, repr(e), time.monotonic() - started))
+        else:
+            connection.send((True, size, time.monotonic() - started))
+    connection.close()
+
+
+class RenderWorker(object):
+    """
+    Runs ``factory(*args).render`` in a process of its own, or in this process with ``processes=False`` (then the
+    renderer is available as ``renderer``). A worker process that dies or does not answer within ``timeout`` seconds
+    is replaced by a new one and the render is reported as failed.
+    """
+
+    def __init__(self, factory, args: tuple, processes: bool=True, timeout: float=120.0):
+        self.factory = factory
+        self.args = args
+        self.timeout = timeout
+        self.renderer = None
+        self.__process = None
+        self.__connection = None
+        self.__pending = None
+        self.__submitted = 0.0
+        if processes:
+            self.__start()
+        else:
+            self.renderer = factory(*args)
+
+    def __start(self) -> None:
+        self.__connection, child = multiprocessing.Pipe()
+        self.__process = multiprocessing.Process(target=_serve, args=(child, self.factory, self.args), daemon=True)
+        self.__process.start()
+        child.close()
+
+    def __stop(self) -> None:
+        self.__process.terminate()
+        self.__process.join(5)
+        self.__connection.close()
+
+    def restart(self) -> None:
+        self.__stop()
+        self.__start()
+
+    def submit(self, table: Readings) -> None:
+        self.__submitted = time.monotonic()
+        if self.__process is not None:
+            self.__pending = None
+            try:
+                self.__connection.send(table)
+            except OSError:
+                # Broken pipe: the process is gone, try once more with a new one
+                self.restart()
+                try:
+                    self.__connection.send(table)
+                except OSError as e:
+                    self.__pending = (False, repr(e), time.monotonic() - self.__submitted)
+            return
+        try:
+            self.__pending = (True, self.renderer.render(table), time.monotonic() - self.__submitted)
+        except Exception as e:
+            self.__pending = (False, repr(e), time.monotonic() - self.__submitted)
+
+    def result(self) -> Tuple[bool, object, float]:
+        """
+        ``(True, bytes written, seconds)`` or ``(False, error, seconds)`` of the last submitted render.
+        """
+        if self.__process is None or self.__pending is not None:
+            return self.__pending
+        remaining = max(self.timeout - (time.monotonic() - self.__submitted), 0.0)
+        try:
+            if self.__connection.poll(remaining):
+                return self.__connection.recv()
+            error = 'no result after {:.0f} s'.format(self.timeout)
+        except (EOFError, OSError):
+            error = 'worker process exited with code {}'.format(self.__process.exitcode)
+        self.restart()
+        return False, error, time.monotonic() - self.__submitted
+
+    def close(self) -> None:
+        if self.__process is not None:
+            try:
+                self.__connection.send(None)
+            except OSError:
+                pass
+            self.__process.join(5)
+            if self.__process.is_alive():
+                self.__process.terminate()
+                self.__process.join(5)
+            self.__connection.close()
+            self.__process = None
+
+
+class LiveWindow(object):
+    """
+    The last ``span`` of readings, parsed once and then extended with the rows added since the previous update.
+    """
+
+    def __init__(self, source, channels: int, span: timedelta=timedelta(days=1)):
+        self.source = source
+        self.channels = channels
+        self.span = span
+        self.readings = None  # type: Optional[Readings]
+
+    def update(self, now: datetime) -> Readings:
+        channels = range(1, self.channels + 1)
+        if self.readings is None or len(self.readings) == 0:
+            self.readings = self.source.read_range(now - self.span, None, channels)
+        else:
+            after = self.readings.timestamps[-1].astype(datetime) + timedelta(seconds=1)
+            self.readings = Readings.concatenate([self.readings, self.source.read_range(after, None, channels)])
+        self.readings = self.readings[self.readings.timestamps >= np.datetime64(now - self.span, 's')]
+        return self.readings
+
+
+class RenderService(object):
+    """
+    Keeps the figures of ``24hrs.png``, ``24hrs.html`` and ``avg_01days.png`` and the last 24 hours of data alive
+    between ticks. Every tick reads the new rows once, resamples them once and hands the same table to all renderers,
+    which run in parallel worker processes; the averages are redrawn when a new hour begins.
+    """
+
+    def __init__(self, dbdir: str, figdir: str, style: PlotStyle=None, sqlite: str=None, grid: str='1min',
+                 processes: bool=True, metrics: Metrics=None, timeout: float=120.0):
+        self.style = style or PlotStyle()
+        self.grid = grid
+        self.metrics = metrics
+        channels = self.style.channels
+        if sqlite:
+            self.store = SqliteStore(sqlite, channels, read_only=True)
+            self.rollups = None
+        else:
+            self.store = None
+            self.rollups = RollupStore(dbdir, channels=channels)
+        self.window = LiveWindow(self.store or Archive(dbdir), channels)
+        self.workers = {
+            '24hrs.png': RenderWorker(MatplotlibRenderer, (self.style, os.path.join(figdir, '24hrs.png')),
+                                      processes, timeout),
+            '24hrs.html': RenderWorker(PlotlyRenderer, (self.style, os.path.join(figdir, '24hrs.html')), processes,
+                                       timeout),
+            'avg_01days.png': RenderWorker(MatplotlibRenderer, (self.style, os.path.join(figdir, 'avg_01days.png'),
+                                                                None, False), processes, timeout),
+        }
+        self.__last_hour = None
+
+    @property
+    def __metrics(self) -> Metrics:
+        return self.metrics if self.metrics is not None else get_metrics()
+
+    def averages(self, now: datetime) -> Readings:
+        start, end = datetime(now.year, 1, 1), datetime(now.year + 1, 1, 1)
+        channels = range(1, self.style.channels + 1)
+        if self.store is not None:
+            daily = self.store.aggregate(DAY, start, end, channels)
+        else:
+            self.rollups.update()
+            daily = self.rollups.daily(start, end)
+        return regrid(daily, DAY).to_readings('mean')
+
+    def __failed(self, results: dict, names: Tuple[str, ...], error: Exception, started: float) -> None:
+        print('Reading the data of {} failed:'.format(', '.join(names)), file=stderr)
+        traceback.print_exc(file=stderr)
+        for name in names:
+            results[name] = (False, repr(error), time.monotonic() - started)
+            self.__metrics.inc('render.failures')
+
+    def tick(self, now: datetime=None) -> Dict[str, Tuple[bool, object, float]]:
+        """
+        Renders what is due and returns the result per figure; a figure whose data could not be read is reported as
+        failed and tried again on the next tick.
+        """
+        if now is None:
+            now = datetime.now()
+        started = time.monotonic()
+        results = {}  # type: Dict[str, Tuple[bool, object, float]]
+        jobs = {}
+        try:
+            table = resampled_readings(self.window.update(now), self.grid)
+            jobs.update({'24hrs.png': table, '24hrs.html': table})
+        except Exception as e:
+            self.__failed(results, ('24hrs.png', '24hrs.html'), e, started)
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        if hour != self.__last_hour:
+            try:
+                jobs['avg_01days.png'] = self.averages(now)
+                self.__last_hour = hour
+            except Exception as e:
+                self.__failed(results, ('avg_01days.png',), e, started)
+        self.__metrics.observe('render.read', time.monotonic() - started)
+        for name, data in jobs.items():
+            self.workers[name].submit(data)
+        for name in jobs:
+            results[name] = self.workers[name].result()
+            self.__metrics.observe('render.{}'.format(name), results[name][2])
+            if not results[name][0]:
+                self.__metrics.inc('render.failures')
+        return results
+
+    def close(self) -> None:
+        for worker in self.workers.values():
+            worker.close()
+        if self.store is not None:
+            self.store.close()
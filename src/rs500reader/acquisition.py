@@ -0,0 +1,106 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, Generator, List, Optional, Sequence
+
+from rs500common.metrics import Metrics, get_metrics
+
+from .do import Response
+
+
+class Acquisition(object):
+    """
+    Result of ``acquire``: the channels merged over all frames, each stamped with the time it was received.
+    """
+
+    def __init__(self, expected: Sequence[int]):
+        self.expected = list(expected)
+        self.response = Response()
+        self.received_at = {}  # type: Dict[int, datetime]
+        self.attempts = 0
+        self.duration = 0.0
+
+    @property
+    def missing(self) -> List[int]:
+        return [c for c in self.expected if c not in self.received_at]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def merge(self, frame: Response, received_at: datetime) -> None:
+        for channel, values in frame.all.items():
+            if values is not None:
+                self.response.set_channel_data(channel, values)
+                self.received_at[channel] = received_at
+
+
+def count_frame(metrics: Metrics, expected: Sequence[int], frame: Optional[Response]) -> None:
+    """
+    Counts per expected channel the frames it was in (``acquisition.channel.<n>.frames``) and missing from
+    (``acquisition.channel.<n>.missing``); the ratio is the missing rate of the channel.
+    """
+    metrics.inc('acquisition.attempts')
+    if frame is None:
+        metrics.inc('acquisition.failed_attempts')
+        return
+    for channel in expected:
+        if frame.get_channel_data(channel) is None:
+            metrics.inc('acquisition.channel.{}.missing'.format(channel))
+        else:
+            metrics.inc('acquisition.channel.{}.frames'.format(channel))
+
+
+def count_result(metrics: Metrics, result: Acquisition) -> None:
+    metrics.observe('acquisition.duration', result.duration)
+    metrics.inc('acquisition.retries', result.attempts - 1)
+    if not result.complete:
+        metrics.inc('acquisition.incomplete')
+
+
+def acquisition_steps(result: Acquisition, deadline: float, backoff: float, max_backoff: float,
+                      clock: Callable[[], float],
+                      metrics: Metrics) -> Generator[Optional[float], Optional[Response], None]:
+    """
+    The retry loop of ``acquire`` and ``acquire_async`` without the I/O. Start it with ``next``, then ``send`` each
+    frame (``None`` if the query failed): the answer is the number of seconds to wait before the next query, or
+    ``None`` once ``result`` is complete or the deadline passed. ``result`` then also holds the duration.
+    """
+    started = clock()
+    end = started + deadline
+    delay = backoff
+    frame = yield
+    while True:
+        result.attempts += 1
+        count_frame(metrics, result.expected, frame)
+        if frame is not None:
+            result.merge(frame, datetime.now())
+        if result.complete:
+            break
+        remaining = end - clock()
+        if remaining <= 0:
+            break
+        wait = min(delay, remaining)
+        delay = min(delay * 2, max_backoff)
+        frame = yield wait
+    result.duration = clock() - started
+    count_result(metrics, result)
+    yield None
+
+
+def acquire(reader, expected: Sequence[int], deadline: float=30.0, backoff: float=0.1, max_backoff: float=2.0,
+            clock: Callable[[], float]=time.monotonic, sleep: Callable[[float], None]=time.sleep,
+            metrics: Metrics=None) -> Acquisition:
+    """
+    Queries ``reader`` until every channel in ``expected`` has been received at least once, merging partial frames.
+    Between attempts the delay starts with ``backoff`` seconds and doubles up to ``max_backoff``; the acquisition
+    gives up after ``deadline`` seconds and returns whatever has been received so far.
+    """
+    result = Acquisition(expected)
+    steps = acquisition_steps(result, deadline, backoff, max_backoff, clock,
+                              metrics if metrics is not None else get_metrics())
+    next(steps)
+    while True:
+        wait = steps.send(reader.get_data())
+        if wait is None:
+            return result
+        sleep(wait)
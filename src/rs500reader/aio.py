@@ -0,0 +1,56 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Sequence
+
+from rs500common.metrics import Metrics, get_metrics
+
+from .acquisition import Acquisition, acquisition_steps
+from .do import Response
+from .reader import Rs500Reader
+
+
+class AsyncRs500Reader(object):
+    """
+    Awaitable wrapper around ``Rs500Reader`` for use in an asyncio event loop. The HID exchange runs in a dedicated
+    thread (a device handle must not be used from two threads at once), so the loop keeps running while the station
+    answers.
+    """
+
+    def __init__(self, reader: Rs500Reader=None):
+        self.reader = reader if reader is not None else Rs500Reader(persistent=True)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    @property
+    def last_latency(self) -> Optional[float]:
+        return self.reader.last_latency
+
+    async def get_data(self) -> Optional[Response]:
+        return await asyncio.get_event_loop().run_in_executor(self.executor, self.reader.get_data)
+
+    async def close(self) -> None:
+        await asyncio.get_event_loop().run_in_executor(self.executor, self.reader.close)
+        self.executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'AsyncRs500Reader':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+async def acquire_async(reader: AsyncRs500Reader, expected: Sequence[int], deadline: float=30.0,
+                        backoff: float=0.1, max_backoff: float=2.0,
+                        clock: Callable[[], float]=time.monotonic, metrics: Metrics=None) -> Acquisition:
+    """
+    Same as ``acquisition.acquire``, but waits between attempts with ``asyncio.sleep``.
+    """
+    result = Acquisition(expected)
+    steps = acquisition_steps(result, deadline, backoff, max_backoff, clock,
+                              metrics if metrics is not None else get_metrics())
+    next(steps)
+    while True:
+        wait = steps.send(await reader.get_data())
+        if wait is None:
+            return result
+        await asyncio.sleep(wait)
@@ -1,8 +1,21 @@
+import struct
+from array import array
 from typing import Sequence, Optional
 
+CHANNELS = 8
+FRAME_LENGTH = 64
+# Per channel the frame holds the temperature (big endian, signed, tenths of a degree) and the humidity, starting at
+# offset 1; 0x7f 0xff 0xff marks a channel without data
+FRAME_FORMAT = '>' + 'hB' * CHANNELS
+FRAME_OFFSET = 1
+MISSING_TEMPERATURE = 0x7fff
+MISSING_HUMIDITY = 0xff
+
 
 class TempHum(object):
 
+    __slots__ = ('__temperature', '__humidity')
+
     def __init__(self, temp: float, hum: int):
         self.__temperature = temp
         self.__humidity = hum
@@ -23,31 +36,79 @@ class TempHum(object):
     def humidity(self, hum: int):
         self.__humidity = hum
 
+    def __repr__(self) -> str:
+        return 'TempHum({!r}, {!r})'.format(self.__temperature, self.__humidity)
+
     @staticmethod
     def from_protocol(temp: Sequence[int], hum: int) -> 'TempHum':
         return TempHum(float(int.from_bytes(temp, byteorder='big', signed=True)) / 10.0, hum)
 
 
 class Response(object):
+    """
+    Readings of channels 1 to 8, stored as temperature in tenths of a degree (int16), humidity (uint8) and a validity
+    mask rather than one object per channel. ``TempHum`` objects are only created when a channel is read and are then
+    kept, as are the objects passed to ``set_channel_data``: the object returned for a channel is the one stored, so
+    changing it changes the response. Channel numbers beyond 8 are only kept as objects.
+    """
+
+    __slots__ = ('__temperature', '__humidity', '__valid', '__objects')
 
     def __init__(self):
-        self.__data = {
-            1: None,
-            2: None,
-            3: None,
-            4: None,
-            5: None,
-            6: None,
-            7: None,
-            8: None
-        }
+        self.__temperature = array('h', bytes(2 * CHANNELS))
+        self.__humidity = array('B', bytes(CHANNELS))
+        self.__valid = bytearray(CHANNELS)
+        self.__objects = {}
+
+    @staticmethod
+    def from_frame(frame: Sequence[int]) -> 'Response':
+        """
+        Decodes one 64 byte frame of the station with a single ``struct`` call.
+        """
+        values = struct.unpack_from(FRAME_FORMAT, bytes(frame), FRAME_OFFSET)
+        response = Response()
+        for i in range(CHANNELS):
+            temp, hum = values[2 * i], values[2 * i + 1]
+            if temp != MISSING_TEMPERATURE or hum != MISSING_HUMIDITY:
+                response.__temperature[i] = temp
+                response.__humidity[i] = hum
+                response.__valid[i] = 1
+        return response
+
+    @staticmethod
+    def from_arrays(temperature: Sequence[int], humidity: Sequence[int], valid: Sequence[bool]) -> 'Response':
+        """
+        Builds a response from the raw values of channels 1 to 8, e.g. one row of ``frames.decode_frames``.
+        """
+        response = Response()
+        response.__temperature = array('h', [int(t) for t in temperature])
+        response.__humidity = array('B', [int(h) for h in humidity])
+        response.__valid = bytearray(1 if v else 0 for v in valid)
+        return response
 
     def get_channel_data(self, channel: int) -> Optional[TempHum]:
-        return self.__data[channel]
+        if channel in self.__objects:
+            return self.__objects[channel]
+        if not 1 <= channel <= CHANNELS:
+            raise KeyError(channel)
+        i = channel - 1
+        if not self.__valid[i]:
+            return None
+        data = self.__objects[channel] = TempHum(self.__temperature[i] / 10.0, self.__humidity[i])
+        return data
 
     def set_channel_data(self, channel: int, data: TempHum):
-        self.__data[channel] = data
+        if data is None:
+            if 1 <= channel <= CHANNELS:
+                self.__valid[channel - 1] = 0
+            self.__objects.pop(channel, None)
+            return
+        if 1 <= channel <= CHANNELS:
+            self.__valid[channel - 1] = 0
+        self.__objects[channel] = data
 
     @property
     def all(self) -> dict:
-        return self.__data
+        result = {channel: self.get_channel_data(channel) for channel in range(1, CHANNELS + 1)}
+        result.update(self.__objects)
+        return result
@@ -0,0 +1,39 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from .do import CHANNELS, FRAME_LENGTH, FRAME_OFFSET, MISSING_HUMIDITY, MISSING_TEMPERATURE, Response
+
+
+def decode_frames(frames) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decodes an (N, 64) array of frames (or anything ``np.asarray`` turns into one, e.g. a list of byte strings read
+    with ``np.frombuffer``) in one go. Returns temperature in tenths of a degree (int16), humidity (uint8) and the
+    validity mask (bool), each of shape (N, 8).
+    """
+    data = np.asarray(frames, dtype=np.uint8)
+    if data.ndim != 2 or data.shape[1] != FRAME_LENGTH:
+        raise ValueError('Expected frames of shape (N, {}), got {}'.format(FRAME_LENGTH, data.shape))
+    channels = data[:, FRAME_OFFSET:FRAME_OFFSET + 3 * CHANNELS].reshape(-1, CHANNELS, 3)
+    temperature = ((channels[:, :, 0].astype(np.uint16) << 8) | channels[:, :, 1]).view(np.int16)
+    humidity = np.ascontiguousarray(channels[:, :, 2])
+    valid = (temperature != MISSING_TEMPERATURE) | (humidity != MISSING_HUMIDITY)
+    return temperature, humidity, valid
+
+
+CAPTURE_DTYPE = np.dtype([('ts', '<f8'), ('frame', 'u1', (FRAME_LENGTH,))])
+
+
+def read_frames(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads a capture file written by ``transport.RecordingTransport``: the read times (seconds since the epoch) and
+    the frames as an (N, 64) array.
+    """
+    records = np.fromfile(path, dtype=CAPTURE_DTYPE)
+    return records['ts'], records['frame']
+
+
+def iter_responses(frames) -> Iterator[Response]:
+    temperature, humidity, valid = decode_frames(frames)
+    for i in range(temperature.shape[0]):
+        yield Response.from_arrays(temperature[i], humidity[i], valid[i])
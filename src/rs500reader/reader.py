@@ -1,58 +1,133 @@
 from sys import stderr
 from typing import Optional
 
-import hid
 import time
 
-from .do import Response, TempHum
+from rs500common.metrics import Metrics, get_metrics
+
+from .do import FRAME_LENGTH, Response
+from .transport import HidTransport, Transport
+
+# Inquiry 04, returns the temperatures and humidity
+INQUIRY = [0x7b, 0x03, 0x40, 0x7d] + [0] * 60
 
 
 class Rs500Reader(object):
+    """
+    With ``persistent=True`` the HID device stays open across ``get_data()`` calls and is reopened after I/O errors.
+    The duration of the last query is available as ``last_latency`` (seconds). ``transport`` replaces the HID device,
+    e.g. by a ``SimulatedTransport`` or a ``RecordingTransport``.
 
-    def __init__(self, vendor_id=0x0483, product_id=0x5750):
+    Every stage of a query is timed (``reader.open``, ``reader.drain``, ``reader.write``, ``reader.read``,
+    ``reader.query``) and errors are counted (``reader.io_errors``, ``reader.reconnects``, ``reader.invalid_length``,
+    ``reader.stale_reports``) in ``metrics``, by default the registry of ``rs500common.metrics``.
+    """
+
+    def __init__(self, vendor_id=0x0483, product_id=0x5750, persistent: bool=False, timeout: float=2.0,
+                 transport: Transport=None, metrics: Metrics=None):
         self.vendor = vendor_id
         self.product = product_id
+        self.transport = transport if transport is not None else HidTransport(vendor_id, product_id)
+        self.persistent = persistent
+        self.timeout = timeout
+        self.last_latency = None  # type: Optional[float]
+        self.metrics = metrics
+        self.__device = None
+
+    def __enter__(self) -> 'Rs500Reader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self.__device is not None
+
+    def close(self) -> None:
+        if self.__device is not None:
+            try:
+                self.__device.close()
+            except IOError:
+                pass
+            self.__device = None
+
+    @property
+    def __metrics(self) -> Metrics:
+        return self.metrics if self.metrics is not None else get_metrics()
+
+    def __open(self):
+        if self.__device is None:
+            with self.__metrics.timer('reader.open'):
+                self.transport.open()
+            self.__device = self.transport
+        return self.__device
+
+    def __drain(self, device) -> None:
+        # Discard stale reports, e.g. a late answer to a previous, timed out inquiry
+        with self.__metrics.timer('reader.drain'):
+            for _ in range(16):
+                if not device.read(FRAME_LENGTH):
+                    break
+                self.__metrics.inc('reader.stale_reports')
+
+    def __read_frame(self, device, deadline: float) -> list:
+        data = []
+        while len(data) < FRAME_LENGTH:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            d = device.read(FRAME_LENGTH, remaining_ms)
+            if not d:
+                break
+            data.extend(d)
+        return data
+
+    def __exchange(self, deadline: float) -> list:
+        device = self.__open()
+        if self.persistent:
+            self.__drain(device)
+        with self.__metrics.timer('reader.write'):
+            device.write(INQUIRY)
+        with self.__metrics.timer('reader.read'):
+            return self.__read_frame(device, deadline)
 
     def __query(self) -> list:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        reused = self.__device is not None
         try:
-            rs500_hid = hid.device()
-            rs500_hid.open(self.vendor, self.product)
-            rs500_hid.set_nonblocking(1)
-            # Inquiry 04, returns the temperatures and humidity
-            rs500_hid.write([0x7b, 0x03, 0x40, 0x7d] + [0] * 60)
-            time.sleep(0.75)
-            data = []
-            while True:
-                d = rs500_hid.read(64)
-                if d:
-                    data.extend(d)
-                else:
-                    break
-            rs500_hid.close()
-            return data
+            try:
+                return self.__exchange(deadline)
+            except IOError:
+                self.close()
+                if not reused:
+                    raise
+            # The cached handle went stale (station unplugged and plugged in again): reconnect once
+            self.__metrics.inc('reader.reconnects')
+            return self.__exchange(deadline)
         except IOError as e:
+            self.__metrics.inc('reader.io_errors')
+            self.close()
             print(
                 'Read error reading from HID device: "{}"; either the hardware is not present or '
-                'defective, or there is a permissions problem.'.format(s),
+                'defective, or there is a permissions problem.'.format(e),
                 file=stderr
             )
             raise
+        finally:
+            if not self.persistent:
+                self.close()
+            self.last_latency = time.monotonic() - started
+            self.__metrics.observe('reader.query', self.last_latency)
 
     def get_data(self) -> Optional[Response]:
         try:
             data = self.__query()
         except IOError:
             return None
-        if len(data) != 64:
+        if len(data) != FRAME_LENGTH:
             print('Invalid length: {}'.format(len(data)), file=stderr)
+            self.__metrics.inc('reader.invalid_length')
             return None
-        response = Response()
-        channel = 0
-        for i in range(1, 24, 3):
-            channel += 1
-            t1 = data[i]
-            t2 = data[i+1]
-            hu = data[i+2]
-            if not (t1 == 0x7f and t2 == 0xff and hu == 0xff):
-                response.set_channel_data(channel, TempHum.from_protocol([t1, t2], hu))
-        return response
+        return Response.from_frame(data)
@@ -0,0 +1,73 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sys import stderr
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from .reader import Rs500Reader
+
+T = TypeVar('T')
+
+
+class StationInfo(object):
+
+    def __init__(self, path: bytes, serial: Optional[str], vendor_id: int, product_id: int):
+        self.path = path
+        self.serial = serial
+        self.vendor_id = vendor_id
+        self.product_id = product_id
+
+    def __repr__(self) -> str:
+        return 'StationInfo(path={!r}, serial={!r})'.format(self.path, self.serial)
+
+
+def discover_stations(vendor_id: int=0x0483, product_id: int=0x5750) -> List[StationInfo]:
+    """
+    Lists the attached stations, sorted by path so the order is stable across calls.
+    """
+    import hid
+    stations = [StationInfo(d['path'], d.get('serial_number') or None, d['vendor_id'], d['product_id'])
+                for d in hid.enumerate(vendor_id, product_id)]
+    return sorted(stations, key=lambda s: s.path)
+
+
+class StationPool(object):
+    """
+    Runs a task for every station at the same time, one thread per station, so the wait for the answers of several
+    stations overlaps instead of adding up.
+    """
+
+    def __init__(self, readers: Dict[str, Rs500Reader]):
+        self.readers = dict(readers)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.readers)))
+
+    def as_completed(self, task: Callable[[str, Rs500Reader], T]) -> Iterator[Tuple[str, Optional[T]]]:
+        """
+        Yields ``(name, task(name, reader))`` per station as soon as its task is done, so a slow station does not delay
+        the others; a station whose task raised yields ``None``.
+        """
+        futures = {self.executor.submit(task, name, reader): name for name, reader in self.readers.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                yield name, future.result()
+            except Exception:
+                print('Station "{}" failed:'.format(name), file=stderr)
+                traceback.print_exc(file=stderr)
+                yield name, None
+
+    def map(self, task: Callable[[str, Rs500Reader], T]) -> Dict[str, Optional[T]]:
+        """
+        Returns the result of ``task(name, reader)`` per station once all of them are done.
+        """
+        return dict(self.as_completed(task))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        for reader in self.readers.values():
+            reader.close()
+
+    def __enter__(self) -> 'StationPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
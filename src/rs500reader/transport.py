@@ -0,0 +1,222 @@
+import math
+import random
+import struct
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .do import CHANNELS, FRAME_LENGTH, FRAME_OFFSET, MISSING_HUMIDITY, MISSING_TEMPERATURE
+
+# Capture files hold one record per frame: the time it was read (seconds since the epoch, little endian double)
+# followed by the 64 bytes of the frame
+CAPTURE_RECORD = struct.Struct('<d{}s'.format(FRAME_LENGTH))
+
+
+class Transport(ABC):
+    """
+    Byte level connection to a station, modelled after the subset of ``hid.device`` used by ``Rs500Reader``.
+    ``open`` may be called again after ``close``; I/O errors are raised as ``IOError``.
+    """
+
+    @abstractmethod
+    def open(self) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, data: Sequence[int]) -> int:
+        pass
+
+    @abstractmethod
+    def read(self, max_length: int, timeout_ms: int=0) -> List[int]:
+        """
+        Returns up to ``max_length`` bytes, waiting at most ``timeout_ms`` milliseconds; an empty list if nothing came.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class HidTransport(Transport):
+    """
+    The station on USB. Without ``serial`` or ``path`` the first device with the vendor and product id is used.
+    """
+
+    def __init__(self, vendor_id: int=0x0483, product_id: int=0x5750, serial: str=None, path: bytes=None):
+        self.vendor = vendor_id
+        self.product = product_id
+        self.serial = serial
+        self.path = path
+        self.__device = None
+
+    def open(self) -> None:
+        # Imported here so simulated and replayed stations work without the hidapi library
+        import hid
+        device = hid.device()
+        if self.path is not None:
+            device.open_path(self.path)
+        elif self.serial is not None:
+            device.open(self.vendor, self.product, self.serial)
+        else:
+            device.open(self.vendor, self.product)
+        device.set_nonblocking(1)
+        self.__device = device
+
+    def write(self, data: Sequence[int]) -> int:
+        return self.__device.write(data)
+
+    def read(self, max_length: int, timeout_ms: int=0) -> List[int]:
+        if timeout_ms > 0:
+            return self.__device.read(max_length, timeout_ms)
+        return self.__device.read(max_length)
+
+    def close(self) -> None:
+        device, self.__device = self.__device, None
+        if device is not None:
+            device.close()
+
+
+class RecordingTransport(Transport):
+    """
+    Passes everything through to ``inner`` and appends each complete answer frame, with the time it was read, to the
+    capture file at ``path``.
+    """
+
+    def __init__(self, inner: Transport, path: str, clock: Callable[[], float]=time.time):
+        self.inner = inner
+        self.path = path
+        self.clock = clock
+        self.__buffer = []  # type: List[int]
+        self.__fp = None
+
+    def open(self) -> None:
+        self.inner.open()
+        if self.__fp is None:
+            self.__fp = open(self.path, 'ab')
+
+    def write(self, data: Sequence[int]) -> int:
+        # Reads before an inquiry are stale reports being drained; only the answer to the inquiry is recorded
+        self.__buffer = []
+        return self.inner.write(data)
+
+    def read(self, max_length: int, timeout_ms: int=0) -> List[int]:
+        data = self.inner.read(max_length, timeout_ms)
+        self.__buffer.extend(data)
+        if len(self.__buffer) >= FRAME_LENGTH:
+            frame, self.__buffer = self.__buffer[:FRAME_LENGTH], self.__buffer[FRAME_LENGTH:]
+            self.__fp.write(CAPTURE_RECORD.pack(self.clock(), bytes(frame)))
+            self.__fp.flush()
+        return data
+
+    def close(self) -> None:
+        self.inner.close()
+        if self.__fp is not None:
+            self.__fp.close()
+            self.__fp = None
+
+
+def read_capture(path: str) -> List[bytes]:
+    """
+    Returns the frames of a capture file written by ``RecordingTransport``, oldest first.
+    """
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    count = len(data) // CAPTURE_RECORD.size
+    return [CAPTURE_RECORD.unpack_from(data, i * CAPTURE_RECORD.size)[1] for i in range(count)]
+
+
+def synthetic_frame(now: float, rng: random.Random, channels: int=CHANNELS) -> bytes:
+    """
+    A plausible answer: per channel a daily temperature swing around 20 degrees and humidity around 50 percent,
+    with some noise.
+    """
+    frame = bytearray(FRAME_LENGTH)
+    frame[0] = 0x7b
+    phase = 2 * math.pi * (now % 86400) / 86400
+    for i in range(CHANNELS):
+        offset = FRAME_OFFSET + 3 * i
+        if i < channels:
+            temp = int(round(10 * (20 + 2 * i + 3 * math.sin(phase + i) + rng.gauss(0, 0.1))))
+            hum = max(0, min(100, int(round(50 + 10 * math.cos(phase + i) + rng.gauss(0, 1)))))
+            struct.pack_into('>hB', frame, offset, temp, hum)
+        else:
+            struct.pack_into('>hB', frame, offset, MISSING_TEMPERATURE, MISSING_HUMIDITY)
+    return bytes(frame)
+
+
+class SimulatedTransport(Transport):
+    """
+    Stands in for the station: answers every inquiry with the next of ``frames`` (replayed in a loop) or, without
+    frames, with a synthetic one. Each answer arrives ``latency`` seconds after the inquiry, so a read timeout shorter
+    than that leaves a late answer for the next query to drain, as on the real device. ``dropped_channels`` are
+    always reported missing, other channels are dropped with probability ``drop_rate``; opening and writing fail with
+    probability ``error_rate``.
+    """
+
+    def __init__(self, frames: Sequence[bytes]=None, latency: float=0.0, dropped_channels: Sequence[int]=(),
+                 drop_rate: float=0.0, error_rate: float=0.0, channels: int=CHANNELS, seed: Optional[int]=None,
+                 clock: Callable[[], float]=time.monotonic, sleep: Callable[[float], None]=time.sleep):
+        self.frames = [bytes(f) for f in frames] if frames else []
+        self.latency = latency
+        self.dropped_channels = set(dropped_channels)
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.channels = channels
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = random.Random(seed)
+        self.inquiries = 0
+        self.is_open = False
+        self.__pending = []  # type: List[Tuple[float, List[int]]]
+
+    @staticmethod
+    def from_capture(path: str, **kwargs) -> 'SimulatedTransport':
+        return SimulatedTransport(read_capture(path), **kwargs)
+
+    def __fail(self, what: str) -> None:
+        if self.error_rate > 0 and self.rng.random() < self.error_rate:
+            raise IOError('simulated {} error'.format(what))
+
+    def open(self) -> None:
+        self.__fail('open')
+        self.is_open = True
+
+    def __next_frame(self) -> bytearray:
+        if self.frames:
+            frame = bytearray(self.frames[self.inquiries % len(self.frames)])
+        else:
+            frame = bytearray(synthetic_frame(time.time(), self.rng, self.channels))
+        for i in range(CHANNELS):
+            if i + 1 in self.dropped_channels or (self.drop_rate > 0 and self.rng.random() < self.drop_rate):
+                struct.pack_into('>hB', frame, FRAME_OFFSET + 3 * i, MISSING_TEMPERATURE, MISSING_HUMIDITY)
+        return frame
+
+    def write(self, data: Sequence[int]) -> int:
+        if not self.is_open:
+            raise IOError('device not open')
+        self.__fail('write')
+        self.__pending.append((self.clock() + self.latency, list(self.__next_frame())))
+        self.inquiries += 1
+        return len(data)
+
+    def read(self, max_length: int, timeout_ms: int=0) -> List[int]:
+        if not self.is_open:
+            raise IOError('device not open')
+        if not self.__pending:
+            if timeout_ms > 0:
+                self.sleep(timeout_ms / 1000)
+            return []
+        ready_at, frame = self.__pending[0]
+        wait = ready_at - self.clock()
+        if wait > 0:
+            if wait > timeout_ms / 1000:
+                if timeout_ms > 0:
+                    self.sleep(timeout_ms / 1000)
+                return []
+            self.sleep(wait)
+        self.__pending.pop(0)
+        return frame[:max_length]
+
+    def close(self) -> None:
+        self.is_open = False
+        self.__pending = []
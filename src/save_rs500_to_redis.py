@@ -2,21 +2,19 @@
 
 from os.path import dirname
 
-from rs5002redis.saver import save_data_to_redis
+from rs5002redis.history import response_to_samples
+from rs5002redis.saver import response_to_dict, save_data_to_redis
 from rs500common.configuration import discover_config_file_by_name
 from rs500reader.reader import Rs500Reader
 
 
-def fetch_and_save():
-    reader = Rs500Reader()
+def fetch_and_save(reader: Rs500Reader=None):
+    if reader is None:
+        reader = Rs500Reader()
     data = reader.get_data()
     if data is not None:
-        to_save = {}
-        for channel, values in data.all.items():
-            if values is not None:
-                to_save['c{}_temp'.format(channel)] = values.temperature
-                to_save['c{}_humi'.format(channel)] = values.humidity
-        save_data_to_redis(to_save, discover_config_file_by_name('rs5002redis.ini', dirname(__file__)))
+        save_data_to_redis(response_to_dict(data), discover_config_file_by_name('rs5002redis.ini', dirname(__file__)),
+                           samples=response_to_samples(data))
 
 
 if __name__ == '__main__':
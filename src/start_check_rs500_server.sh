@@ -0,0 +1,6 @@
+#!/bin/bash
+
+cd "$(dirname "$0")"
+
+. ../venv/bin/activate
+exec ./check_rs500_server.py
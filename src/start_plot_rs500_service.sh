@@ -0,0 +1,6 @@
+#!/bin/bash
+
+cd "$(dirname "$0")"
+
+. ../venv/bin/activate
+exec ./plot_rs500_service.py /var/services/homes/jacopo/repos/raumklima/database /var/services/web/web_images/
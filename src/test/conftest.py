@@ -0,0 +1,31 @@
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from rs5002csv.sink import archive_path, format_archive_line
+from rs500reader.do import Response
+
+
+def write_archive(dbdir: str, start: datetime, rows: int, values: Callable[[int], Sequence[Tuple[float, float]]],
+                  step: timedelta=timedelta(minutes=1)) -> str:
+    """
+    Appends ``rows`` lines the way the CSV sink writes them: line ``i`` holds the ``(temperature, humidity)`` pairs
+    ``values(i)`` at ``start + i * step`` and goes to the week file of its timestamp. Returns the week file of
+    ``start``.
+    """
+    lines = {}  # type: Dict[str, List[str]]
+    for i in range(rows):
+        ts = start + i * step
+        lines.setdefault(archive_path(dbdir, ts), []).append(format_archive_line(ts, values(i)))
+    for path, week in lines.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as fp:
+            fp.writelines(week)
+    return archive_path(dbdir, start)
+
+
+def channel_values(response: Response) -> Dict[int, Optional[Tuple[float, int]]]:
+    """
+    The ``(temperature, humidity)`` of every channel of ``response``, ``None`` for channels without data.
+    """
+    return {channel: None if th is None else (th.temperature, th.humidity) for channel, th in response.all.items()}
@@ -0,0 +1,66 @@
+from rs500reader.acquisition import acquire
+from rs500reader.do import Response, TempHum
+
+
+class ScriptedReader(object):
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.calls = 0
+
+    def get_data(self):
+        self.calls += 1
+        if not self.frames:
+            return None
+        return self.frames.pop(0)
+
+
+class FakeTime(object):
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _frame(**channels) -> Response:
+    r = Response()
+    for name, (temp, hum) in channels.items():
+        r.set_channel_data(int(name[1:]), TempHum(temp, hum))
+    return r
+
+
+def test_partial_frames_are_merged():
+    reader = ScriptedReader([_frame(c1=(20.0, 50)), _frame(c2=(21.0, 51)), _frame(c1=(20.5, 52), c3=(22.0, 53))])
+    t = FakeTime()
+    acq = acquire(reader, [1, 2, 3], clock=t.clock, sleep=t.sleep)
+    assert acq.complete
+    assert 3 == acq.attempts
+    assert 20.5 == acq.response.get_channel_data(1).temperature
+    assert 21.0 == acq.response.get_channel_data(2).temperature
+    assert {1, 2, 3} == set(acq.received_at.keys())
+    assert [0.1, 0.2] == t.sleeps
+
+
+def test_stops_at_first_complete_frame():
+    reader = ScriptedReader([_frame(c1=(20.0, 50), c2=(21.0, 51))])
+    acq = acquire(reader, [1, 2])
+    assert acq.complete
+    assert 1 == reader.calls
+
+
+def test_deadline_and_backoff():
+    reader = ScriptedReader([])
+    t = FakeTime()
+    acq = acquire(reader, [1], deadline=5.0, backoff=1.0, max_backoff=2.0, clock=t.clock, sleep=t.sleep)
+    assert not acq.complete
+    assert [1] == acq.missing
+    assert [1.0, 2.0, 2.0] == t.sleeps
+    assert 4 == acq.attempts
+    assert 5.0 == acq.duration
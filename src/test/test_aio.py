@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+from rs5002csv.sink import Calibration, WeeklyCsvSink
+from rs5002redis.aio import AsyncRedisSaver
+from rs500common.aio import AsyncSink, AsyncSinkPipeline
+from rs500common.pipeline import Sink, SinkPipeline
+from rs500reader.aio import AsyncRs500Reader, acquire_async
+from rs500reader.reader import Rs500Reader
+from rs500reader.transport import SimulatedTransport
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _count_ticks(done: asyncio.Event) -> int:
+    ticks = 0
+    while not done.is_set():
+        await asyncio.sleep(0.01)
+        ticks += 1
+    return ticks
+
+
+def test_get_data_does_not_block_the_loop():
+    async def main():
+        reader = AsyncRs500Reader(Rs500Reader(persistent=True, transport=SimulatedTransport(latency=0.2)))
+        done = asyncio.Event()
+        ticker = asyncio.ensure_future(_count_ticks(done))
+        data = await reader.get_data()
+        done.set()
+        await reader.close()
+        return data, await ticker
+
+    data, ticks = _run(main())
+    assert data.get_channel_data(1) is not None
+    assert ticks >= 5
+
+
+def test_acquire_async_merges_and_gives_up():
+    async def main():
+        transport = SimulatedTransport(dropped_channels=[3], channels=4)
+        async with AsyncRs500Reader(Rs500Reader(transport=transport)) as reader:
+            return await acquire_async(reader, [1, 2, 3], deadline=0.1, backoff=0.01)
+
+    acq = _run(main())
+    assert [3] == acq.missing
+    assert acq.attempts > 1
+    assert acq.response.get_channel_data(2) is not None
+
+
+class SlowSink(Sink):
+
+    name = 'slow'
+
+    def __init__(self):
+        self.threads = set()
+
+    def write(self, timestamp, response):
+        self.threads.add(threading.current_thread())
+        time.sleep(0.1)
+
+
+def test_async_pipeline_and_sinks(tmpdir):
+    slow = SlowSink()
+    csv = WeeklyCsvSink(str(tmpdir), Calibration([0.0] * 8))
+
+    async def main():
+        async with AsyncRs500Reader(Rs500Reader(transport=SimulatedTransport(seed=1))) as reader:
+            response = await reader.get_data()
+        pipeline = AsyncSinkPipeline(SinkPipeline([slow]))
+        done = asyncio.Event()
+        ticker = asyncio.ensure_future(_count_ticks(done))
+        results = await pipeline.publish(response, datetime(2021, 1, 4, 12, 0))
+        sink = AsyncSink(csv)
+        await sink.write(datetime(2021, 1, 4, 12, 0), response)
+        await sink.close()
+        done.set()
+        await pipeline.close()
+        return results, await ticker
+
+    results, ticks = _run(main())
+    assert {'slow': True} == results
+    assert threading.main_thread() not in slow.threads
+    assert ticks >= 3
+    assert 1 == len(tmpdir.join('2021', 'w01.csv').readlines())
+
+
+def test_async_redis_saver():
+    class Saver(object):
+
+        def __init__(self):
+            self.saved = []
+
+        def save(self, data, timestamp=None, samples=None):
+            self.saved.append((data, threading.current_thread()))
+
+        def close(self):
+            pass
+
+    saver = Saver()
+
+    async def main():
+        wrapper = AsyncRedisSaver(saver)
+        await wrapper.save({'c1_temp': 20.5})
+        await wrapper.close()
+
+    _run(main())
+    assert {'c1_temp': 20.5} == saver.saved[0][0]
+    assert threading.main_thread() is not saver.saved[0][1]
@@ -0,0 +1,60 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from rs500archive.binary import BinaryArchiveWriter, convert_csv, load_binary, open_records, read_header
+from rs500archive.sink import BinaryArchiveSink
+from rs5002csv.sink import Calibration
+from rs500reader.do import Response, TempHum
+
+CSV = ('2020-01-02 03:04:05, 21.4 | 52.0, -1.8 | 38.0\n'
+       '2020-01-02 03:05:05, 21.5 | 53.0,  nan | nan\n'
+       '2020-01-02 03:06:05, 21.6 | 54.0, 0.1 | 39.0\n')
+
+
+def test_convert_and_load(tmpdir):
+    csv = tmpdir.join('w01.csv')
+    csv.write(CSV)
+    bin_path, readings = convert_csv(str(csv))
+    assert str(tmpdir.join('w01.rsb')) == bin_path
+    assert 2 == read_header(bin_path)
+    loaded = load_binary(bin_path)
+    assert (readings.timestamps == loaded.timestamps).all()
+    assert np.allclose(readings.temperature, loaded.temperature, equal_nan=True)
+    assert np.allclose(readings.humidity, loaded.humidity, equal_nan=True)
+    assert np.isnan(loaded.humidity[1, 1])
+
+
+def test_range_is_a_view(tmpdir):
+    csv = tmpdir.join('w01.csv')
+    csv.write(CSV)
+    bin_path, _ = convert_csv(str(csv))
+    records = open_records(bin_path)
+    assert isinstance(records, np.memmap)
+    part = load_binary(bin_path, datetime(2020, 1, 2, 3, 5), datetime(2020, 1, 2, 3, 6, 5))
+    assert 1 == len(part)
+    assert np.isclose(21.5, part.temperature[0, 0])
+
+
+def test_writer_appends_and_checks_channels(tmpdir):
+    path = str(tmpdir.join('w01.rsb'))
+    with BinaryArchiveWriter(path, 2) as writer:
+        writer.append_row(datetime(2020, 1, 2, 3, 4, 5), [(21.4, 52.0), (float('nan'), float('nan'))])
+    with BinaryArchiveWriter(path, 2) as writer:
+        writer.append_row(datetime(2020, 1, 2, 3, 5, 5), [(21.5, 52.0), (1.0, 40.0)])
+    assert 2 == len(load_binary(path))
+    with pytest.raises(ValueError):
+        BinaryArchiveWriter(path, 3)
+
+
+def test_sink(tmpdir):
+    r = Response()
+    r.set_channel_data(1, TempHum(21.4, 52))
+    sink = BinaryArchiveSink(str(tmpdir), Calibration([0.5, 0.0]))
+    sink.write(datetime(2020, 1, 2, 3, 4, 5), r)
+    sink.close()
+    loaded = load_binary(os.path.join(str(tmpdir), '2020', 'w01.rsb'))
+    assert np.isclose(21.9, loaded.temperature[0, 0])
+    assert np.isnan(loaded.temperature[0, 1])
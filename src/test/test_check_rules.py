@@ -0,0 +1,64 @@
+import configparser
+
+from rs500check.rules import EXIT_CODE_CRIT, EXIT_CODE_OK, EXIT_CODE_WARN, Rule, check_all, fetch_values, \
+    rules_from_config
+
+
+class FakeRedis(object):
+
+    def __init__(self, values):
+        self.values = values
+        self.calls = 0
+
+    def mget(self, keys):
+        self.calls += 1
+        return [self.values.get(k) for k in keys]
+
+
+def test_fetch_values_uses_one_mget():
+    redis = FakeRedis({'rs500_c1_temp': b'21.5', 'rs500_c1_humi': b'40', 'rs500_c2_temp': b'-3.0'})
+    values = fetch_values(redis, 'rs500_', [1, 2, 3])
+    assert 1 == redis.calls
+    assert (21.5, 40) == values[1]
+    assert (-3.0, 'unknown') == values[2]
+    assert values[3] is None
+
+
+def test_rules_from_config():
+    conf = configparser.ConfigParser()
+    conf.read_string('[redis]\nhost = localhost\n[channel1]\nmax_temp = 30\nmin_warn_hum = 30\n[channel 4]\n')
+    rules = rules_from_config(conf)
+    assert [1, 4] == sorted(rules)
+    assert 30.0 == rules[1].max_temp
+    assert 30 == rules[1].min_warn_hum
+    assert rules[1].min_temp is None
+    assert not rules[4].checks_temperature()
+    merged = rules[4].with_defaults(Rule(0, max_hum=70))
+    assert 4 == merged.channel
+    assert 70 == merged.max_hum
+
+
+def test_check_all_reports_worst_state_and_perfdata():
+    rules = [Rule(1, max_temp=30.0, max_warn_temp=25.0), Rule(2, min_hum=20, min_warn_hum=30), Rule(3)]
+    code, output = check_all(rules, {1: (26.0, 40), 2: (20.0, 50), 3: (10.0, 'unknown')})
+    assert EXIT_CODE_WARN == code
+    summary, perfdata = output.split(' | ')
+    assert 'warn: channel 1: Temperature in warning range' == summary
+    assert "'c1_temp'=26.0;~:25.0;~:30.0" in perfdata
+    assert "'c2_humi'=50%;30:;20:;0;100" in perfdata
+    assert "'c3_temp'=10.0;;" in perfdata
+    assert 'c3_humi' not in perfdata
+
+
+def test_check_all_unknown_values_are_critical():
+    rules = [Rule(1, max_hum=70), Rule(2)]
+    code, output = check_all(rules, {1: (20.0, 'unknown'), 2: None})
+    assert EXIT_CODE_CRIT == code
+    assert output.startswith('CRITICAL: channel 1: Should check humidity, but humidity is unknown, '
+                             'channel 2: Unknown Channel')
+
+
+def test_check_all_ok():
+    code, output = check_all([Rule(1, max_temp=30.0)], {1: (20.0, 40)})
+    assert EXIT_CODE_OK == code
+    assert output.startswith('ok: 1 channels fine | ')
@@ -0,0 +1,104 @@
+import configparser
+import socket
+import threading
+
+import pytest
+from redis import ConnectionError
+
+import check_rs500_client
+from rs500check.handler import CheckContext
+from rs500check.server import CheckServer
+
+
+class FakeRedis(object):
+
+    def __init__(self, values):
+        self.values = values
+        self.down = False
+
+    def mget(self, keys):
+        if self.down:
+            raise ConnectionError('connection refused')
+        return [self.values.get(k) for k in keys]
+
+
+@pytest.fixture
+def server(tmpdir, monkeypatch):
+    conf = configparser.ConfigParser()
+    conf.read_string('[redis]\nprefix = rs500_\n[channel1]\nmax_temp = 25\n[channel2]\n')
+    redis = FakeRedis({'rs500_c1_temp': b'21.5', 'rs500_c1_humi': b'40', 'rs500_c2_temp': b'-3.0'})
+    path = str(tmpdir.join('check.sock'))
+    server = CheckServer(path, CheckContext(conf, redis))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    monkeypatch.setattr(check_rs500_client, 'SOCKET_PATH', path)
+    yield redis
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_single_channel(server, capsys):
+    assert 2 == check_rs500_client.main(['-c', '1', '--max-temp', '20'])
+    assert 'CRITICAL: Temperature in critical range; channel = 1 -> temp = 21.5, humi = 40\n' == capsys.readouterr().out
+    assert 0 == check_rs500_client.main(['-c', '2'])
+    assert 'ok: everything fine; channel = 2 -> temp = -3.0, humi = unknown\n' == capsys.readouterr().out
+    assert 2 == check_rs500_client.main(['-c', '2', '--min-hum', '20'])
+    assert capsys.readouterr().out.startswith('CRITICAL: Should check humidity, but humidity is unknown')
+    assert 2 == check_rs500_client.main(['-c', '3'])
+    assert 'CRITICAL: Unknown Channel [3]\n' == capsys.readouterr().out
+
+
+def test_batch(server, capsys):
+    assert 0 == check_rs500_client.main(['--batch'])
+    assert capsys.readouterr().out.startswith('ok: 2 channels fine | ')
+
+
+def test_errors(server, capsys):
+    assert 3 == check_rs500_client.main(['--channel', 'one'])
+    assert capsys.readouterr().out.startswith('unknown: check_rs500: argument -c/--channel')
+    server.down = True
+    assert 3 == check_rs500_client.main(['-c', '1'])
+    assert 'unknown: Redis error\n' == capsys.readouterr().out
+
+
+def test_server_not_running(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(check_rs500_client, 'SOCKET_PATH', str(tmpdir.join('missing.sock')))
+    assert 3 == check_rs500_client.main(['-c', '1'])
+    assert capsys.readouterr().out.startswith('unknown: check server not reachable')
+
+
+def test_unexpected_errors(server, capsys):
+    server.mget = lambda keys: 1 / 0
+    assert 3 == check_rs500_client.main(['-c', '1'])
+    assert 'unknown: ZeroDivisionError: division by zero\n' == capsys.readouterr().out
+
+
+def test_invalid_reply(tmpdir, monkeypatch, capsys):
+    path = str(tmpdir.join('garbled.sock'))
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+
+    def reply():
+        connection, _ = listener.accept()
+        connection.recv(4096)
+        connection.sendall(b'\xff\xfe not a reply')
+        connection.close()
+
+    thread = threading.Thread(target=reply)
+    thread.start()
+    monkeypatch.setattr(check_rs500_client, 'SOCKET_PATH', path)
+    assert 3 == check_rs500_client.main(['-c', '1'])
+    thread.join()
+    listener.close()
+    assert capsys.readouterr().out.startswith('unknown: invalid reply from check server')
+
+
+def test_socket_from_configuration(tmpdir, monkeypatch):
+    tmpdir.join('check_rs500.ini').write('[server]\nsocket = /run/rs500/check.sock\n')
+    monkeypatch.setattr(check_rs500_client, '__file__', str(tmpdir.join('check_rs500_client.py')))
+    monkeypatch.setenv('RS500_CHECK_SOCKET', '')
+    assert '/run/rs500/check.sock' == check_rs500_client.socket_path()
+    monkeypatch.setenv('RS500_CHECK_SOCKET', '/tmp/other.sock')
+    assert '/tmp/other.sock' == check_rs500_client.socket_path()
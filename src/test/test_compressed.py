@@ -0,0 +1,114 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from compact_rs500_archive import compact_all
+from rs500archive.compressed import CompressedFile, compress_csv, compressed_path
+from rs500archive.loader import iter_chunks, load, load_csv
+from rs500archive.query import Archive
+from rs500archive.rollup import RollupStore
+from rs5002csv.sink import Calibration, WeeklyCsvSink, archive_path
+from rs500reader.do import Response, TempHum
+
+from .conftest import write_archive
+
+
+def _write_week(dbdir: str, start: datetime, rows: int) -> str:
+    return write_archive(dbdir, start, rows, lambda i: [(20 + i % 10 / 10, 50.0), (np.nan, np.nan)])
+
+
+def _touch(path: str, when: datetime) -> None:
+    os.utime(path, (time.mktime(when.timetuple()),) * 2)
+
+
+def test_round_trip(tmpdir):
+    path = _write_week(str(tmpdir), datetime(2021, 1, 4), 3000)
+    with open(path, 'a') as fp:
+        fp.write('garbage\n')
+    csz = compress_csv(path, block_size=4096)
+    compressed = CompressedFile(csz)
+    assert len(compressed) > 10
+    with open(path, 'rb') as fp:
+        assert fp.read() == compressed.read()
+    assert os.path.getsize(csz) < os.path.getsize(path) / 3
+    assert ('2021-01-04T00:00:00', '2021-01-06T01:59:00') == compressed.first_last()
+    plain, packed = load_csv(path), load_csv(csz)
+    assert (plain.timestamps == packed.timestamps).all()
+    np.testing.assert_array_equal(plain.temperature, packed.temperature)
+    assert 1 == packed.skipped
+    assert 3000 == sum(len(c) for c in iter_chunks([csz], chunk_rows=700))
+
+
+def test_range_reads_only_overlapping_blocks(tmpdir):
+    path = _write_week(str(tmpdir), datetime(2021, 1, 4), 3000)
+    compressed = CompressedFile(compress_csv(path, block_size=4096))
+    blocks = compressed.blocks(datetime(2021, 1, 4, 12), datetime(2021, 1, 4, 13))
+    assert 1 <= len(blocks) <= 2
+    lines = compressed.read(datetime(2021, 1, 4, 12), datetime(2021, 1, 4, 13)).splitlines()
+    assert lines[0] <= b'2021-01-04 12:00:00' and lines[-1] >= b'2021-01-04 12:59:00'
+    assert 0 == len(compressed.blocks(datetime(2021, 2, 1)))
+
+
+def test_compaction_keeps_current_week_and_reads_transparently(tmpdir):
+    dbdir = str(tmpdir)
+    closed = _write_week(dbdir, datetime(2021, 1, 4), 2000)
+    current = _write_week(dbdir, datetime(2021, 1, 11), 100)
+    before = Archive(dbdir).read_range(datetime(2021, 1, 5), datetime(2021, 1, 12))
+    RollupStore(dbdir, channels=2).update()
+    _touch(closed, datetime(2021, 1, 10))
+    compact_all(dbdir, block_size=4096, now=datetime(2021, 1, 12))
+    assert not os.path.exists(closed)
+    assert os.path.exists(os.path.splitext(closed)[0] + '.csz')
+    assert os.path.exists(current)
+    after = Archive(dbdir).read_range(datetime(2021, 1, 5), datetime(2021, 1, 12))
+    assert (before.timestamps == after.timestamps).all()
+    np.testing.assert_array_equal(before.temperature, after.temperature)
+    assert 2100 == len(load([os.path.splitext(closed)[0] + '.csz', current]))
+    store = RollupStore(dbdir, channels=2)
+    store.update()
+    assert 2100 == store.hourly().count[:, 0].sum()
+
+
+def test_compaction_waits_for_buffered_lines(tmpdir):
+    dbdir = str(tmpdir)
+    sink = WeeklyCsvSink(dbdir, Calibration([0.0]), commit_every=10)
+    response = Response()
+    response.set_channel_data(1, TempHum(21.4, 52))
+    for i in range(15):
+        sink.write(datetime(2021, 1, 10, 23, 45) + timedelta(minutes=i), response)
+    path = archive_path(dbdir, datetime(2021, 1, 10))
+    _touch(path, datetime(2021, 1, 10, 23, 54))
+    # Monday morning: 5 lines of last week are still buffered by the sink
+    compact_all(dbdir, now=datetime(2021, 1, 11, 0, 5))
+    assert os.path.exists(path) and not os.path.exists(compressed_path(path))
+    sink.write(datetime(2021, 1, 11, 0, 0), response)
+    sink.close()
+    _touch(path, datetime(2021, 1, 11, 0, 0))
+    compact_all(dbdir, now=datetime(2021, 1, 12, 12, 0))
+    assert 15 == len(load_csv(compressed_path(path)))
+
+
+def test_compaction_merges_the_last_days_of_december(tmpdir):
+    dbdir = str(tmpdir)
+    # Jan 1-7 2024 and Dec 30-31 2024 are both ISO week 1, filed under the calendar year: 2024/w01.csv
+    path = _write_week(dbdir, datetime(2024, 1, 1), 7 * 24 * 60)
+    _touch(path, datetime(2024, 1, 8))
+    compact_all(dbdir, block_size=4096, now=datetime(2024, 1, 10))
+    assert not os.path.exists(path)
+    assert path == _write_week(dbdir, datetime(2024, 12, 30), 2 * 24 * 60)
+    _touch(path, datetime(2024, 12, 31, 23, 59))
+    # The CSV is older than the compressed file of January, but must not be dropped
+    _touch(compressed_path(path), datetime(2025, 1, 3))
+    compact_all(dbdir, block_size=4096, now=datetime(2025, 1, 3))
+    assert not os.path.exists(path)
+    readings = load_csv(compressed_path(path))
+    assert 9 * 24 * 60 == len(readings)
+    assert np.datetime64('2024-01-01T00:00:00') == readings.timestamps[0]
+    assert np.datetime64('2024-12-31T23:59:00') == readings.timestamps[-1]
+    # Compacting a CSV that was compressed before does not duplicate its rows
+    _write_week(dbdir, datetime(2024, 12, 30), 60)
+    _touch(path, datetime(2024, 12, 31))
+    compact_all(dbdir, block_size=4096, now=datetime(2025, 1, 3))
+    assert 9 * 24 * 60 == len(load_csv(compressed_path(path)))
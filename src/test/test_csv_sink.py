@@ -0,0 +1,103 @@
+import os.path
+from datetime import datetime
+
+from rs5002csv.sink import Calibration, SnapshotCsvSink, WeeklyCsvSink, archive_path
+from rs500reader.do import Response, TempHum
+
+
+def _response() -> Response:
+    r = Response()
+    r.set_channel_data(1, TempHum(21.4, 52))
+    r.set_channel_data(2, TempHum(-1.8, 38))
+    return r
+
+
+def test_archive_path():
+    assert os.path.join('/db', '2020', 'w01.csv') == archive_path('/db', datetime(2020, 1, 2))
+
+
+def test_calibration_fills_missing_channels():
+    values = Calibration([0.5, 0.0, 0.0], [1, 0, 0]).apply(_response())
+    assert (21.9, 53.0) == values[0]
+    assert (-1.8, 38.0) == values[1]
+    assert all(v != v for v in values[2])
+
+
+def test_weekly_csv_sink_appends(tmpdir):
+    sink = WeeklyCsvSink(str(tmpdir), Calibration([0.0, 0.0]))
+    sink.write(datetime(2020, 1, 2, 3, 4, 5), _response())
+    sink.write(datetime(2020, 1, 2, 3, 5, 5), _response())
+    with open(archive_path(str(tmpdir), datetime(2020, 1, 2))) as fp:
+        lines = fp.readlines()
+    assert ['2020-01-02 03:04:05, 21.4 | 52.0, -1.8 | 38.0\n',
+            '2020-01-02 03:05:05, 21.4 | 52.0, -1.8 | 38.0\n'] == lines
+
+
+def test_snapshot_sink_replaces(tmpdir):
+    path = str(tmpdir.join('raumklima.csv'))
+    sink = SnapshotCsvSink(path, Calibration([0.0]))
+    sink.write(datetime(2020, 1, 2, 3, 4, 5), _response())
+    sink.write(datetime(2020, 1, 2, 3, 5, 5), _response())
+    with open(path) as fp:
+        assert '2020-01-02 03:05:05, 21.4, 52.0\n' == fp.read()
+
+
+def _lines(dbdir: str, ts: datetime) -> list:
+    with open(archive_path(dbdir, ts)) as fp:
+        return fp.readlines()
+
+
+def test_weekly_csv_sink_commits_groups(tmpdir):
+    sink = WeeklyCsvSink(str(tmpdir), Calibration([0.0, 0.0]), commit_every=3)
+    for minute in range(2):
+        sink.write(datetime(2020, 1, 2, 3, minute), _response())
+    assert [] == _lines(str(tmpdir), datetime(2020, 1, 2))
+    sink.write(datetime(2020, 1, 2, 3, 2), _response())
+    assert 3 == len(_lines(str(tmpdir), datetime(2020, 1, 2)))
+    sink.write(datetime(2020, 1, 2, 3, 3), _response())
+    sink.close()
+    assert 4 == len(_lines(str(tmpdir), datetime(2020, 1, 2)))
+
+
+def test_weekly_csv_sink_commits_after_interval(tmpdir):
+    now = [0.0]
+    sink = WeeklyCsvSink(str(tmpdir), Calibration([0.0, 0.0]), commit_every=100, commit_interval=60,
+                         clock=lambda: now[0])
+    sink.write(datetime(2020, 1, 2, 3, 0), _response())
+    now[0] = 59.0
+    sink.write(datetime(2020, 1, 2, 3, 1), _response())
+    assert [] == _lines(str(tmpdir), datetime(2020, 1, 2))
+    now[0] = 60.0
+    sink.write(datetime(2020, 1, 2, 3, 2), _response())
+    assert 3 == len(_lines(str(tmpdir), datetime(2020, 1, 2)))
+    sink.close()
+
+
+def test_weekly_csv_sink_commits_on_tick_without_writes(tmpdir):
+    now = [0.0]
+    sink = WeeklyCsvSink(str(tmpdir), Calibration([0.0, 0.0]), commit_every=100, commit_interval=60,
+                         clock=lambda: now[0])
+    sink.write(datetime(2020, 1, 2, 3, 0), _response())
+    now[0] = 59.0
+    sink.tick()
+    assert [] == _lines(str(tmpdir), datetime(2020, 1, 2))
+    now[0] = 60.0
+    sink.tick()
+    assert 1 == len(_lines(str(tmpdir), datetime(2020, 1, 2)))
+    sink.close()
+
+
+def test_weekly_csv_sink_rolls_over(tmpdir):
+    sink = WeeklyCsvSink(str(tmpdir), Calibration([0.0, 0.0]), commit_every=10, fsync=True)
+    sink.write(datetime(2020, 1, 5, 23, 59), _response())
+    sink.write(datetime(2020, 1, 6, 0, 0), _response())
+    # The pending line of the old week is committed when the new week begins
+    assert ['2020-01-05 23:59:00, 21.4 | 52.0, -1.8 | 38.0\n'] == _lines(str(tmpdir), datetime(2020, 1, 5))
+    sink.close()
+    assert ['2020-01-06 00:00:00, 21.4 | 52.0, -1.8 | 38.0\n'] == _lines(str(tmpdir), datetime(2020, 1, 6))
+
+
+def test_snapshot_sink_leaves_no_temporary_file(tmpdir):
+    path = str(tmpdir.join('raumklima.csv'))
+    SnapshotCsvSink(path, Calibration([0.0]), fsync=True).write(datetime(2020, 1, 2, 3, 4, 5), _response())
+    assert ['raumklima.csv'] == os.listdir(str(tmpdir))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from rs500archive.downsample import downsample, lttb_indices, minmax_indices
+
+
+def _signal(n=10000):
+    x = np.arange(n).astype('datetime64[m]')
+    y = np.sin(np.linspace(0, 20, n)).astype(np.float32)
+    y[n // 8] = 5.0  # spike
+    return x, y
+
+
+def test_lttb_keeps_budget_ends_and_spike():
+    x, y = _signal()
+    idx = lttb_indices(x, y, 200)
+    assert 200 == len(idx)
+    assert 0 == idx[0]
+    assert len(x) - 1 == idx[-1]
+    assert (np.diff(idx) > 0).all()
+    assert 1250 in idx
+
+
+def test_minmax_keeps_extremes():
+    x, y = _signal()
+    idx = minmax_indices(x, y, 200)
+    assert len(idx) <= 200
+    assert (np.diff(idx) > 0).all()
+    assert 1250 in idx
+    assert np.isclose(y.min(), y[idx].min())
+
+
+def test_small_input_is_unchanged():
+    x, y = _signal(50)
+    rx, ry = downsample(x, y, 100)
+    assert (x == rx).all()
+
+
+def test_nan_is_dropped():
+    x, y = _signal(1000)
+    y[10:20] = np.nan
+    rx, ry = downsample(x, y, 100, 'minmax')
+    assert not np.isnan(ry).any()
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        downsample(*_signal(10), points=5, method='foo')
@@ -0,0 +1,89 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from rs500archive.export import FeedExporter, feed_document
+from rs500archive.loader import Readings
+
+from .conftest import write_archive
+
+
+def _append(dbdir: str, start: datetime, rows: int, step: timedelta=timedelta(minutes=1)) -> None:
+    write_archive(dbdir, start, rows, lambda i: [(20.0, 50.0), (np.nan, np.nan)], step)
+
+
+def test_feed_document():
+    ts = np.array(['2021-01-04T00:00', '2021-01-04T00:01'], dtype='datetime64[s]')
+    temp = np.array([[20.04, np.nan], [21.0, 5.0]], dtype=np.float32)
+    hum = np.array([[50, np.nan], [51, 40]], dtype=np.float32)
+    doc = feed_document('24h', Readings(ts, temp, hum), None)
+    assert ts[0].astype(np.int64) == doc['t0']
+    assert [0, 60] == doc['t']
+    assert [[20.0, 21.0], [None, 5.0]] == doc['temperature']
+    assert [[50.0, 51.0], [None, 40.0]] == doc['humidity']
+    # must be valid JSON, i.e. no NaN
+    json.loads(json.dumps(doc, allow_nan=False))
+
+
+def test_export_writes_all_feeds(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    outdir = str(tmpdir.join('feeds'))
+    now = datetime(2021, 1, 10, 12, 0)
+    _append(dbdir, now - timedelta(days=3), 3 * 24 * 6, step=timedelta(minutes=10))
+    exporter = FeedExporter(dbdir, outdir, channels=2)
+    sizes = exporter.export(now)
+    assert {'24h', '7d', '1y'} == set(sizes)
+    with open(os.path.join(outdir, '24h.json')) as fp:
+        day = json.load(fp)
+    assert 60 == day['resolution']
+    assert 24 * 60 == len(day['t'])
+    # 24 hours of minutes up to 12:00, so the sample of 12:00 yesterday falls before the first one
+    assert 24 * 6 - 1 == sum(v is not None for v in day['temperature'][0])
+    with open(os.path.join(outdir, '7d.json')) as fp:
+        week = json.load(fp)
+    assert 3600 == week['resolution']
+    assert 3 * 24 == len(week['t'])
+    assert 3600 == week['t'][1] - week['t'][0]
+    with open(os.path.join(outdir, '1y.json')) as fp:
+        year = json.load(fp)
+    assert 3 == len(year['t'])
+    # within the same hour only the 24 hour feed is rewritten
+    assert {'24h'} == set(exporter.export(now + timedelta(minutes=5)))
+
+
+def test_append_skips_samples_already_in_window(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    outdir = str(tmpdir.join('feeds'))
+    now = datetime(2021, 1, 10, 12, 0)
+    _append(dbdir, now - timedelta(minutes=9), 10)
+    exporter = FeedExporter(dbdir, outdir, channels=2)
+    # the sample was already written by the CSV sink when the window is loaded
+    exporter.append(now, [(21.0, 55.0), (5.0, 40.0)])
+    exporter.append(now + timedelta(minutes=1), [(22.0, 56.0)])
+    exporter.export(now + timedelta(minutes=1))
+    with open(os.path.join(outdir, '24h.json')) as fp:
+        day = json.load(fp)
+    assert 11 == sum(v is not None for v in day['temperature'][0])
+    assert [21.0, 22.0] == day['temperature'][0][-2:]
+    assert [5.0, None] == day['temperature'][1][-2:]
+
+
+def test_hours_without_samples_are_null(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    outdir = str(tmpdir.join('feeds'))
+    now = datetime(2021, 1, 10, 12, 0)
+    _append(dbdir, now - timedelta(hours=6), 60)
+    _append(dbdir, now - timedelta(hours=2), 60)
+    FeedExporter(dbdir, outdir, channels=2).export(now)
+    with open(os.path.join(outdir, '7d.json')) as fp:
+        week = json.load(fp)
+    assert [0, 3600, 7200, 10800, 14400] == week['t']
+    assert [20.0, None, None, None, 20.0] == week['temperature'][0]
+    with open(os.path.join(outdir, '24h.json')) as fp:
+        day = json.load(fp)
+    # the minutes between the two blocks are gaps, not a line from the last sample to the next
+    assert [60] * (len(day['t']) - 1) == np.diff(day['t']).tolist()
+    last = day['t'].index(int(np.datetime64(now - timedelta(hours=5, minutes=1), 's').astype(np.int64)) - day['t0'])
+    assert [20.0, None] == day['temperature'][0][last:last + 2]
@@ -0,0 +1,20 @@
+import os
+
+from rs500common.files import atomic_write, replace_file
+
+
+def test_replace_file_keeps_the_extension(tmpdir):
+    path = str(tmpdir.join('24hrs.png'))
+    atomic_write(path, 'old')
+    written = []
+
+    def write(tmp: str) -> None:
+        written.append(tmp)
+        assert 'old' == open(path).read()
+        with open(tmp, 'w') as fp:
+            fp.write('new')
+
+    replace_file(path, write)
+    assert written[0].endswith('.png')
+    assert 'new' == open(path).read()
+    assert ['24hrs.png'] == os.listdir(str(tmpdir))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from rs500reader.do import Response
+from rs500reader.frames import decode_frames, iter_responses
+
+from .conftest import channel_values
+
+FRAME = [0x7b, 0x00, 0xcb, 0x35, 0x01, 0x18, 0x28, 0x00, 0xd6, 0x34, 0x00, 0xff, 0x2b, 0x00, 0xd0, 0x35,
+         0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff] + [0] * 39
+
+
+def test_decode_frames():
+    frames = np.array([FRAME, FRAME], dtype=np.uint8)
+    frames[1, 1:4] = [0xff, 0xee, 0x10]
+    temperature, humidity, valid = decode_frames(frames)
+    assert (2, 8) == temperature.shape
+    assert np.int16 == temperature.dtype
+    assert [203, 280, 214, 255, 208] == temperature[0, :5].tolist()
+    assert -18 == temperature[1, 0]
+    assert [53, 40, 52, 43, 53] == humidity[0, :5].tolist()
+    assert 16 == humidity[1, 0]
+    assert [True] * 5 + [False] * 3 == valid[0].tolist()
+
+
+def test_decode_frames_matches_single_frame_decoder():
+    rng = np.random.RandomState(1)
+    frames = rng.randint(0, 256, size=(200, 64)).astype(np.uint8)
+    frames[::3, 4:7] = [0x7f, 0xff, 0xff]
+    for frame, response in zip(frames, iter_responses(frames)):
+        assert channel_values(Response.from_frame(frame.tolist())) == channel_values(response)
+    assert (20.3, 53) == channel_values(next(iter_responses([FRAME])))[1]
+
+
+def test_decode_frames_rejects_bad_shape():
+    with pytest.raises(ValueError):
+        decode_frames(np.zeros((2, 63), dtype=np.uint8))
@@ -0,0 +1,62 @@
+import numpy as np
+
+from rs500archive.loader import iter_chunks, load, parse_lines
+
+LINES = [
+    '2020-01-02 03:04:05, 21.4 | 52.0, -1.8 | 38.0\n',
+    '2020-01-02 03:05:05, 21.5 | 52.0,  nan | nan\n',
+    '2020-01-02 03:06:05, 21.6 | 53.0\n',  # one channel only
+    '\n',
+    '2020-01-02 03:07:05, 21.7 | 54.0, 0.1 | 39.0\n',
+]
+
+
+def test_parse_lines_typed_columns():
+    r = parse_lines(LINES)
+    assert 3 == len(r)
+    assert 1 == r.skipped
+    assert 2 == r.channels
+    assert np.dtype('datetime64[s]') == r.timestamps.dtype
+    assert np.float32 == r.temperature.dtype
+    assert np.datetime64('2020-01-02T03:04:05') == r.timestamps[0]
+    assert np.allclose([21.4, -1.8], r.temperature[0])
+    assert np.allclose([52.0, 38.0], r.humidity[0])
+    assert np.isnan(r.temperature[1, 1])
+
+
+def test_parse_lines_bad_values_are_skipped():
+    r = parse_lines(LINES + ['2020-01-02 03:08:05, 21.8 | xx, 0.1 | 39.0\n', 'no date, 1 | 2, 3 | 4\n'])
+    assert 3 == len(r)
+    assert 3 == r.skipped
+    assert np.datetime64('2020-01-02T03:07:05') == r.timestamps[-1]
+
+
+def test_parse_lines_width_of_most_rows():
+    # A truncated first row does not decide the width of the others
+    r = parse_lines(['2020-01-02 03:03:05, 21.3 | 52.0\n'] + [LINES[0]] * 5)
+    assert 5 == len(r)
+    assert 1 == r.skipped
+    assert 2 == r.channels
+
+
+def test_parse_lines_fixed_channel_count():
+    r = parse_lines(LINES, channels=1)
+    assert 1 == len(r)
+    assert 3 == r.skipped
+
+
+def test_parse_nothing():
+    assert 0 == len(parse_lines([]))
+
+
+def test_load_and_chunks(tmpdir):
+    paths = []
+    for name in ('w01.csv', 'w02.csv'):
+        f = tmpdir.join(name)
+        f.write(''.join(LINES))
+        paths.append(str(f))
+    assert 6 == len(load(paths))
+    chunks = list(iter_chunks(paths, chunk_rows=2))
+    assert all(len(c) <= 2 for c in chunks)
+    assert 6 == sum(len(c) for c in chunks)
+    assert 2 == sum(c.skipped for c in chunks)
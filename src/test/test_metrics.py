@@ -0,0 +1,93 @@
+from rs500common.metrics import Metrics, MetricsRegistry, get_metrics, set_metrics
+from rs500common.pipeline import Sink, SinkPipeline
+from rs500reader.acquisition import acquire
+from rs500reader.do import Response
+from rs500reader.reader import Rs500Reader
+from rs500reader.transport import SimulatedTransport
+
+
+def test_registry_and_dump():
+    metrics = MetricsRegistry()
+    metrics.inc('reader.io_errors')
+    metrics.inc('reader.io_errors', 2)
+    metrics.gauge('redis.queued', 4)
+    metrics.observe('reader.query', 0.010)
+    metrics.observe('reader.query', 0.030)
+    with metrics.timer('reader.write'):
+        pass
+    snapshot = metrics.snapshot()
+    assert 3 == snapshot['reader.io_errors']
+    assert 4 == snapshot['redis.queued']
+    assert 2 == snapshot['reader.query.count']
+    assert 20.0 == snapshot['reader.query.mean_ms']
+    assert 10.0 == snapshot['reader.query.min_ms']
+    assert 30.0 == snapshot['reader.query.max_ms']
+    assert 1 == snapshot['reader.write.count']
+    assert 'reader.io_errors 3\n' in metrics.dump()
+
+
+def test_default_registry_is_pluggable():
+    previous = get_metrics()
+    try:
+        metrics = MetricsRegistry()
+        set_metrics(metrics)
+        Rs500Reader(transport=SimulatedTransport()).get_data()
+        assert 1 == metrics.snapshot()['reader.query.count']
+    finally:
+        set_metrics(previous)
+
+
+def test_reader_and_acquisition_metrics():
+    metrics = MetricsRegistry()
+    reader = Rs500Reader(persistent=True, timeout=0.05, transport=SimulatedTransport(dropped_channels=[2], channels=3),
+                         metrics=metrics)
+    acq = acquire(reader, [1, 2], deadline=0.05, backoff=0.01, metrics=metrics)
+    reader.close()
+    snapshot = metrics.snapshot()
+    assert acq.attempts == snapshot['acquisition.attempts']
+    assert acq.attempts - 1 == snapshot['acquisition.retries']
+    assert acq.attempts == snapshot['acquisition.channel.1.frames']
+    assert acq.attempts == snapshot['acquisition.channel.2.missing']
+    assert 1 == snapshot['acquisition.incomplete']
+    for stage in ('open', 'drain', 'write', 'read', 'query'):
+        assert snapshot['reader.{}.count'.format(stage)] >= 1
+
+
+def test_invalid_length_and_io_errors_are_counted():
+    metrics = MetricsRegistry()
+    transport = SimulatedTransport(latency=1.0)
+    assert Rs500Reader(timeout=0.01, transport=transport, metrics=metrics).get_data() is None
+    transport.error_rate = 1.0
+    assert Rs500Reader(transport=transport, metrics=metrics).get_data() is None
+    snapshot = metrics.snapshot()
+    assert 1 == snapshot['reader.invalid_length']
+    assert 1 == snapshot['reader.io_errors']
+
+
+class FailingSink(Sink):
+
+    name = 'failing'
+
+    def write(self, timestamp, response):
+        raise IOError('disk full')
+
+
+def test_sink_metrics():
+    metrics = MetricsRegistry()
+    with SinkPipeline([FailingSink()], metrics=metrics) as pipeline:
+        pipeline.publish(Response())['failing'].result()
+    assert 1 == metrics.snapshot()['sink.failing.failures']
+
+
+def test_null_metrics_discard_everything():
+    metrics = Metrics()
+    metrics.inc('a')
+    with metrics.timer('b'):
+        pass
+    assert '' == metrics.dump()
+
+
+def test_metrics_without_registry_can_be_written(tmpdir):
+    path = str(tmpdir.join('metrics.txt'))
+    Metrics().write(path)
+    assert '' == tmpdir.join('metrics.txt').read()
@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from rs500common.pipeline import Sink, SinkPipeline
+from rs500reader.do import Response, TempHum
+
+
+class RecordingSink(Sink):
+
+    def __init__(self, name: str):
+        self.name = name
+        self.received = []
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.received.append((timestamp, response))
+
+
+class BlockingSink(Sink):
+
+    name = 'blocking'
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        self.release.wait(5)
+
+
+class FailingSink(Sink):
+
+    name = 'failing'
+
+    def write(self, timestamp: datetime, response: Response) -> None:
+        raise IOError('disk full')
+
+
+def _response() -> Response:
+    r = Response()
+    r.set_channel_data(1, TempHum(21.4, 52))
+    return r
+
+
+def test_all_sinks_get_the_same_response():
+    a = RecordingSink('a')
+    b = RecordingSink('b')
+    response = _response()
+    ts = datetime(2020, 1, 2, 3, 4, 5)
+    with SinkPipeline([a, b]) as pipeline:
+        for future in pipeline.publish(response, ts).values():
+            assert future.result()
+    assert [(ts, response)] == a.received
+    assert [(ts, response)] == b.received
+    assert 1 == pipeline.stats['a'].writes
+    assert pipeline.stats['a'].last_latency is not None
+
+
+def test_slow_sink_does_not_hold_back_others():
+    blocking = BlockingSink()
+    fast = RecordingSink('fast')
+    pipeline = SinkPipeline([blocking, fast], max_pending=1)
+    futures = pipeline.publish(_response())
+    assert futures['fast'].result(timeout=5)
+    # second publish: the blocking sink is still busy, so its write is dropped
+    pipeline.publish(_response())['fast'].result(timeout=5)
+    assert 1 == pipeline.stats['blocking'].dropped
+    assert 2 == pipeline.stats['fast'].writes
+    blocking.release.set()
+    pipeline.close()
+    assert 1 == pipeline.stats['blocking'].writes
+
+
+def test_failures_are_counted():
+    with SinkPipeline([FailingSink()]) as pipeline:
+        assert not pipeline.publish(_response())['failing'].result()
+    assert 1 == pipeline.stats['failing'].failures
+    assert 0 == pipeline.stats['failing'].writes
+
+
+def test_tick_runs_after_queued_writes():
+    class TickingSink(RecordingSink):
+
+        def tick(self) -> None:
+            self.received.append('tick')
+
+    sink = TickingSink('ticking')
+    with SinkPipeline([sink, FailingSink()]) as pipeline:
+        pipeline.publish(_response())
+        for future in pipeline.tick().values():
+            future.result(5)
+    assert ['tick'] == sink.received[1:]
+
+
+def test_sink_must_implement_write():
+    class Unfinished(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        Unfinished()
@@ -0,0 +1,109 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from import_rs500_sqlite import import_all
+from rs500archive.binary import convert_csv
+from rs500archive.compressed import compress_csv
+from rs500archive.query import Archive, INDEX_FILE, read_range
+from rs500archive.rollup import RollupStore
+from rs500archive.sqlstore import SqliteStore
+
+from .conftest import write_archive
+
+
+def _write_week(dbdir, start: datetime, rows: int, step: timedelta=timedelta(minutes=1)) -> str:
+    return write_archive(dbdir, start, rows, lambda i: [(20 + i % 10 / 10, 50.0), (-1.0, 40.0)], step)
+
+
+def test_range_across_year_boundary(tmpdir):
+    dbdir = str(tmpdir)
+    # ISO week 53 of 2020 ends on Sunday, Jan 3rd 2021; the writer files it under the calendar year
+    _write_week(dbdir, datetime(2020, 12, 31, 0, 0), 2 * 24 * 60)
+    _write_week(dbdir, datetime(2021, 1, 2, 0, 0), 2 * 24 * 60)
+    _write_week(dbdir, datetime(2021, 1, 4, 0, 0), 24 * 60)
+    r = read_range(dbdir, datetime(2021, 1, 1, 12, 0), datetime(2021, 1, 4, 12, 0))
+    assert 3 * 24 * 60 == len(r)
+    assert np.datetime64('2021-01-01T12:00:00') == r.timestamps[0]
+    assert np.datetime64('2021-01-04T11:59:00') == r.timestamps[-1]
+    assert (np.diff(r.timestamps.astype(np.int64)) == 60).all()
+    assert r.temperature.flags['C_CONTIGUOUS']
+
+
+def test_only_overlapping_partitions_are_used(tmpdir):
+    dbdir = str(tmpdir)
+    _write_week(dbdir, datetime(2021, 1, 4), 10)
+    _write_week(dbdir, datetime(2021, 1, 11), 10)
+    archive = Archive(dbdir)
+    archive.index.refresh()
+    assert [os.path.join(dbdir, '2021', 'w02.csv')] == archive.index.partitions(datetime(2021, 1, 8))
+
+
+def test_channel_selection(tmpdir):
+    dbdir = str(tmpdir)
+    _write_week(dbdir, datetime(2021, 1, 4), 10)
+    r = Archive(dbdir).read_range(channels=[2])
+    assert (10, 1) == r.temperature.shape
+    assert np.allclose(-1.0, r.temperature)
+
+
+def test_index_is_persisted_and_updated_on_growth(tmpdir):
+    dbdir = str(tmpdir)
+    path = _write_week(dbdir, datetime(2021, 1, 4), 10)
+    archive = Archive(dbdir)
+    assert 10 == len(archive.read_range())
+    with open(os.path.join(dbdir, INDEX_FILE)) as fp:
+        assert '2021-01-04T00:09:00' == json.load(fp)[os.path.join('2021', 'w01.csv')]['last']
+    _write_week(dbdir, datetime(2021, 1, 4, 0, 10), 5)
+    assert 15 == len(archive.read_range())
+    assert '2021-01-04T00:14:00' == archive.index.entries[os.path.join('2021', 'w01.csv')]['last']
+    assert os.path.exists(path)
+
+
+def test_large_csv_is_bisected(tmpdir):
+    dbdir = str(tmpdir)
+    _write_week(dbdir, datetime(2021, 1, 4), 7 * 24 * 60)
+    r = read_range(dbdir, datetime(2021, 1, 6, 10, 0, 30), datetime(2021, 1, 6, 11, 0))
+    assert 59 == len(r)
+    assert np.datetime64('2021-01-06T10:01:00') == r.timestamps[0]
+
+
+def test_binary_partition_is_preferred(tmpdir):
+    dbdir = str(tmpdir)
+    path = _write_week(dbdir, datetime(2021, 1, 4), 10)
+    bin_path, _ = convert_csv(path)
+    archive = Archive(dbdir)
+    archive.index.refresh()
+    assert [bin_path] == archive.index.partitions()
+    assert 10 == len(archive.read_range())
+
+
+def test_partial_copies_of_a_week_are_merged(tmpdir):
+    dbdir = str(tmpdir.join('db'))
+    path = _write_week(dbdir, datetime(2021, 1, 4), 101)
+    # A binary sink enabled for the last sample only: same last timestamp as the CSV, but not a copy of it
+    tail = _write_week(str(tmpdir.join('tail')), datetime(2021, 1, 4, 1, 40), 1)
+    convert_csv(tail, os.path.splitext(path)[0] + '.rsb')
+    # The rows of the first hour were compacted, the CSV was reopened afterwards
+    other = _write_week(str(tmpdir.join('db2')), datetime(2021, 1, 11), 60)
+    compress_csv(other)
+    os.remove(other)
+    _write_week(str(tmpdir.join('db2')), datetime(2021, 1, 11, 1, 0), 60)
+    # The CSV covers the binary file, so it is read alone; the CSV and the compressed file are read together
+    for directory, rows, files in ((dbdir, 101, 1), (str(tmpdir.join('db2')), 120, 2)):
+        archive = Archive(directory)
+        r = archive.read_range()
+        assert rows == len(r)
+        assert (np.diff(r.timestamps.astype(np.int64)) == 60).all()
+        assert files == len(archive.index.weeks()[0])
+        store = RollupStore(directory, channels=2)
+        store.update()
+        assert rows == store.hourly().count[:, 0].sum()
+        assert not store.update()
+        database = str(tmpdir.join('{}.sqlite'.format(rows)))
+        import_all(directory, database, channels=2)
+        sqlite = SqliteStore(database, 2)
+        assert rows == len(sqlite.read_range())
+        sqlite.close()
@@ -0,0 +1,91 @@
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from rs500reader.reader import Rs500Reader
+
+FRAME = [0x7b, 0x00, 0xcb, 0x35, 0x01, 0x18, 0x28, 0x00, 0xd6, 0x34, 0x00, 0xff, 0x2b, 0x00, 0xd0, 0x35,
+         0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff] + [0] * 39
+
+
+class FakeDevice(object):
+
+    instances = []
+
+    def __init__(self):
+        self.opened = False
+        self.closed = False
+        self.pending = []
+        self.fail_write = False
+        FakeDevice.instances.append(self)
+
+    def open(self, vendor, product):
+        self.opened = True
+
+    def set_nonblocking(self, value):
+        pass
+
+    def write(self, data):
+        if self.fail_write:
+            raise IOError('device unplugged')
+        self.pending.append(list(FRAME))
+        return len(data)
+
+    def read(self, max_length, timeout_ms=0):
+        if self.pending:
+            return self.pending.pop(0)
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_hid(monkeypatch: MonkeyPatch):
+    FakeDevice.instances = []
+    monkeypatch.setattr('hid.device', FakeDevice)
+    return FakeDevice
+
+
+def test_get_data_decodes_frame(fake_hid):
+    reader = Rs500Reader()
+    data = reader.get_data()
+    assert 20.3 == data.get_channel_data(1).temperature
+    assert 53 == data.get_channel_data(1).humidity
+    assert 28.0 == data.get_channel_data(2).temperature
+    assert data.get_channel_data(6) is None
+    assert reader.last_latency is not None
+    assert fake_hid.instances[0].closed
+    assert not reader.is_open
+
+
+def test_persistent_session_reuses_device(fake_hid):
+    with Rs500Reader(persistent=True) as reader:
+        assert reader.get_data() is not None
+        assert reader.get_data() is not None
+        assert 1 == len(fake_hid.instances)
+        assert reader.is_open
+    assert fake_hid.instances[0].closed
+
+
+def test_persistent_session_drains_stale_reports(fake_hid):
+    reader = Rs500Reader(persistent=True)
+    reader.get_data()
+    fake_hid.instances[0].pending.append([0x01] * 64)
+    data = reader.get_data()
+    assert 20.3 == data.get_channel_data(1).temperature
+
+
+def test_persistent_session_reconnects(fake_hid):
+    reader = Rs500Reader(persistent=True)
+    reader.get_data()
+    fake_hid.instances[0].fail_write = True
+    data = reader.get_data()
+    assert data is not None
+    assert 2 == len(fake_hid.instances)
+    assert fake_hid.instances[0].closed
+
+
+def test_timeout_gives_invalid_length(fake_hid, monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(FakeDevice, 'write', lambda self, data: len(data))
+    reader = Rs500Reader(timeout=0.05)
+    assert reader.get_data() is None
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+
+import pytest
+from redis import ConnectionError
+
+from rs5002redis.history import RedisHistoryReader, response_to_samples
+from rs5002redis.saver import RedisSaver, response_to_dict
+from rs500reader.do import Response, TempHum
+
+
+class FakePipeline(object):
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+        return self
+
+    def zadd(self, key, mapping):
+        self.commands.append(('zadd', key, mapping))
+        return self
+
+    def zremrangebyscore(self, key, low, high):
+        self.commands.append(('zrem', key, float(high.lstrip('('))))
+        return self
+
+    def zrangebyscore(self, key, low, high):
+        self.commands.append(('zrange', key, float(low), float(high)))
+        return self
+
+    def execute(self):
+        if self.redis.down:
+            raise ConnectionError('connection refused')
+        self.redis.round_trips += 1
+        results = []
+        for command in self.commands:
+            if command[0] == 'zadd':
+                self.redis.sets.setdefault(command[1], {}).update(command[2])
+            elif command[0] == 'zrem':
+                zset = self.redis.sets.get(command[1], {})
+                for member in [m for m, score in zset.items() if score < command[2]]:
+                    del zset[member]
+            elif command[0] == 'zrange':
+                zset = self.redis.sets.get(command[1], {})
+                results.append([m.encode() for m, score in sorted(zset.items(), key=lambda i: i[1])
+                                if command[2] <= score <= command[3]])
+            else:
+                key, value, ex = command
+                self.redis.values[key] = (value, ex)
+        return results
+
+
+class FakeRedis(object):
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.round_trips = 0
+        self.down = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_one_round_trip_per_sample():
+    redis = FakeRedis()
+    saver = RedisSaver(prefix='rs500_', ttl=45, redis=redis)
+    response = Response()
+    response.set_channel_data(1, TempHum(21.5, 40))
+    response.set_channel_data(2, TempHum(-3.0, 80))
+    saver.save(response_to_dict(response))
+    assert 1 == redis.round_trips
+    assert (21.5, 45) == redis.values['rs500_c1_temp']
+    assert (80, 45) == redis.values['rs500_c2_humi']
+
+
+def test_writes_are_queued_while_redis_is_down():
+    redis = FakeRedis()
+    clock = Clock()
+    saver = RedisSaver(ttl=45, max_queued=2, redis=redis, clock=clock)
+    redis.down = True
+    for i in range(3):
+        with pytest.raises(ConnectionError):
+            saver.save({'c1_temp': i})
+        clock.now += 10
+    assert 2 == saver.queued
+    assert 1 == saver.dropped
+    redis.down = False
+    saver.save({'c1_temp': 3, 'c2_temp': 7})
+    assert 0 == saver.queued
+    assert 1 == redis.round_trips
+    assert (3, 45) == redis.values['c1_temp']
+    assert (7, 45) == redis.values['c2_temp']
+
+
+def test_expired_samples_are_not_written():
+    redis = FakeRedis()
+    clock = Clock()
+    saver = RedisSaver(ttl=45, redis=redis, clock=clock)
+    redis.down = True
+    with pytest.raises(ConnectionError):
+        saver.save({'c3_temp': 1})
+    clock.now += 30
+    with pytest.raises(ConnectionError):
+        saver.save({'c1_temp': 2})
+    clock.now += 20
+    redis.down = False
+    saver.save({'c2_temp': 3})
+    assert 'c3_temp' not in redis.values
+    assert (2, 25) == redis.values['c1_temp']
+
+
+def test_history_is_trimmed_and_read_back():
+    redis = FakeRedis()
+    saver = RedisSaver(prefix='rs500_', history_retention=3600, redis=redis)
+    start = datetime(2021, 1, 4, 12, 0)
+    for i in range(90):
+        response = Response()
+        response.set_channel_data(1, TempHum(20.0 + i / 10, 40))
+        if i % 2 == 0:
+            response.set_channel_data(3, TempHum(-1.0, 90))
+        saver.save(response_to_dict(response), start + timedelta(minutes=i), response_to_samples(response))
+    assert 61 == len(redis.sets['rs500_c1_history'])
+    reader = RedisHistoryReader(redis, prefix='rs500_')
+    round_trips = redis.round_trips
+    history = reader.read_range([1, 2, 3], start + timedelta(minutes=80))
+    assert redis.round_trips == round_trips + 1
+    assert 10 == len(history[1])
+    assert (start + timedelta(minutes=80), 28.0, 40) == history[1][0]
+    assert [] == history[2]
+    assert 5 == len(history[3])
+
+
+def test_queued_samples_reach_the_history():
+    redis = FakeRedis()
+    saver = RedisSaver(ttl=45, history_retention=3600, redis=redis)
+    start = datetime(2021, 1, 4, 12, 0)
+    redis.down = True
+    with pytest.raises(ConnectionError):
+        saver.save({'c1_temp': 20.0}, start, {1: (20.0, 40)})
+    redis.down = False
+    saver.save({'c1_temp': 21.0}, start + timedelta(minutes=5), {1: (21.0, 41)})
+    history = RedisHistoryReader(redis).read_range([1])
+    assert [20.0, 21.0] == [temp for ts, temp, humi in history[1]]
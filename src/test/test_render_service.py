@@ -0,0 +1,130 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip('matplotlib')
+pytest.importorskip('plotly')
+
+from rs500plots.render import PlotStyle  # noqa: E402
+from rs500plots.service import LiveWindow, RenderService, RenderWorker  # noqa: E402
+from rs500archive.query import Archive  # noqa: E402
+
+from .conftest import write_archive  # noqa: E402
+
+
+def _append(dbdir: str, start: datetime, rows: int) -> None:
+    write_archive(dbdir, start, rows, lambda i: [(20 + i % 10 / 10, 50.0), (18.0, 60.0)])
+
+
+def _style() -> PlotStyle:
+    return PlotStyle(names=['Kitchen', 'Bathrm'], points=100, dpi=50)
+
+
+def test_window_reads_only_new_rows(tmpdir):
+    dbdir = str(tmpdir)
+    now = datetime(2021, 1, 6, 12, 0)
+    _append(dbdir, now - timedelta(days=2), 2 * 24 * 60)
+    window = LiveWindow(Archive(dbdir), 2)
+    assert 24 * 60 == len(window.update(now))
+    _append(dbdir, now, 5)
+    readings = window.update(now + timedelta(minutes=5))
+    assert 24 * 60 == len(readings)
+    assert np.datetime64('2021-01-06T12:04:00') == readings.timestamps[-1]
+
+
+def test_figures_are_updated_in_place(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    figdir = str(tmpdir.mkdir('fig'))
+    now = datetime(2021, 1, 6, 12, 0)
+    _append(dbdir, now - timedelta(hours=3), 60)
+    _append(dbdir, now - timedelta(hours=1), 60)
+    service = RenderService(dbdir, figdir, _style(), processes=False)
+    results = service.tick(now)
+    assert {'24hrs.png', '24hrs.html', 'avg_01days.png'} == set(results)
+    assert all(ok for ok, _, _ in results.values())
+    renderer = service.workers['24hrs.png'].renderer
+    figure, line = renderer.figure, renderer.temperature[0]
+    y = line.get_ydata()
+    # The hour without samples is a break in the line
+    assert 1 == np.isnan(y).sum()
+    assert '20.9 Kitchen' == renderer.legend.get_texts()[0].get_text()
+    _append(dbdir, now, 1)
+    results = service.tick(now + timedelta(minutes=1))
+    # Same hour: the averages are not redrawn
+    assert {'24hrs.png', '24hrs.html'} == set(results)
+    assert figure is renderer.figure and line is renderer.temperature[0]
+    assert '20.0 Kitchen' == renderer.legend.get_texts()[0].get_text()
+    for name in ('24hrs.png', '24hrs.html', 'avg_01days.png'):
+        assert os.path.getsize(os.path.join(figdir, name)) > 0
+    assert ['24hrs.html', '24hrs.png', 'avg_01days.png'] == sorted(os.listdir(figdir))
+    service.close()
+
+
+def test_worker_processes(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    figdir = str(tmpdir.mkdir('fig'))
+    now = datetime(2021, 1, 6, 12, 0)
+    _append(dbdir, now - timedelta(hours=1), 60)
+    service = RenderService(dbdir, figdir, _style())
+    try:
+        results = service.tick(now)
+        assert all(ok for ok, _, _ in results.values()), results
+        assert results['24hrs.png'][1] == os.path.getsize(os.path.join(figdir, '24hrs.png'))
+    finally:
+        service.close()
+
+
+class _Misbehaving(object):
+    # Dies or hangs while the marker file exists; a restarted worker finds it removed
+
+    def __init__(self, marker: str, hang: bool):
+        self.marker = marker
+        self.hang = hang
+
+    def render(self, table) -> int:
+        if os.path.exists(self.marker):
+            os.remove(self.marker)
+            if self.hang:
+                time.sleep(60)
+            os._exit(1)
+        return len(table)
+
+
+@pytest.mark.parametrize('hang', [False, True])
+def test_broken_workers_are_replaced(tmpdir, hang):
+    marker = tmpdir.join('marker')
+    marker.write('')
+    worker = RenderWorker(_Misbehaving, (str(marker), hang), timeout=2.0)
+    try:
+        worker.submit([1, 2, 3])
+        ok, error, seconds = worker.result()
+        assert not ok and seconds < 10
+        assert ('no result' if hang else 'exited') in error
+        worker.submit([1, 2, 3])
+        assert (True, 3) == worker.result()[:2]
+    finally:
+        worker.close()
+
+
+def test_read_errors_do_not_stop_the_service(tmpdir):
+    dbdir = str(tmpdir.mkdir('db'))
+    now = datetime(2021, 1, 6, 12, 0)
+    _append(dbdir, now - timedelta(hours=1), 60)
+    service = RenderService(dbdir, str(tmpdir.mkdir('fig')), _style(), processes=False)
+    update = service.window.update
+    service.window.update = lambda now: 1 / 0
+    service.rollups.update = lambda: 1 / 0
+    results = service.tick(now)
+    assert {'24hrs.png', '24hrs.html', 'avg_01days.png'} == set(results)
+    assert not any(ok for ok, _, _ in results.values())
+    assert 'ZeroDivisionError' in results['24hrs.png'][1]
+    del service.rollups.update
+    service.window.update = update
+    # The averages failed, so they are tried again within the same hour
+    results = service.tick(now + timedelta(minutes=1))
+    assert {'24hrs.png', '24hrs.html', 'avg_01days.png'} == set(results)
+    assert all(ok for ok, _, _ in results.values())
+    service.close()
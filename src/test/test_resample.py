@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from rs500archive.downsample import downsample
+from rs500archive.loader import Readings
+from rs500archive.resample import regrid, resample, resampled_readings
+from rs500archive.rollup import DAY, HOUR, Aggregates
+
+
+def _readings(stamps, temp) -> Readings:
+    temp = np.array(temp, dtype=np.float32).reshape(len(stamps), -1)
+    return Readings(np.array(stamps, dtype='datetime64[s]'), temp, temp + 30)
+
+
+def test_jittered_samples_and_gaps():
+    # Cron jitter, a retry (two samples in one minute) and three missing minutes
+    r = _readings(['2021-01-04T00:00:03', '2021-01-04T00:01:05', '2021-01-04T00:01:40', '2021-01-04T00:05:02'],
+                  [20.0, 21.0, 23.0, 24.0])
+    agg = resample(r, '1min')
+    assert 6 == len(agg)
+    assert np.datetime64('2021-01-04T00:00:00') == agg.start[0]
+    assert [1, 2, 0, 0, 0, 1] == agg.count[:, 0].tolist()
+    assert [True, True, False, False, False, True] == agg.covered[:, 0].tolist()
+    assert np.isclose(22.0, agg.mean[1, 0])
+    assert 21.0 == agg.minimum[1, 0] and 23.0 == agg.maximum[1, 0]
+    assert np.isnan(agg.mean[2:5, 0]).all() and np.isnan(agg.minimum[2:5]).all()
+    assert np.isclose(52.0, agg.mean[1, 1])
+
+
+def test_explicit_range_and_missing_values():
+    r = _readings(['2021-01-04T10:20:00', '2021-01-04T12:10:00'], [[20.0, np.nan], [22.0, 5.0]])
+    agg = resample(r, '1h', datetime(2021, 1, 4, 9, 0), datetime(2021, 1, 4, 12, 0))
+    assert 3 == len(agg)
+    assert [0, 1, 0] == agg.count[:, 0].tolist()
+    assert [0, 0, 0] == agg.count[:, 1].tolist()
+    day = resampled_readings(r, '1d')
+    assert 1 == len(day)
+    assert np.isclose(21.0, day.temperature[0, 0])
+    assert 5.0 == day.temperature[0, 1]
+    with pytest.raises(ValueError):
+        resample(r, '2h')
+
+
+def test_regrid_coarsens_and_fills():
+    r = _readings(['2021-01-04T01:00:00', '2021-01-04T02:00:00', '2021-01-07T05:00:00'], [20.0, 22.0, 18.0])
+    agg = regrid(Aggregates.from_readings(r, HOUR), DAY)
+    assert ['2021-01-04', '2021-01-05', '2021-01-06', '2021-01-07'] == [str(s)[:10] for s in agg.start]
+    assert [2, 0, 0, 1] == agg.count[:, 0].tolist()
+    assert np.isclose(21.0, agg.mean[0, 0])
+    assert 0 == len(regrid(Aggregates.empty(1), DAY))
+
+
+def test_downsample_keeps_breaks():
+    x = np.arange(1000).astype('datetime64[m]')
+    y = np.sin(np.linspace(0, 10, 1000))
+    y[400:450] = np.nan
+    rx, ry = downsample(x, y, 100, breaks=True)
+    assert 1 == np.isnan(ry).sum()
+    gap = int(np.flatnonzero(np.isnan(ry))[0])
+    assert rx[gap - 1] < x[400] and rx[gap + 1] >= x[450]
+    assert not np.isnan(downsample(x, y, 100)[1]).any()
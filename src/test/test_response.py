@@ -2,6 +2,8 @@ import pytest
 
 from rs500reader.do import Response, TempHum
 
+from .conftest import channel_values
+
 
 def test_response_object():
     r = Response()
@@ -34,3 +36,33 @@ def test_get_all():
     r = Response()
     r.set_channel_data(2, th)
     assert {1: None, 2: th, 3: None, 4: None, 5: None, 6: None, 7: None, 8: None} == r.all
+
+
+def test_from_frame():
+    frame = [0x7b, 0xff, 0xee, 0x35, 0x7f, 0xff, 0xff] + [0x7f, 0xff, 0xff] * 6 + [0] * 39
+    r = Response.from_frame(frame)
+    assert -1.8 == r.get_channel_data(1).temperature
+    assert 53 == r.get_channel_data(1).humidity
+    assert r.get_channel_data(2) is None
+    assert {1: (-1.8, 53), 2: None, 3: None, 4: None, 5: None, 6: None, 7: None, 8: None} == channel_values(r)
+
+
+def test_values_beyond_tenths_are_kept():
+    r = Response()
+    r.set_channel_data(1, TempHum(20.37, 50))
+    assert 20.37 == r.get_channel_data(1).temperature
+    r.set_channel_data(1, TempHum(20.4, 50))
+    assert 20.4 == r.get_channel_data(1).temperature
+    r.set_channel_data(1, None)
+    assert r.get_channel_data(1) is None
+
+
+def test_channel_objects_are_shared():
+    r = Response.from_frame([0x7b, 0x00, 0xcb, 0x35] + [0x7f, 0xff, 0xff] * 7 + [0] * 39)
+    r.get_channel_data(1).temperature = 21.0
+    assert (21.0, 53) == channel_values(r)[1]
+    assert r.get_channel_data(1) is r.all[1]
+    th = TempHum(8.8, 76)
+    r.set_channel_data(2, th)
+    th.humidity = 70
+    assert 70 == r.get_channel_data(2).humidity
@@ -0,0 +1,68 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from rs500common.rolling import RollingStats, RollingWindow, parse_window
+from rs500reader.do import Response, TempHum
+
+
+def test_parse_window():
+    assert 300 == parse_window('5m')
+    assert 3600 == parse_window('1h')
+    assert 86400 == parse_window('24h')
+    with pytest.raises(ValueError):
+        parse_window('1 hour')
+
+
+def test_window_matches_brute_force():
+    rnd = random.Random(42)
+    window = RollingWindow(600, scale=10)
+    samples = []
+    for i in range(2000):
+        t = i * 30.0
+        value = round(rnd.uniform(-10, 30), 1)
+        window.add(t, value)
+        samples.append((t, value))
+        current = [v for s, v in samples if s > t - 600]
+        assert len(current) == window.count
+        assert min(current) == window.minimum
+        assert max(current) == window.maximum
+        mean = sum(current) / len(current)
+        assert math.isclose(mean, window.mean, abs_tol=1e-9)
+        assert math.isclose(math.sqrt(sum((v - mean) ** 2 for v in current) / len(current)), window.stddev,
+                            abs_tol=1e-9)
+
+
+def test_rate_per_hour():
+    window = RollingWindow(3600)
+    assert window.rate is None
+    window.add(0, 20.0)
+    window.add(1800, 21.0)
+    assert math.isclose(2.0, window.rate)
+    window.add(3600, 20.0)
+    # the first sample expired
+    assert 2 == window.count
+    assert math.isclose(-2.0, window.rate)
+
+
+def test_stats_per_channel_and_window():
+    stats = RollingStats(['5m', '1h'])
+    start = datetime(2021, 1, 4, 12, 0)
+    for i in range(20):
+        response = Response()
+        response.set_channel_data(1, TempHum(20.0 + i / 10, 40 + i))
+        if i < 5:
+            response.set_channel_data(2, TempHum(5.0, 80))
+        stats.update(start + timedelta(minutes=i), response)
+    data = stats.to_dict()
+    assert 5 == data['c1_temp_5m_count']
+    assert 21.5 == data['c1_temp_5m_min']
+    assert 21.9 == data['c1_temp_5m_max']
+    assert 59 == data['c1_humi_1h_max']
+    assert 20 == data['c1_humi_1h_count']
+    assert 5 == data['c2_temp_1h_count']
+    # channel 2 stopped reporting more than 5 minutes ago
+    assert 'c2_temp_5m_mean' not in data
+    assert 5 == stats.window(2, 'humi', '1h').count
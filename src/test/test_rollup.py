@@ -0,0 +1,101 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from rs500archive.loader import Readings
+from rs500archive.rollup import Aggregates, DAY, HOUR, RollupStore
+
+from .conftest import write_archive
+
+
+def _append(dbdir: str, start: datetime, rows: int, temp=lambda i: 20.0) -> str:
+    return write_archive(dbdir, start, rows, lambda i: [(temp(i), 50.0), (np.nan, np.nan)])
+
+
+def test_aggregates_from_readings():
+    ts = np.array(['2021-01-04T00:00', '2021-01-04T00:30', '2021-01-04T01:10'], dtype='datetime64[s]')
+    temp = np.array([[20.0, np.nan], [22.0, np.nan], [18.0, 5.0]], dtype=np.float32)
+    hum = np.array([[50, np.nan], [52, np.nan], [54, 40]], dtype=np.float32)
+    agg = Aggregates.from_readings(Readings(ts, temp, hum), HOUR)
+    assert 2 == len(agg)
+    assert [2, 0, 2, 0] == agg.count[0].tolist()
+    assert np.isclose(21.0, agg.mean[0, 0])
+    assert 20.0 == agg.minimum[0, 0]
+    assert 22.0 == agg.maximum[0, 0]
+    assert np.isnan(agg.mean[0, 1])
+    daily = agg.coarsen(DAY)
+    assert 1 == len(daily)
+    assert [3, 1, 3, 1] == daily.count[0].tolist()
+    assert np.isclose(20.0, daily.mean[0, 0])
+
+
+def test_incremental_update(tmpdir):
+    dbdir = str(tmpdir)
+    _append(dbdir, datetime(2021, 1, 4), 90)
+    store = RollupStore(dbdir, channels=2)
+    assert store.update()
+    assert not store.update()
+    hourly = store.hourly()
+    assert [60, 30] == hourly.count[:, 0].tolist()
+    _append(dbdir, datetime(2021, 1, 4, 1, 30), 30, temp=lambda i: 30.0)
+    assert store.update()
+    hourly = store.hourly()
+    assert [60, 60] == hourly.count[:, 0].tolist()
+    assert np.isclose(25.0, hourly.mean[1, 0])
+    # a fresh store picks up the persisted state
+    assert not RollupStore(dbdir, channels=2).update()
+
+
+def test_stores_sharing_a_directory_count_rows_once(tmpdir):
+    dbdir = str(tmpdir)
+    _append(dbdir, datetime(2021, 1, 4), 90)
+    daemon, plots = RollupStore(dbdir, channels=2), RollupStore(dbdir, channels=2)
+    assert daemon.update()
+    _append(dbdir, datetime(2021, 1, 4, 1, 30), 90)
+    assert daemon.update()
+    # plots still holds the state from before both updates
+    assert not plots.update()
+    assert [60, 60, 60] == plots.hourly().count[:, 0].tolist()
+    assert [180] == plots.daily().count[:, 0].tolist()
+
+
+def test_rewritten_file_is_aggregated_again(tmpdir):
+    dbdir = str(tmpdir)
+    path = _append(dbdir, datetime(2021, 1, 4), 120)
+    store = RollupStore(dbdir, channels=2)
+    store.update()
+    os.remove(path)
+    _append(dbdir, datetime(2021, 1, 4), 30)
+    store.update()
+    assert [30] == store.daily().count[:, 0].tolist()
+
+
+def test_daily_over_weeks(tmpdir):
+    dbdir = str(tmpdir)
+    _append(dbdir, datetime(2021, 1, 10, 23, 0), 120)  # Sunday, week 1 -> Monday
+    _append(dbdir, datetime(2021, 1, 11, 1, 0), 60)  # week 2
+    store = RollupStore(dbdir, channels=2)
+    store.update()
+    daily = store.daily()
+    assert [60, 120] == daily.count[:, 0].tolist()
+    assert 1 == len(store.daily(datetime(2021, 1, 11)))
+    assert [60, 60] == store.hourly(datetime(2021, 1, 11)).count[:, 0].tolist()
+
+
+def test_daily_only_coarsens_changed_weeks(tmpdir, monkeypatch):
+    dbdir = str(tmpdir)
+    for week in range(4):
+        _append(dbdir, datetime(2021, 1, 4) + timedelta(weeks=week), 60)
+    store = RollupStore(dbdir, channels=2)
+    store.update()
+    loaded = []
+    load = Aggregates.load
+    monkeypatch.setattr(Aggregates, 'load', staticmethod(lambda path: loaded.append(os.path.basename(path)) or
+                                                         load(path)))
+    _append(dbdir, datetime(2021, 1, 25, 1, 0), 60, temp=lambda i: 30.0)
+    assert store.update()
+    assert ['2021_w04.hourly.npz', 'daily.npz', '2021_w04.hourly.npz'] == loaded
+    daily = store.daily()
+    assert [60, 60, 60, 120] == daily.count[:, 0].tolist()
+    assert np.isclose(25.0, daily.mean[3, 0])
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from rs500common.scheduler import TickScheduler
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeStop(threading.Event):
+
+    def __init__(self, clock: FakeClock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        self.clock.now += timeout
+        return self.is_set()
+
+
+def test_ticks_do_not_drift():
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    started = []
+
+    def task():
+        started.append(clock.now)
+        clock.now += 0.3  # the work itself takes time
+        if len(started) == 4:
+            stop.set()
+
+    TickScheduler(10, align=False, clock=clock).run(task, stop)
+    assert [1000.0, 1010.0, 1020.0, 1030.0] == started
+
+
+def test_missed_ticks_are_skipped():
+    clock = FakeClock()
+    stop = FakeStop(clock)
+    started = []
+
+    def task():
+        started.append(clock.now)
+        if len(started) == 1:
+            clock.now += 25
+        if len(started) == 3:
+            stop.set()
+
+    scheduler = TickScheduler(10, align=False, clock=clock)
+    scheduler.run(task, stop)
+    assert [1000.0, 1025.0, 1030.0] == started
+    assert 1 == scheduler.missed
+    assert 3 == scheduler.ticks
+
+
+def test_invalid_interval():
+    with pytest.raises(ValueError):
+        TickScheduler(0)
@@ -0,0 +1,105 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from import_rs500_sqlite import import_all
+from rs500archive.query import Archive
+from rs500archive.rollup import DAY, HOUR, Aggregates
+from rs500archive.sink import SqliteSink
+from rs500archive.sqlstore import SqliteStore
+from rs5002csv.sink import Calibration
+from rs500reader.do import Response, TempHum
+
+from .conftest import write_archive
+
+
+def _write_week(dbdir: str, start: datetime, rows: int) -> None:
+    write_archive(dbdir, start, rows, lambda i: [(15 + i % 20, 50.0 + i % 30), (np.nan, np.nan)], timedelta(minutes=10))
+
+
+def test_sink_writes_wal_database(tmpdir):
+    path = str(tmpdir.join('rs500.sqlite'))
+    sink = SqliteSink(path, Calibration([0.5, 0.0], [0, 0]))
+    r = Response()
+    r.set_channel_data(1, TempHum(21.4, 52))
+    sink.write(datetime(2021, 1, 4, 12, 0), r)
+    sink.close()
+    store = SqliteStore(path, 2)
+    assert 'wal' == store.connection.execute('PRAGMA journal_mode').fetchone()[0]
+    readings = store.read_range()
+    assert np.datetime64('2021-01-04T12:00:00') == readings.timestamps[0]
+    assert np.isclose(21.9, readings.temperature[0, 0])
+    assert np.isnan(readings.temperature[0, 1])
+    store.close()
+
+
+def test_import_matches_archive(tmpdir):
+    dbdir = str(tmpdir.join('db'))
+    _write_week(dbdir, datetime(2021, 1, 4), 1000)
+    _write_week(dbdir, datetime(2021, 1, 11), 500)
+    path = str(tmpdir.join('rs500.sqlite'))
+    assert 1500 == import_all(dbdir, path, channels=2, batch_rows=128)
+    # Importing again replaces the rows
+    assert 1500 == import_all(dbdir, path, channels=2)
+    store = SqliteStore(path, 2)
+    start, end = datetime(2021, 1, 6), datetime(2021, 1, 12)
+    expected = Archive(dbdir).read_range(start, end)
+    actual = store.read_range(start, end)
+    assert (expected.timestamps == actual.timestamps).all()
+    np.testing.assert_array_equal(expected.temperature, actual.temperature)
+    assert (len(expected), 1) == store.read_range(start, end, channels=[2]).humidity.shape
+    store.close()
+
+
+def test_import_reads_the_width_of_the_archive(tmpdir):
+    dbdir = str(tmpdir.join('db'))
+    write_archive(dbdir, datetime(2021, 1, 4), 100, lambda i: [(20.0 + c, 40.0 + c) for c in range(7)])
+    path = str(tmpdir.join('rs500.sqlite'))
+    assert 100 == import_all(dbdir, path)
+    store = SqliteStore(path, read_only=True)
+    readings = store.read_range()
+    assert (100, 8) == readings.temperature.shape
+    np.testing.assert_array_equal([20.0 + c for c in range(7)], readings.temperature[0, :7])
+    assert np.isnan(readings.humidity[:, 7]).all()
+    store.close()
+
+
+def test_aggregates_are_computed_in_sql(tmpdir):
+    dbdir = str(tmpdir.join('db'))
+    _write_week(dbdir, datetime(2021, 1, 4), 1000)
+    path = str(tmpdir.join('rs500.sqlite'))
+    import_all(dbdir, path, channels=2)
+    store = SqliteStore(path, 2)
+    readings = Archive(dbdir).read_range()
+    for seconds in (HOUR, DAY):
+        expected = Aggregates.from_readings(readings, seconds)
+        actual = store.aggregate(seconds)
+        assert (expected.start == actual.start).all()
+        assert (expected.count == actual.count).all()
+        assert np.allclose(expected.mean, actual.mean, equal_nan=True)
+        np.testing.assert_array_equal(expected.minimum, actual.minimum)
+        np.testing.assert_array_equal(expected.maximum, actual.maximum)
+    coldest = store.aggregate(DAY, datetime(2021, 1, 5), datetime(2021, 1, 6), channels=[1])
+    assert (1, 2) == coldest.count.shape
+    assert 15.0 == coldest.minimum[0, 0]
+    store.close()
+
+
+def test_read_only_store_leaves_the_schema_alone(tmpdir):
+    dbdir = str(tmpdir.join('db'))
+    _write_week(dbdir, datetime(2021, 1, 4), 100)
+    path = str(tmpdir.join('rs500 db.sqlite'))
+    import_all(dbdir, path, channels=2)
+    store = SqliteStore(path, 4, read_only=True)
+    assert 2 == store.channels
+    readings = store.read_range(channels=[1, 3])
+    assert 100 == len(readings)
+    assert np.isnan(readings.temperature[:, 1]).all()
+    assert 0 == store.aggregate(DAY, channels=[3]).count.sum()
+    with pytest.raises(sqlite3.OperationalError):
+        store.insert(datetime(2021, 1, 4), [(20.0, 50.0)])
+    columns = [row[1] for row in store.connection.execute('PRAGMA table_info(readings)')]
+    assert ['ts', 't1', 'h1', 't2', 'h2'] == columns
+    store.close()
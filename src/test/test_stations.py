@@ -0,0 +1,121 @@
+import configparser
+import os
+import threading
+import time
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from rs500_daemon import check_station_targets, station_targets, stations_from_config
+from rs500reader.reader import Rs500Reader
+from rs500reader.stations import StationPool, discover_stations
+from rs500reader.transport import HidTransport, SimulatedTransport
+
+
+def test_discover_stations(monkeypatch: MonkeyPatch):
+    devices = [{'path': b'2-1:1.0', 'serial_number': 'B', 'vendor_id': 0x0483, 'product_id': 0x5750},
+               {'path': b'1-1:1.0', 'serial_number': '', 'vendor_id': 0x0483, 'product_id': 0x5750}]
+    monkeypatch.setattr('hid.enumerate', lambda vendor, product: devices)
+    stations = discover_stations()
+    assert [b'1-1:1.0', b'2-1:1.0'] == [s.path for s in stations]
+    assert [None, 'B'] == [s.serial for s in stations]
+
+
+def test_hid_transport_opens_by_serial_or_path(monkeypatch: MonkeyPatch):
+    opened = []
+
+    class Device(object):
+
+        def open(self, vendor, product, serial=None):
+            opened.append(('open', vendor, product, serial))
+
+        def open_path(self, path):
+            opened.append(('open_path', path))
+
+        def set_nonblocking(self, value):
+            pass
+
+    monkeypatch.setattr('hid.device', Device)
+    HidTransport(serial='B').open()
+    HidTransport(path=b'1-1:1.0').open()
+    HidTransport().open()
+    assert [('open', 0x0483, 0x5750, 'B'), ('open_path', b'1-1:1.0'), ('open', 0x0483, 0x5750, None)] == opened
+
+
+def test_stations_are_read_concurrently():
+    readers = {name: Rs500Reader(transport=SimulatedTransport(latency=0.2, seed=i))
+               for i, name in enumerate(['attic', 'cellar', 'garage'])}
+    threads = set()
+
+    def task(name, reader):
+        threads.add(threading.current_thread().name)
+        return reader.get_data()
+
+    with StationPool(readers) as pool:
+        started = time.monotonic()
+        results = pool.map(task)
+        duration = time.monotonic() - started
+    assert ['attic', 'cellar', 'garage'] == sorted(results)
+    assert all(r.get_channel_data(1) is not None for r in results.values())
+    assert 3 == len(threads)
+    assert duration < 0.5
+
+
+def test_failing_station_maps_to_none():
+    readers = {'ok': Rs500Reader(transport=SimulatedTransport()), 'broken': Rs500Reader(transport=SimulatedTransport())}
+
+    def task(name, reader):
+        if name == 'broken':
+            raise RuntimeError('boom')
+        return reader.get_data()
+
+    with StationPool(readers) as pool:
+        results = pool.map(task)
+    assert results['broken'] is None
+    assert results['ok'] is not None
+
+
+def _daemon_config(text: str) -> configparser.ConfigParser:
+    conf = configparser.ConfigParser()
+    conf.read_string('[daemon]\nsinks = csv, snapshot, sqlite\n[csv]\ndbdir = /db\n'
+                     '[snapshot]\npath = /ha/raumklima.csv\n[sqlite]\ndatabase = /db/raumklima.sqlite\n' + text)
+    return conf
+
+
+def test_stations_get_their_own_targets():
+    conf = _daemon_config('[station:attic]\nserial = A\n[station:cellar]\nserial = B\ndbdir = /cellar\n')
+    stations = dict(stations_from_config(conf))
+    attic = station_targets(conf, stations['attic'], None)
+    assert os.path.join('/db', 'attic') == attic['dbdir']
+    assert '/ha/raumklima_attic.csv' == attic['snapshot']
+    assert '/db/raumklima_attic.sqlite' == attic['sqlite']
+    assert 'attic_' == attic['redis_prefix']
+    assert '/cellar' == station_targets(conf, stations['cellar'], None)['dbdir']
+    check_station_targets(conf, list(stations.items()))
+    # A single unnamed station keeps the shared values
+    assert '/db' == station_targets(_daemon_config(''), None, None)['dbdir']
+
+
+def test_stations_record_to_their_own_capture():
+    conf = _daemon_config('[station:attic]\nserial = A\n[station:cellar]\nserial = B\n')
+    conf.set('daemon', 'record', '/captures/rs500.capture')
+    stations = dict(stations_from_config(conf))
+    assert '/captures/rs500_attic.capture' == station_targets(conf, stations['attic'], None)['record']
+    check_station_targets(conf, list(stations.items()))
+    conf.set('station:cellar', 'record', '/captures/rs500_attic.capture')
+    with pytest.raises(ValueError):
+        check_station_targets(conf, list(stations_from_config(conf)))
+
+
+def test_stations_writing_to_the_same_place_are_refused():
+    conf = _daemon_config('[station:attic]\npath = /ha/x.csv\n[station:cellar]\npath = /ha/x.csv\n')
+    with pytest.raises(ValueError):
+        check_station_targets(conf, stations_from_config(conf))
+
+
+def test_stations_are_yielded_as_they_complete():
+    readers = {'slow': Rs500Reader(transport=SimulatedTransport(latency=0.3)),
+               'fast': Rs500Reader(transport=SimulatedTransport(latency=0.0))}
+    with StationPool(readers) as pool:
+        order = [name for name, _ in pool.as_completed(lambda name, reader: reader.get_data())]
+    assert ['fast', 'slow'] == order
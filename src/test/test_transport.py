@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from rs500reader.frames import read_frames
+from rs500reader.reader import Rs500Reader
+from rs500reader.transport import RecordingTransport, SimulatedTransport, Transport, read_capture
+
+from .conftest import channel_values
+
+FRAME = bytes([0x7b, 0x00, 0xcb, 0x35, 0x01, 0x18, 0x28, 0x00, 0xd6, 0x34, 0x00, 0xff, 0x2b, 0x00, 0xd0, 0x35,
+               0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff, 0x7f, 0xff, 0xff] + [0] * 39)
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_reader_on_synthetic_frames():
+    with Rs500Reader(persistent=True, transport=SimulatedTransport(channels=5, seed=1)) as reader:
+        data = reader.get_data()
+    assert all(data.get_channel_data(c) is not None for c in range(1, 6))
+    assert data.get_channel_data(6) is None
+    assert 10 < data.get_channel_data(1).temperature < 30
+
+
+def test_dropped_channels_and_replay():
+    transport = SimulatedTransport([FRAME], dropped_channels=[2])
+    data = Rs500Reader(transport=transport).get_data()
+    assert 20.3 == data.get_channel_data(1).temperature
+    assert data.get_channel_data(2) is None
+    assert 21.4 == data.get_channel_data(3).temperature
+
+
+def test_late_answer_is_drained():
+    clock = Clock()
+    transport = SimulatedTransport([FRAME], latency=1.0, clock=clock, sleep=clock.sleep)
+    transport.open()
+    transport.write([0] * 64)
+    assert [] == transport.read(64, 500)
+    assert 0.5 == clock.now
+    # the late answer is still there at the next inquiry, the new one follows after the latency
+    clock.now = 10.0
+    transport.write([0] * 64)
+    assert list(FRAME) == transport.read(64, 0)
+    assert [] == transport.read(64, 0)
+    assert list(FRAME) == transport.read(64, 2000)
+    assert 11.0 == clock.now
+
+
+def test_errors():
+    transport = SimulatedTransport(error_rate=1.0)
+    with pytest.raises(IOError):
+        transport.open()
+    assert Rs500Reader(transport=transport).get_data() is None
+
+
+def test_recording_round_trip(tmpdir):
+    path = str(tmpdir.join('rs500.capture'))
+    reader = Rs500Reader(persistent=True,
+                         transport=RecordingTransport(SimulatedTransport(seed=3), path, clock=lambda: 1.5e9))
+    recorded = [reader.get_data() for _ in range(3)]
+    reader.close()
+    frames = read_capture(path)
+    assert 3 == len(frames)
+    timestamps, array = read_frames(path)
+    assert [1.5e9] * 3 == timestamps.tolist()
+    assert (3, 64) == array.shape
+    replay = Rs500Reader(transport=SimulatedTransport.from_capture(path))
+    assert [channel_values(r) for r in recorded] == [channel_values(replay.get_data()) for _ in range(3)]
+
+
+def test_simulation_does_not_need_hidapi():
+    # hid is only imported when a USB station is opened or enumerated
+    code = ('import sys; sys.modules["hid"] = None\n'
+            'from rs500reader.reader import Rs500Reader\n'
+            'from rs500reader.stations import StationPool\n'
+            'from rs500reader.transport import SimulatedTransport\n'
+            'print(Rs500Reader(transport=SimulatedTransport(seed=1)).get_data().get_channel_data(1) is not None)\n')
+    out = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert 'True\n' == out.stdout
+
+
+def test_transport_must_implement_every_method():
+    class WriteOnly(Transport):
+
+        def write(self, data):
+            return len(data)
+
+    with pytest.raises(TypeError):
+        WriteOnly()